@@ -1,35 +1,27 @@
 __version__ = '0.1.8'
 
 import argparse
-from cachetools import cached, TTLCache
 import configparser
-from fuzzyfinder import fuzzyfinder
-import importlib
+from contextlib import contextmanager
 import os
-import pkgutil
 import platform
-from prompt_toolkit import PromptSession, print_formatted_text as print
-from prompt_toolkit.application.current import get_app_session
-from prompt_toolkit.auto_suggest import AutoSuggestFromHistory
-from prompt_toolkit.completion import NestedCompleter, WordCompleter, DummyCompleter, merge_completers
-from prompt_toolkit.formatted_text import FormattedText
-from prompt_toolkit.shortcuts import set_title, CompleteStyle
-from prompt_toolkit.styles import Style
-from pyroute2 import IPRoute, netns
 from setproctitle import setproctitle
-import shlex
 import socket
 import sys
+from threading import Lock, Thread, local
+import time
 from types import SimpleNamespace
 
-import rosh.commands
-from rosh.commands import RoshCommand
-from rosh.completer import link_completer, netns_completer, phy_link_completer, RoshPeerCompleter, RoshTuplesCompleter
-from rosh.filters import RoshFilter
-from rosh.validator import RoshValidator
+from rosh.abbrev import RoshAbbrevTrie
+from rosh.cmdline import RoshCommandLine
+from rosh.manifest import RoshCommandEntry, RoshManifest
+
+# prompt_toolkit, pyroute2 and the command modules are imported on
+# demand, non-interactive actions (--version, config, commands) do not
+# need them
 
 # terminal with restricted color and font support (linux, xterm, vt100)
-BASE_STYLE = Style.from_dict({
+BASE_STYLE = {
     '':              '',
     'host':          'ansiwhite bg:ansigreen',
     'host_end':      'ansigreen',
@@ -37,11 +29,11 @@ BASE_STYLE = Style.from_dict({
     'netns':         'ansiblack bg:ansiyellow bold',
     'netns_begin':   'bg:ansiyellow',
     'netns_end':     'ansiyellow',
-})
+}
 BASE_SYMBOLS = SimpleNamespace(router='●', netns='▢', delimiter='◤')
 
 # modern terminals (default)
-EXTENDED_STYLE = Style.from_dict({
+EXTENDED_STYLE = {
     '':              '',
     'host':          '#aadd00 bg:#209680',
     'host_end':      '#209680',
@@ -49,7 +41,7 @@ EXTENDED_STYLE = Style.from_dict({
     'netns':         '#209680 bg:#aadd00 bold',
     'netns_begin':   'bg:#aadd00',
     'netns_end':     '#aadd00',
-})
+}
 EXTENDED_SYMBOLS = SimpleNamespace(router='⬤', netns='▢', delimiter='◤')
 
 class Rosh():
@@ -58,10 +50,21 @@ class Rosh():
     PromptSession.
     '''
     def __init__(self, config_file):
-        set_title("rosh@{}".format(socket.getfqdn()))
-
         self.session = None
+        self.style = None
         self.quit_callbacks = []
+        self.cmdline = None
+        self._namespace = None
+        self._namespace_pool = None
+
+        # namespace used by a thread running a command in another
+        # namespace (netns fan-out)
+        self._local = local()
+
+        # no DNS lookup, the FQDN is resolved in background
+        self.hostname = socket.gethostname() or 'localhost'
+        self.decorations = {}
+        self.decorations_lock = Lock()
 
         # initialize default config
         self.config = configparser.ConfigParser()
@@ -70,19 +73,45 @@ class Rosh():
             'complete_style': 'READLINE_LIKE',
             'reserve_space_for_menu': -1,
         }
+        self.config['mirror'] = {
+            'enabled': False,
+            'objects': 'addresses neighbours routes',
+        }
+
+        # load commands & filters lazily
+        manifest = RoshManifest(self, __version__)
+        (self.commands, self.filters) = manifest.load()
+        self.config.read_dict(manifest.config)
+
+        # command & filter name lookup (allows abbreviations)
+        self.command_trie = RoshAbbrevTrie(self.commands)
+        self.filter_trie = RoshAbbrevTrie(self.filters)
 
-        self.commands = self.find_commands(rosh.commands)
-        self.filters = self.find_filters(rosh.filters)
         self.configure(config_file)
 
         if os.environ.get('TERM') in ['linux', 'xterm', 'vt100']:
-            self.style = BASE_STYLE
+            self.style_rules = BASE_STYLE
             self.symbols = BASE_SYMBOLS
         else:
-            self.style = EXTENDED_STYLE
+            self.style_rules = EXTENDED_STYLE
             self.symbols = EXTENDED_SYMBOLS
 
-        self.ipr = IPRoute()
+    def init_session(self):
+        '''
+        Prepares the interactive PromptSession.
+        '''
+        from prompt_toolkit import PromptSession
+        from prompt_toolkit.auto_suggest import AutoSuggestFromHistory
+        from prompt_toolkit.completion import NestedCompleter
+        from prompt_toolkit.shortcuts import set_title
+        from prompt_toolkit.styles import Style
+        from rosh.validator import RoshValidator
+
+        set_title("rosh@{}".format(self.hostname))
+
+        self.style = Style.from_dict(self.style_rules)
+        if self._namespace is None:
+            self.connect()
         self.session = PromptSession(self.ps1,
                     auto_suggest=AutoSuggestFromHistory(),
                     completer=NestedCompleter.from_nested_dict(self.get_completers()),
@@ -96,6 +125,46 @@ class Rosh():
 
         self.print_banner()
 
+        Thread(target=self.load_decorations, name='RoshDecorations', daemon=True).start()
+
+    def load_decorations(self):
+        '''
+        Looks up the startup decorations which might block (FQDN for the
+        terminal title, NetNS list) in background. They are applied by
+        the prompt as soon as they are available.
+        '''
+        from rosh.registry import netns_registry
+
+        self.add_decoration('fqdn', socket.getfqdn())
+        self.add_decoration('netns', netns_registry.names())
+
+    def add_decoration(self, key, value):
+        with self.decorations_lock:
+            self.decorations[key] = value
+
+        # apply now if the prompt is active, otherwise the next prompt
+        # will apply it in its pre_run hook
+        app = self.session.app
+        if app.is_running and app.loop is not None:
+            app.loop.call_soon_threadsafe(self.apply_decorations)
+
+    def apply_decorations(self):
+        '''
+        Applies pending startup decorations, must run in the prompt's
+        event loop.
+        '''
+        from prompt_toolkit.application import run_in_terminal
+        from prompt_toolkit.shortcuts import set_title
+
+        with self.decorations_lock:
+            decorations = self.decorations
+            self.decorations = {}
+
+        if 'fqdn' in decorations:
+            set_title("rosh@{}".format(decorations['fqdn']))
+
+        if decorations.get('netns'):
+            run_in_terminal(lambda: self.print_netns_brief(decorations['netns']))
 
     def configure(self, config_file):
         '''
@@ -124,6 +193,10 @@ class Rosh():
         '''
         Print startup shell banner.
         '''
+        from prompt_toolkit import print_formatted_text as print
+        from prompt_toolkit.application.current import get_app_session
+        from prompt_toolkit.formatted_text import FormattedText
+
         uname = platform.uname()
 
         lines = [
@@ -138,23 +211,22 @@ class Rosh():
             print(text, style=self.style)
         print()
 
-        self.print_netns_brief()
-
-    def print_netns_brief(self):
+    def print_netns_brief(self, namespaces):
         '''
         Print a brief list of NetNS on startup (if allowed).
         '''
-        try:
-            items = []
-            length = 0
-            for ns in sorted(netns.listnetns()):
-                items.append(FormattedText([
-                    ('class:netns', f' {self.symbols.netns} {ns} '),
-                    ('class:netns_end', self.symbols.delimiter),
-                ]))
-                length += len(ns) + 5
-        except PermissionError:
-            return
+        from prompt_toolkit import print_formatted_text as print
+        from prompt_toolkit.application.current import get_app_session
+        from prompt_toolkit.formatted_text import FormattedText
+
+        items = []
+        length = 0
+        for ns in namespaces:
+            items.append(FormattedText([
+                ('class:netns', f' {self.symbols.netns} {ns} '),
+                ('class:netns_end', self.symbols.delimiter),
+            ]))
+            length += len(ns) + 5
 
         if len(items) == 0:
             return
@@ -188,106 +260,94 @@ class Rosh():
         '''
         Main REPL loop, will never return.
         '''
+        if self.session is None:
+            self.init_session()
+
         while True:
             try:
-                text = self.session.prompt()
+                text = self.session.prompt(pre_run=self.apply_decorations)
             except KeyboardInterrupt:
                 continue  # Control-C pressed. Try again.
             except EOFError:
                 break  # Control-D pressed.
 
-            cmd = shlex.split(text)
-
-            # skip empty input
-            if len(cmd) == 0:
-                continue
+            # reuse the command line parsed by the validator
+            cmdline = self.parse_command_line(text)
+            self.cmdline = None
 
-            # split command line by pipe symbols
-            (cmd, flts) = self.parse_filters(cmd)
-
-            # skip when there is no command
-            if len(cmd) == 0:
+            if cmdline.error is not None:
+                print("ERR: {}".format(cmdline.error[1]))
                 continue
 
-            # get command
-            (depth, command, cmd_arg0, cmd_args) = self.get_command(*cmd)
-            if not command:
-                print("ERR: unknown command")
-                continue
-
-            # get filters
-            filters_ok = True
-            filters = None
-            for flt in flts:
-                (filt, flt_arg0, flt_args) = self.get_filter(*flt)
-                if not filt:
-                    print("ERR: unknown filter")
-                    filters_ok = False
-                    break
-
-                if filters is None:
-                    filters = []
-
-                filters.append(filt(self, flt_arg0, *flt_args))
-
-            if not filters_ok:
+            # skip empty input
+            if cmdline.command is None:
                 continue
 
-            command.handler(filters, cmd_arg0, *cmd_args)
+            cmdline.run()
 
         for cb in self.quit_callbacks:
             cb()
 
+    def parse_command_line(self, text):
+        '''
+        Returns the parsed command line. The last one is memoized, so
+        the validator and the prompt loop share it.
+        '''
+        if self.cmdline is None or self.cmdline.text != text:
+            self.cmdline = RoshCommandLine(self, text)
+
+        return self.cmdline
+
     def dump_commands(self, filters=None):
         '''
         Prints the available command hierarchy to the terminal.
         '''
-        def _get_description(completer):
-            description = getattr(completer, 'description', None)
-            if description is None:
-                if isinstance(completer, WordCompleter):
-                    words = completer.words
-                    if callable(words):
-                        words = words()
-                    if '' in words:
-                        return ['[{}]'.format('|'.join([w for w in words if w != '']))]
-                    else:
-                        return ['<{}>'.format('|'.join(words))]
-                elif isinstance(completer, RoshPeerCompleter):
-                    return _get_description(completer.base_completer) + _get_description(completer.sub_completer)
-                elif isinstance(completer, RoshTuplesCompleter):
-                    descriptions = []
-                    for key, val in sorted(completer.flat_tuples.items(), key=lambda x: x[0]):
-                        descriptions.append(f'[{key} <{"|".join(_get_description(val))}>]')
-                    return descriptions
-            else:
-                return [description]
-
-            return []
+        from rosh.filters import RoshFilter
+
+        def _width(indent, commands):
+            # the longest indented command name
+            width = 0
+            for cmd, val in commands.items():
+                width = max(width, indent + len(cmd))
+                if not isinstance(val, RoshCommandEntry):
+                    width = max(width, _width(indent+2, val))
+            return width
+
+        width = max(18, max(_width(2, self.commands), *[2 + len(filt) for filt in self.filters]) + 2)
+
+        def _lines(indent, cmd, val):
+            lines = [
+                "{}{}".format(
+                    "{}{}".format(''.ljust(indent), cmd).ljust(width),
+                    val.description
+                )
+            ]
+            arguments = val.arguments(self)
+            if arguments:
+                description = ' '.join(arguments)
+                lines.append("{}  {}".format(''.ljust(indent), description))
+            return lines
 
         def _dump(indent, commands):
             for cmd, val in sorted(commands.items(), key=lambda x: x[0]):
-                if isinstance(val, RoshCommand) or isinstance(val, RoshFilter):
-                    description = getattr(val, 'description', '')
-
-                    lines = [
-                        "{}{}".format(
-                            "{}{}".format(''.ljust(indent), cmd).ljust(18),
-                            description
-                        )
-                    ]
-                    if val.completer is not None:
-                        descriptions = _get_description(val.completer)
-                        if descriptions:
-                            description = ' '.join(descriptions)
-                            lines.append("{}  {}".format(''.ljust(indent), description))
+                # the command having sub commands is printed by the parent
+                if cmd == '':
+                    continue
+
+                if isinstance(val, RoshCommandEntry):
+                    lines = _lines(indent, cmd, val)
                     if RoshFilter.filter_test_list(filters, lines):
                         for line in lines:
                             print(line)
                 else:
-                    line = "{}{}".format(''.ljust(indent), cmd)
-                    if RoshFilter.filter_test_item(filters, line):
-                        print(line)
+                    if '' in val:
+                        lines = _lines(indent, cmd, val[''])
+                    else:
+                        lines = ["{}{}".format(''.ljust(indent), cmd)]
+
+                    if RoshFilter.filter_test_list(filters, lines):
+                        for line in lines:
+                            print(line)
                         _dump(indent+2, val)
 
         print("available commands:")
@@ -296,11 +356,9 @@ class Rosh():
         print()
         print("available filters:")
         for filt, flt in sorted(self.filters.items()):
-            description = getattr(flt, 'description', '')
-
             line = "{}{}".format(
-                "  {}".format(filt).ljust(18),
-                description
+                "  {}".format(filt).ljust(width),
+                flt.description
             )
 
             if RoshFilter.filter_test_item(filters, line):
@@ -312,50 +370,151 @@ class Rosh():
         '''
         self.config.write(sys.stdout)
 
+    @property
+    def namespace(self):
+        '''
+        Get the state of the current namespace (RoshNamespace), which is
+        the namespace of the thread if set.
+        '''
+        namespace = getattr(self._local, 'namespace', None)
+        if namespace is not None:
+            return namespace
+
+        if self._namespace is None:
+            self.connect()
+
+        return self._namespace
+
+    @contextmanager
+    def in_namespace(self, namespace):
+        '''
+        Runs the block of the current thread in another namespace.
+        '''
+        self._local.namespace = namespace
+        try:
+            yield namespace
+        finally:
+            self._local.namespace = None
+
     @property
     def ipr(self):
         '''
         Get current IPRoute or NetNS instance for pyroute2 calls.
         '''
-        return self._ipr
-    
-    @ipr.setter
-    def ipr(self, value):
+        return self.namespace.ipr
+
+    @property
+    def links(self):
         '''
-        Set current IPRoute or NetNS instance, updates the prompt
-        and the reference in the link_completer, too 
+        Get the link index of the current IPRoute or NetNS instance.
         '''
+        return self.namespace.links
 
-        self._ipr = value
+    @property
+    def dump(self):
+        '''
+        Get the filtered dump helper of the current IPRoute or NetNS
+        instance.
+        '''
+        return self.namespace.dump
 
-        # clear lookup cache
-        self.cache_idx_to_ifname = TTLCache(maxsize=32, ttl=20)
-        self.cache_ifname_to_idx = TTLCache(maxsize=32, ttl=20)
+    def source(self, name):
+        '''
+        Get the source of show commands for addresses, neighbours or
+        routes: the mirror if enabled, filtered dumps otherwise.
+        '''
+        return self.mirror(name) or self.dump
 
-        link_completer.ipr = value
-        phy_link_completer.ipr = value
+    def mirror(self, name):
+        '''
+        Get the in-memory mirror (addresses, neighbours or routes) of the
+        current namespace, None if mirroring is disabled.
+        '''
+        if not self.config.getboolean('mirror', 'enabled'):
+            return None
 
-        hostname = socket.gethostname() or localhost
+        if not name in self.config['mirror']['objects'].split():
+            return None
 
-        if getattr(value, 'netns', None) is not None:
+        return self.namespace.mirror(name)
+
+    @property
+    def namespace_pool(self):
+        '''
+        Get the pool of namespace handles used by `netns`.
+        '''
+        if self._namespace_pool is None:
+            from rosh.namespace import RoshNamespacePool
+
+            self._namespace_pool = RoshNamespacePool(
+                self.config.getint('command.netns', 'pool_size', fallback=8),
+                self.config.getint('command.netns', 'idle_timeout', fallback=300),
+                self.config.get('command.netns', 'mode', fallback='socket'),
+            )
+            self.quit_callbacks.append(self._namespace_pool.close)
+
+        return self._namespace_pool
+
+    def connect(self):
+        '''
+        Opens the netlink socket of the main namespace.
+        '''
+        self.namespace = self.namespace_pool.get()
+
+    def switch_namespace(self, name=None):
+        '''
+        Switches to a netns namespace (None for the main namespace), the
+        handle is taken from the namespace pool.
+        '''
+        self.namespace = self.namespace_pool.get(name)
+
+    @namespace.setter
+    def namespace(self, value):
+        '''
+        Set current namespace state (RoshNamespace), updates the prompt
+        and the link index used by the link_completer, too 
+        '''
+        from rosh.completer import link_completer, phy_link_completer
+
+        # the state of a namespace which is not pooled is dropped
+        if self._namespace is not None and self._namespace is not value and not self.namespace_pool.holds(self._namespace):
+            self._namespace.close()
+        self._namespace = value
+
+        link_completer.link_index = value.links
+        phy_link_completer.link_index = value.links
+
+        if value.name is not None:
             self.set_prompt([
-                ('class:host', f' {self.symbols.router} {hostname} '),
+                ('class:host', f' {self.symbols.router} {self.hostname} '),
                 ('class:host_netns', f'{self.symbols.delimiter}'),
-                ('class:netns', f'{self.symbols.netns} {value.netns} '),
+                ('class:netns', f'{self.symbols.netns} {value.name} '),
                 ('class:netns_end', f'{self.symbols.delimiter}'),
                 ('', ' '),
             ])
         else:
             self.set_prompt([
-                ('class:host', f' {self.symbols.router} {hostname} '),
+                ('class:host', f' {self.symbols.router} {self.hostname} '),
                 ('class:host_end', f'{self.symbols.delimiter}'),
                 ('', ' '),
             ])
 
+    @ipr.setter
+    def ipr(self, value):
+        '''
+        Set current IPRoute or NetNS instance (not pooled).
+        '''
+        from rosh.namespace import RoshNamespace
+
+        self.namespace = RoshNamespace(value)
+
     def get_completers(self, commands=None, filter_completers=None):
         '''
         Extracts the completers from commands dict.
         '''
+        from prompt_toolkit.completion import DummyCompleter, NestedCompleter, merge_completers
+        from rosh.completer import RoshLazyCompleter
+
         if commands is None:
             commands = self.commands
 
@@ -367,28 +526,34 @@ class Rosh():
 
         d = {}
         for k, v in commands.items():
-            if isinstance(v, RoshCommand):
-                c = v.completer
-                if c is None:
-                    d[k] = filter_completers
+            if isinstance(v, RoshCommandEntry):
+                if v.has_completer:
+                    d[k] = RoshLazyCompleter(lambda entry=v: entry.load(self).completer)
                 else:
-                    d[k] = c
+                    d[k] = filter_completers
             elif isinstance(v, dict):
                 d[k] = self.get_completers(v, filter_completers)
 
+                # command having sub commands: complete both
+                if '' in d[k] and len(d[k]) > 1:
+                    base = d[k].pop('')
+                    d[k] = merge_completers([base, NestedCompleter.from_nested_dict(d[k])])
+
         return d
 
     def get_filter_completers(self):
         '''
         Extracts the completers from filters list.
         '''
+        from prompt_toolkit.completion import DummyCompleter, NestedCompleter
+        from rosh.completer import RoshLazyCompleter, RoshPeerCompleter
 
         nc = NestedCompleter({})
 
         d = {}
         for k, v in self.filters.items():
             d[k] = RoshPeerCompleter(
-                v.completer,
+                RoshLazyCompleter(lambda entry=v: entry.load(self).completer),
                 NestedCompleter({
                     '': DummyCompleter(),
                     '|': nc
@@ -397,129 +562,59 @@ class Rosh():
 
         return nc
 
-    def find_commands(self, ns_pkg):
-        '''
-        Finds packages in a namespace which have a `is_rosh_command`
-        attribute set to `True`, recursively.
-        '''
-        commands = {}
-        strip = len(ns_pkg.__name__) + 1
-
-        for finder, name, ispkg in pkgutil.iter_modules(ns_pkg.__path__, ns_pkg.__name__ + "."):
-            module = importlib.import_module(name)
-
-            is_command = False
-            try:
-                is_command = module.is_rosh_command
-            except AttributeError:
-                pass
-
-            childs = self.find_commands(module)
-
-            if is_command:
-                if childs:
-                    commands[name[strip:]] = {
-                        '': module.rosh_command(self)
-                    }
-                    commands[name[strip:]].update(childs)
-                else:
-                    commands[name[strip:]] = module.rosh_command(self)
-            elif childs:
-                commands[name[strip:]] = childs
-
-        return commands
-
     def get_command(self, command, *args):
         '''
-        Traverses the internal commands dict searching for the command
+        Traverses the commands trie searching for the command
         and returns a tuple:
         - the depth where the command has matched (if any)
         - the RoshCommand that matched (or None)
         - the command name that matched
         - additional command parameters
+
+        A command having sub commands gets the parameters not matching
+        any sub command.
         '''
-        def _abbrev_cmd(commands):
-            abbreviations = {}
-            for command in commands.keys():
-                for i in range(1, len(command)):
-                    cmd = command[:i]
-                    if len(list(filter(lambda x: x.startswith(cmd), commands))) == 1:
-                        abbreviations[cmd] = commands[command]
-            return abbreviations
-
-        def _get_cmd(depth, commands, command='', *args):
-            if command in commands:
-                if isinstance(commands[command], dict):
-                    return _get_cmd(depth + 1, commands[command], *args)
-                elif isinstance(commands[command], RoshCommand):
-                    return (depth, commands[command], command, args)
-            else:
-                abbreviations = _abbrev_cmd(commands)
-                if command in abbreviations:
-                    if isinstance(abbreviations[command], dict):
-                        return _get_cmd(depth + 1, abbreviations[command], *args)
-                    elif isinstance(abbreviations[command], RoshCommand):
-                        return (depth, abbreviations[command], command, args)
+        def _get_cmd(depth, commands, command='', *args, parent=None):
+            (match, candidates) = commands.lookup(command)
+            if isinstance(match, RoshAbbrevTrie):
+                return _get_cmd(depth + 1, match, *args, parent=command)
+            elif isinstance(match, RoshCommandEntry):
+                return (depth, match.load(self), command, args)
+
+            if not candidates:
+                (match, candidates) = commands.lookup('')
+                if isinstance(match, RoshCommandEntry):
+                    return (depth - 1, match.load(self), parent, (command, *args))
 
             return (depth, None, command, args)
 
-        return _get_cmd(1, self.commands, command, *args)
+        return _get_cmd(1, self.command_trie, command, *args)
 
-    def find_filters(self, ns_pkg):
+    def get_command_candidates(self, *cmd):
         '''
-        Finds packages in a namespace which have a `is_filter`
-        attribute set to `True`, recursively.
+        Returns the command names matching an ambiguous abbreviation
+        in the command line (if any).
         '''
-        filters = {}
-        strip = len(ns_pkg.__name__) + 1
-
-        for finder, name, ispkg in pkgutil.iter_modules(ns_pkg.__path__, ns_pkg.__name__ + "."):
-            module = importlib.import_module(name)
+        commands = self.command_trie
+        for command in cmd:
+            (match, candidates) = commands.lookup(command)
+            if not isinstance(match, RoshAbbrevTrie):
+                return candidates
+            commands = match
 
-            is_filter = False
-            try:
-                is_filter = module.is_rosh_filter
-            except AttributeError:
-                pass
-
-            childs = self.find_filters(module)
-
-            if is_filter:
-                if childs:
-                    filters[name[strip:]] = {
-                        '': module.rosh_filter
-                    }
-                    filters[name[strip:]].update(childs)
-                else:
-                    filters[name[strip:]] = module.rosh_filter
-            elif childs:
-                filters[name[strip:]] = childs
-
-        return filters
+        return ()
 
     def get_filter(self, filt, *args):
         '''
-        Searches the flat internal filters dict searching for the
-        filter and returns a tuple:
+        Searches the filters trie searching for the filter and
+        returns a tuple:
         - the RoshFilter that matched (or None)
         - the filter name that matched
         - additional filter parameters
         '''
-        def _abbrev_flt():
-            abbreviations = {}
-            for filt in self.filters.keys():
-                for i in range(1, len(filt)):
-                    flt = filt[:i]
-                    if len(list(filter(lambda x: x.startswith(flt), self.filters))) == 1:
-                        abbreviations[flt] = self.filters[filt]
-            return abbreviations
-
-        if filt in self.filters:
-            return (self.filters[filt], filt, args)
-        else:
-            abbreviations = _abbrev_flt()
-            if filt in abbreviations:
-                return (abbreviations[filt], filt, args)
+        (match, candidates) = self.filter_trie.lookup(filt)
+        if match is not None:
+            return (match.load(self), filt, args)
 
         return (None, filt, args)
 
@@ -535,22 +630,10 @@ class Rosh():
         '''
         Converts an ifindex into a ifname (returns ifindex if the name
         cannot be resolved).
-
-        The lookup is cached for 20s.
         '''
-        # cache lookup
-        ifname = self.cache_idx_to_ifname.get(idx)
-        if ifname is not None:
-            return ifname
-
-        link = next(iter(self.ipr.get_links(index=idx)), None)
-
-        if link is None:
-            ifname = idx
-        else:
-            ifname = link.get_attr('IFLA_IFNAME', idx)
-
-        self.cache_idx_to_ifname[idx] = ifname
+        ifname = self.links.ifname(idx)
+        if ifname is None:
+            return idx
 
         return ifname
 
@@ -558,22 +641,10 @@ class Rosh():
         '''
         Converts an ifname into a ifindex (returns 0 if the name
         cannot be resolved).
-
-        The lookup is cached for 20s.
         '''
-        # cache lookup
-        idx = self.cache_ifname_to_idx.get(ifname)
-        if idx is not None:
-            return idx
-
-        link = next(iter(self.ipr.get_links(ifname=ifname)), None)
-
-        if link is None:
-            idx = 0
-        else:
-            idx = link['index']
-
-        self.cache_ifname_to_idx[ifname] = idx
+        idx = self.links.index(ifname)
+        if idx is None:
+            return 0
 
         return idx
 
@@ -592,6 +663,8 @@ def main():
     parser.add_argument('--version', action='version',
                     version='%(prog)s {version}'.format(version=__version__))
     parser.add_argument('-c', dest='config', default='/etc/rosh.conf', required=False, help='configuration filename')
+    parser.add_argument('--startup-profile', action='store_true', help='report import times and time to first prompt')
+    parser.add_argument('--startup-budget', type=float, metavar='MS', help='fail if the time to first prompt exceeds MS milliseconds (implies --startup-profile)')
 
     subparsers = parser.add_subparsers(
         dest='action', required=False, help="specifies the action to perform")
@@ -607,6 +680,16 @@ def main():
 
     assert action in action_parsers
 
+    if args.startup_profile or args.startup_budget is not None:
+        from rosh.startup import RoshStartupProfile
+
+        profile = RoshStartupProfile(args.config, args.startup_budget)
+        profile.run()
+        profile.report()
+        if not profile.within_budget():
+            sys.exit(1)
+        return
+
     rosh = Rosh(args.config)
     if action == 'shell':
         rosh.prompt_loop()
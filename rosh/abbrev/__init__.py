@@ -0,0 +1,76 @@
+_missing = object()
+
+class _Node():
+    __slots__ = ('children', 'value', 'keys', 'unique')
+
+    def __init__(self):
+        self.children = {}
+        self.value = _missing
+        self.keys = []
+        self.unique = None
+
+class RoshAbbrevTrie():
+    '''
+    Immutable prefix trie resolving command and filter names and their
+    unique abbreviations. A lookup takes time proportional to the length
+    of the input, regardless of the number of names.
+
+    Nested dicts are converted into nested tries.
+    '''
+    __slots__ = ('_root',)
+
+    def __init__(self, items):
+        values = {}
+        for key, value in items.items():
+            if isinstance(value, dict):
+                value = RoshAbbrevTrie(value)
+            values[key] = value
+
+        root = _Node()
+        for key, value in values.items():
+            node = root
+            node.keys.append(key)
+            for c in key:
+                node = node.children.setdefault(c, _Node())
+                node.keys.append(key)
+            node.value = value
+
+        # freeze the nodes
+        def _freeze(node):
+            node.keys = tuple(sorted(node.keys))
+            if len(node.keys) == 1:
+                node.unique = values[node.keys[0]]
+            for child in node.children.values():
+                _freeze(child)
+        _freeze(root)
+
+        self._root = root
+
+    def lookup(self, key):
+        '''
+        Returns a tuple:
+        - the value of the name matching exactly or of the unique
+          abbreviated name (or None)
+        - the names starting with the key if the key is an ambiguous
+          abbreviation
+        '''
+        node = self._root
+        for c in key:
+            node = node.children.get(c)
+            if node is None:
+                return (None, ())
+
+        if node.value is not _missing:
+            return (node.value, ())
+
+        # empty keys are never abbreviations
+        if key == '':
+            return (None, ())
+
+        if node.unique is not None:
+            return (node.unique, ())
+
+        return (None, node.keys)
+
+    def __contains__(self, key):
+        return self.lookup(key)[0] is not None
@@ -0,0 +1,118 @@
+import shlex
+
+
+class RoshCommandLine():
+    '''
+    A command line parsed once: the resolved command, its parsed
+    arguments and the filter instances. It is shared by the validator
+    and the prompt loop, so each input line is parsed and its values
+    (ifindex etc.) are looked up only once.
+    '''
+    def __init__(self, rosh, text):
+        self.rosh = rosh
+        self.text = text
+
+        self.command = None
+        self.arg0 = None
+        self.args = ()
+        self.kwargs = {}
+        self.filters = None
+
+        # tuple of cursor position and message if the line is invalid
+        self.error = None
+
+        self.parse()
+
+    def parse(self):
+        try:
+            text = shlex.split(self.text)
+        except ValueError as err:
+            self.error = (len(self.text), str(err))
+            return
+
+        # skip empty input
+        if len(text) == 0:
+            return
+
+        (cmd, filters) = self.rosh.parse_filters(text)
+
+        # skip when there is no command
+        if len(cmd) == 0:
+            return
+
+        (depth, command, arg0, args) = self.rosh.get_command(*cmd)
+
+        # no command found
+        if not command:
+            if depth > len(cmd):
+                self.error = (len(self.text), 'command incomplete')
+            else:
+                partial = shlex.join(cmd[:depth])
+
+                candidates = self.rosh.get_command_candidates(*cmd[:depth])
+                if candidates:
+                    self.error = (len(partial), 'Ambiguous command: {} ({})'.format(partial, '|'.join(candidates)))
+                else:
+                    self.error = (len(partial), 'Unknown command: {}'.format(partial))
+            return
+
+        # link events are applied once per command line, the lookups
+        # of the command read the index
+        self.rosh.links.refresh()
+
+        # check command param
+        (pos, message, kwargs) = command.parse(arg0, args)
+        if pos is not None:
+            partial = shlex.join(cmd[:depth + pos + 1])
+            self.error = (len(partial), message)
+            return
+
+        # check filters, the columns of the table may be changed by the
+        # filters
+        instances = None
+        field_names = command.field_names
+        for filt in filters:
+            # get filter class
+            (flt, flt_arg0, flt_args) = self.rosh.get_filter(*filt)
+
+            if not flt:
+                partial = shlex.join(text[:len(cmd) + 3])
+
+                (match, candidates) = self.rosh.filter_trie.lookup(flt_arg0)
+                if candidates:
+                    self.error = (len(partial), 'Ambiguous filter: {} ({})'.format(flt_arg0, '|'.join(candidates)))
+                else:
+                    self.error = (len(partial), 'Unknown filter: {}'.format(flt_arg0))
+                return
+
+            # validate filter input
+            (pos, message) = flt.validate(self.rosh, flt_arg0, flt_args)
+            if pos is None:
+                (pos, message) = flt.validate_columns(self.rosh, field_names, flt_args)
+            if pos is not None:
+                partial = shlex.join(text[:len(cmd) + pos + 3])
+                self.error = (len(partial), message)
+                return
+
+            if instances is None:
+                from rosh.filters import RoshFilterChain
+                instances = RoshFilterChain()
+            instances.append(flt(self.rosh, flt_arg0, *flt_args))
+            field_names = flt.columns(field_names, flt_args)
+
+        self.command = command
+        self.arg0 = arg0
+        self.args = args
+        self.kwargs = kwargs
+        self.filters = instances
+
+    def run(self):
+        from rosh.output.pipeline import RoshOutputStop
+
+        self.rosh.links.refresh()
+        try:
+            self.command.run(self.filters, self.arg0, self.args, self.kwargs)
+        except RoshOutputStop:
+            # a pipe stage (head) has got all rows, an unfinished dump
+            # on the dump socket is dropped with the socket
+            self.rosh.dump.close()
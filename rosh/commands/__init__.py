@@ -10,6 +10,14 @@ class RoshCommand(ABC):
     '''
     Base class for commands.
     '''
+
+    # config sections & default options used by the command
+    config_defaults = {}
+
+    # columns of the table printed by the command (None if unknown), the
+    # column names of the filters are validated against them
+    field_names = None
+
     def __init__(self, rosh, completer=None, min_args=0):
         self.rosh = rosh
         self.completer = completer
@@ -20,6 +28,23 @@ class RoshCommand(ABC):
     def handler(self, filters, cmd, *args):
         pass
 
+    def run(self, filters, cmd, args, kwargs):
+        '''
+        Runs the command with the arguments parsed by `parse()`.
+        '''
+        self.handler(filters, cmd, *args)
+
+    def parse(self, cmd, args):
+        '''
+        Validates and parses the command arguments, returns a tuple:
+        - the position of the invalid argument (or None)
+        - the error message (or None)
+        - the parsed arguments passed to `run()`
+        '''
+        (pos, msg) = self.validate(cmd, args)
+
+        return (pos, msg, {})
+
     def validate(self, cmd, args):
         if len(args) < self.min_args:
             return (len(args), "missing argument")
@@ -37,6 +62,20 @@ class RoshTuplesCommand(RoshCommand):
     '''
     Class for commands allowing named parameters (tuples).
     '''
+    def handler(self, filters, cmd, *args):
+        (pos, msg, kwargs) = self.parse_args(cmd, args)
+
+        assert pos is None
+
+        self.run(filters, cmd, args, kwargs)
+
+    @abstractmethod
+    def run(self, filters, cmd, args, kwargs):
+        pass
+
+    def parse(self, cmd, args):
+        return self.parse_args(cmd, args)
+
     def validate(self, cmd, args):
         (pos, msg, kwargs) = self.parse_args(cmd, args)
 
@@ -62,8 +101,6 @@ class RoshTuplesCommand(RoshCommand):
                 return (i + 1, 'missing parameter value', None)
 
             value_completer = self.completer.tuples[args[i]]
-            if getattr(value_completer, 'base_completer', None):
-                value_completer = value_completer.base_completer
             if callable(getattr(value_completer, 'parse_value', None)):
                 try:
                     kwargs[args[i]] = value_completer.parse_value(self.rosh, args[i], args[i + 1])
@@ -72,6 +109,43 @@ class RoshTuplesCommand(RoshCommand):
 
         return (None, None, kwargs)
 
+class RoshArgsTuplesCommand(RoshTuplesCommand):
+    '''
+    Class for commands allowing positional arguments followed by named
+    parameters (tuples). The positional arguments are parsed using
+    `args_completer` and passed as `args` keyword argument.
+    '''
+    def __init__(self, rosh, completer=None, args_completer=None, min_args=0, max_args=None):
+        super().__init__(rosh, completer, min_args)
+        self.args_completer = args_completer
+        self.max_args = max_args
+
+    def parse_args(self, cmd, args):
+        values = []
+        for (i, arg) in enumerate(args):
+            if arg in self.completer.tuples:
+                break
+
+            if self.max_args is not None and i >= self.max_args:
+                return (i, 'invalid parameter name', None)
+
+            try:
+                values.append(self.args_completer.parse_value(self.rosh, None, arg))
+            except ValueError as err:
+                return (i, str(err), None)
+        else:
+            i = len(args)
+
+        (pos, msg, kwargs) = super().parse_args(cmd, args[i:])
+        if pos is not None:
+            return (i + pos, msg, kwargs)
+
+        if len(values) < self.min_args:
+            return (len(values), 'missing argument', None)
+
+        kwargs['args'] = values
+        return (None, None, kwargs)
+
 class RoshSystemCommand(RoshCommand):
     '''
     Class for system commands which calls a external binary like ping or traceroute.
@@ -9,6 +9,15 @@ ifstatecli_exe = shutil.which('ifstatecli')
 class RoshIfstateCommand(RoshSystemCommand):
     description = 'run ifstatecli command'
 
+    config_defaults = {
+        'command.ifstatecli': {
+            'config_file': '',
+            'quiet': False,
+            'soft_schema': False,
+            'verbose': False
+        }
+    }
+
     def __init__(self, rosh):
         completer = WordCompleter([
             'apply',
@@ -18,12 +27,6 @@ class RoshIfstateCommand(RoshSystemCommand):
             'showall'
         ])
         super().__init__(rosh, ifstatecli_exe, completer)
-        rosh.config['command.ifstatecli'] = {
-            'config_file': '',
-            'quiet': False,
-            'soft_schema': False,
-            'verbose': False
-        }
 
     def handler(self, filters, cmd, *args):
         config_args = []
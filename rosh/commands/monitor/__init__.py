@@ -1,14 +1,18 @@
 from prompt_toolkit import print_formatted_text as print
-import shutil
-import signal
-import subprocess
-from threading import Thread
+from prompt_toolkit.completion import DummyCompleter
+from threading import Event, Thread
+import os
+import time
 
 from rosh.commands import RoshCommand
-from rosh.completer import link_completer, RoshPeerCompleter, RoshWordCompleter
+from rosh.commands.show.churn import show_churn
+from rosh.completer import file_completer, link_completer, RoshPeerCompleter, RoshWordCompleter
 from rosh.filters import RoshFilter
-
-ip_exe = shutil.which('ip')
+from rosh.monitor import EVENT_COLUMNS, RoshEventBatch, RoshEventSource, RoshEventSummary, event_time
+from rosh.monitor.record import RoshEventRecorder, RoshEventReplay
+from rosh.output import RoshOutputStream
+from rosh.output.columns import int_key
+from rosh.output.pipeline import RoshOutputStop
 
 MONITOR_COMMANDS = [
                 'all',
@@ -20,98 +24,388 @@ MONITOR_COMMANDS = [
                 'prefix',
                 'route',
                 'rule',
+                'stats',
+                'record',
+                'replay',
 ]
 
+# monitor commands taking a file
+MONITOR_FILES = ['record', 'replay']
+
+# seconds between checks of the stop flag
+MONITOR_INTERVAL = 0.2
+
+class RoshMonitorOutput():
+    '''
+    Output of the monitor thread: the lines of a batch of events are
+    printed above the prompt at once.
+    '''
+    def __init__(self):
+        self.lines = []
+
+    def write(self, text):
+        self.lines.append(text)
+
+    def flush(self):
+        if self.lines:
+            text = ''.join(self.lines)
+            self.lines = []
+            print(text, end='')
+
+class RoshMonitorCompleter(RoshPeerCompleter):
+    '''
+    Completes the monitor object followed by an interface, or a file
+    (and the speed) after record and replay.
+    '''
+    def __init__(self):
+        super().__init__(RoshWordCompleter(MONITOR_COMMANDS), link_completer)
+        self.files_completer = RoshPeerCompleter(
+            self.base_completer,
+            RoshPeerCompleter(file_completer, DummyCompleter())
+        )
+
+    def get_completions(self, document, complete_event):
+        words = document.text_before_cursor.split()
+        if words and words[0] in MONITOR_FILES:
+            yield from self.files_completer.get_completions(document, complete_event)
+        else:
+            yield from super().get_completions(document, complete_event)
+
 class RoshMonitor(RoshCommand):
     description = 'monitor for changes'
 
+    config_defaults = {
+        'command.monitor': {
+            # receive buffer of the event socket (bytes)
+            'rcvbuf': 32 * 1024 * 1024,
+            # events are printed in batches (seconds)
+            'interval': 0.5,
+            # coalesce repeated events of the same object in a batch
+            'coalesce': 'yes',
+            # events per second printed as rows, above summary lines
+            # per second are printed
+            'rate': 1000,
+        },
+    }
+
     def __init__(self, rosh):
-        self.monitor_process = None
         self.monitor_thread = None
+        self.monitor_stop = Event()
+        self.recorder = None
 
         rosh.register_quit_fn(self.reset_monitor)
+        rosh.register_quit_fn(self.reset_recorder)
 
-        completer = RoshPeerCompleter(
-            RoshWordCompleter(MONITOR_COMMANDS),
-            link_completer
-        )
-        super().__init__(rosh, completer, min_args=1)
+        super().__init__(rosh, RoshMonitorCompleter(), min_args=1)
 
     def handler(self, filters, cmd, *args):
-        if args[0] == 'none':
-            self.reset_monitor()
-        else:
-            self.reset_monitor()
-
-            # use iproute2 naming
-            if args[0] == 'interface':
-                args[0] = 'link'
+        if args[0] == 'stats':
+            # churn statistics are collected in the background, a running
+            # monitor is kept
+            show_churn(self.rosh, self.output, filters)
+            return
 
-            # always enable label prefix
-            args = list(args)
-            args.insert(1, 'label')
+        if args[0] == 'record':
+            # the recording is kept while other objects are monitored
+            self.reset_recorder()
+            self.start_recorder(os.path.expanduser(args[1]))
+            return
 
-            # add 'dev' prefix to interface name, if any
-            if len(args) > 2:
-                args.insert(2, 'dev')
+        self.reset_monitor()
 
-            self.start_monitor(filters, *args)
+        if args[0] == 'none':
+            self.reset_recorder()
+        elif args[0] == 'replay':
+            source = RoshEventReplay(os.path.expanduser(args[1]), float(args[2]) if len(args) > 2 else 1.0)
+            self.start_worker(filters, source, list(EVENT_COLUMNS))
+        else:
+            ifindex = self.rosh.ifname_to_idx(args[1]) if len(args) > 1 else None
+            self.start_monitor(filters, args[0], ifindex)
 
     def validate(self, cmd, args):
         result = super().validate(cmd, args)
         if result[0] != None:
             return result
-        
 
-        if len(args) > 2:
-            return (2, "to many parameters (>2)")
 
         if not args[0] in MONITOR_COMMANDS:
             return (0, f"{args[0]} is no valid monitor object")
 
-        if len(args) > 1 and not args[1] in link_completer.get_links():
+        if args[0] == 'record':
+            return self.validate_record(args)
+
+        if args[0] == 'replay':
+            return self.validate_replay(args)
+
+        if len(args) > 2:
+            return (2, "to many parameters (>2)")
+
+        if args[0] == 'stats' and len(args) > 1:
+            return (1, "to many parameters (>1)")
+
+        if len(args) > 1 and not self.rosh.links.exists(args[1]):
             return (1, f"interface {args[1]} does not exist")
 
         return (None, None)
 
-    def reset_monitor(self):
-        # kill `ip monitor` process
-        if self.monitor_process is not None:
-            self.monitor_process.kill()
-            self.monitor_process = None
+    def validate_record(self, args):
+        if len(args) < 2:
+            return (1, "missing file")
+
+        if len(args) > 2:
+            return (2, "to many parameters (>2)")
+
+        filename = os.path.expanduser(args[1])
+        if os.path.isdir(filename) or not os.path.isdir(os.path.dirname(os.path.abspath(filename))):
+            return (1, f"{args[1]} is no valid file")
+
+        # events are appended to existing event logs only
+        if os.path.exists(filename) and os.path.getsize(filename) > 0:
+            try:
+                RoshEventReplay(filename).close()
+            except (ValueError, OSError) as err:
+                return (1, str(err))
+
+        return (None, None)
 
-        # terminate process
+    def validate_replay(self, args):
+        if len(args) < 2:
+            return (1, "missing file")
+
+        if len(args) > 3:
+            return (3, "to many parameters (>3)")
+
+        try:
+            RoshEventReplay(file_completer.parse_value(self.rosh, None, args[1])).close()
+        except (ValueError, OSError) as err:
+            return (1, str(err))
+
+        if len(args) > 2:
+            try:
+                if float(args[2]) < 0:
+                    raise ValueError()
+            except ValueError:
+                return (2, f"{args[2]} is no valid speed")
+
+        return (None, None)
+
+    def reset_recorder(self):
+        # stop the recorder thread
+        if self.recorder is not None:
+            self.recorder.close()
+            print(f'recorded {self.recorder.records} datagrams ({self.recorder.bytes // 1024} KiB) to {self.recorder.filename}, {self.recorder.source.overflows} overflows')
+            self.recorder = None
+
+    def start_recorder(self, filename):
+        # all objects are recorded, replays are filtered
+        groups = 0
+        for cols in EVENT_COLUMNS.values():
+            groups |= cols.groups
+
+        rcvbuf = self.rosh.config['command.monitor'].getint('rcvbuf')
+        self.recorder = RoshEventRecorder(RoshEventSource(self.rosh.ipr, groups, rcvbuf), filename)
+
+    def reset_monitor(self):
+        # stop the monitor thread
         if self.monitor_thread is not None:
+            self.monitor_stop.set()
             self.monitor_thread.join()
             self.monitor_thread = None
 
-    def start_monitor(self, *args):
-        self.monitor_thread = Thread(target=self.monitor_worker, name='RoshMonitor', args=args)
+    def start_monitor(self, filters, obj, ifindex=None):
+        names = list(EVENT_COLUMNS) if obj == 'all' else [obj]
+        groups = 0
+        for name in names:
+            groups |= EVENT_COLUMNS[name].groups
+
+        # the socket is opened in the current namespace
+        rcvbuf = self.rosh.config['command.monitor'].getint('rcvbuf')
+        source = RoshEventSource(self.rosh.ipr, groups, rcvbuf)
+
+        self.start_worker(filters, source, names, ifindex)
+
+    def start_worker(self, filters, source, names, ifindex=None):
+        '''
+        Starts the monitor thread rendering the events of a source (the
+        event socket or a replay).
+        '''
+        columns = {}
+        for name in names:
+            cols = EVENT_COLUMNS[name](self.rosh)
+            for msg_type in cols.events:
+                columns[msg_type] = cols
+
+        self.monitor_stop.clear()
+        self.monitor_thread = Thread(target=self.monitor_worker, name='RoshMonitor', args=(filters, source, columns, ifindex, len(names) > 1))
         self.monitor_thread.start()
 
-    def monitor_worker(self, filters, *args):
-        def preexec_cb():
-            # Ignore the SIGINT signal by setting the handler to the standard
-            # signal handler SIG_IGN.
-            signal.signal(signal.SIGINT, signal.SIG_IGN)
+    def head_fields(self, labels, coalesce):
+        # the rows of several objects are labeled
+        fields = ['time', 'object', 'event'] if labels else ['time', 'event']
+        if coalesce:
+            fields.append('count')
+        return fields
+
+    def get_table(self, tables, output, filters, cols, labels, coalesce):
+        '''
+        Returns the output table of an event columns object.
+        '''
+        tbl = tables.get(cols)
+        if tbl is None:
+            # rows are written as they arrive
+            tbl = tables[cols] = RoshOutputStream(filters, file=output, sample=1)
+            tbl.field_names = [*self.head_fields(labels, coalesce), *cols.field_names]
+            tbl.align = dict(cols.align)
+            tbl.types = dict(cols.types)
+            tbl.align['count'] = 'r'
+            tbl.types['count'] = int_key
+
+        return tbl
+
+    def decode(self, pending, columns, ifindex):
+        '''
+        Decodes received messages, returns a list of tuples of the time,
+        the event columns, the event and the decoded object.
+        '''
+        events = []
+        for (ts, msg_type, msg) in pending:
+            cols = columns.get(msg_type)
+            if cols is None:
+                continue
+
+            obj = cols.decode(msg_type, msg)
+            if ifindex is not None and cols.ifindex(obj) != ifindex:
+                continue
+
+            events.append((ts, cols, cols.event(msg_type, msg), obj))
+
+        return events
+
+    def write_rows(self, events, tables, output, filters, labels, coalesce):
+        '''
+        Writes the events of a batch as table rows.
+        '''
+        if coalesce:
+            batch = RoshEventBatch()
+            for event in events:
+                batch.add(*event)
+            entries = batch.values()
+        else:
+            entries = (event + (None, ) for event in events)
+
+        for (ts, cols, event, obj, count) in entries:
+            row = [event_time(ts)]
+            if labels:
+                row.append(cols.name)
+            row.append(event)
+            if coalesce:
+                row.append(str(count))
+            row.extend(cols.row(obj))
+
+            if RoshFilter.filter_test_list(filters, row):
+                self.get_table(tables, output, filters, cols, labels, coalesce).add_row(row)
+
+    def write_summary(self, summary, tbl, second):
+        '''
+        Writes the summary rows of a second, the summary is reset to the
+        next second. Returns the number of events of the second.
+        '''
+        for row in summary.rows():
+            tbl.add_row(row)
+
+        events = summary.events
+        summary.reset(second)
+        return events
+
+    def monitor_worker(self, filters, source, columns, ifindex, labels):
+        config = self.rosh.config['command.monitor']
+        interval = config.getfloat('interval')
+        coalesce = config.getboolean('coalesce')
+        rate = config.getint('rate')
+
+        output = RoshMonitorOutput()
+        tables = {}
+        overflows = 0
+
+        # per second summary lines while the rate is exceeded
+        summary = None
+        summary_tbl = None
+
+        pending = []
+        deadline = time.monotonic() + interval
+        try:
+            while not self.monitor_stop.is_set():
+                timeout = deadline - time.monotonic()
+                if timeout > 0:
+                    if source.wait(min(timeout, MONITOR_INTERVAL)):
+                        pending.extend(source.read())
+                    continue
+                deadline = max(deadline + interval, time.monotonic())
+
+                # the ifnames of the batch are looked up in the link index
+                # after applying its link events
+                self.rosh.links.refresh()
+                events = self.decode(pending, columns, ifindex)
+                pending = []
+
+                if summary is None and len(events) > rate * interval:
+                    output.write(f'more than {rate} events/s, printing summaries per second\n')
+                    summary = RoshEventSummary()
+                    summary.reset(int(events[0][0]))
+                    summary_tbl = RoshOutputStream(file=output, sample=1)
+                    summary_tbl.field_names = summary.field_names
+                    summary_tbl.align = summary.align
+                    summary_tbl.types = summary.types
+                    summary_tbl.width = summary.width
 
-        self.monitor_process = subprocess.Popen(['ip', '-ts', 'monitor', *args],
-                           stdout=subprocess.PIPE,
-                           stderr=subprocess.STDOUT,
-                           preexec_fn=preexec_cb)
+                    # the rows are printed with new headers afterwards
+                    for tbl in tables.values():
+                        tbl.close()
+                    tables = {}
 
-        while True:
-            line = self.monitor_process.stdout.readline().strip()
+                if summary is None:
+                    self.write_rows(events, tables, output, filters, labels, coalesce)
+                else:
+                    # events are counted in the second they were received
+                    # (a replay passes many seconds per batch)
+                    quiet = False
+                    for event in events:
+                        second = int(event[0])
+                        if second > summary.second:
+                            quiet = self.write_summary(summary, summary_tbl, second) <= rate
+                        summary.add(*event)
 
-            if not line:
-                self.monitor_process = None
-                break
+                    second = int(source.now())
+                    if second > summary.second:
+                        quiet = self.write_summary(summary, summary_tbl, second) <= rate
 
-            line = line.decode(errors="ignore")
+                    if quiet:
+                        if summary.events:
+                            self.write_summary(summary, summary_tbl, second)
+                        summary_tbl.close()
+                        (summary, summary_tbl) = (None, None)
+                        output.write('\n')
 
-            if RoshFilter.filter_test_item(filters, line):
-                print(line)
+                if source.overflows != overflows:
+                    overflows = source.overflows
+                    output.write(f'ERR: receive buffer overflow, events were dropped ({overflows} overflows)\n')
 
+                if source.done:
+                    if summary is not None and summary.events:
+                        self.write_summary(summary, summary_tbl, None)
+                    output.write(f'replay finished, {source.events} events\n')
+                    break
+                output.flush()
+        except RoshOutputStop:
+            # a pipe stage (head) has got all rows
+            pass
+        finally:
+            for tbl in tables.values():
+                tbl.close()
+            if summary_tbl is not None:
+                summary_tbl.close()
+            output.flush()
+            source.close()
 
-is_rosh_command = ip_exe is not None
+is_rosh_command = True
 rosh_command = RoshMonitor
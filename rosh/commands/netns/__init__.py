@@ -1,34 +1,119 @@
-from pyroute2 import IPRoute, netns, NetNS
+from fnmatch import fnmatchcase
+from prompt_toolkit.completion import NestedCompleter
 
-from rosh.commands import RoshCommand
-from rosh.completer import netns_completer
+from rosh.commands import RoshCommand, RoshSystemCommand
+from rosh.completer import RoshLazyCompleter, RoshNetNSAllCompleter, RoshPeerCompleter
+from rosh.fanout import RoshFanout
+from rosh.registry import netns_registry
+
+def is_glob(ns):
+    return ns == 'all' or any(c in ns for c in '*?[')
 
 class RoshNetnsCommand(RoshCommand):
-    description = "change active netns namespace for subsequent commands"
+    description = "change active netns namespace or run a show command in namespaces"
+
+    config_defaults = {
+        'command.netns': {
+            # number of namespaces queried concurrently
+            'workers': 8,
+            # number of pooled namespace handles
+            'pool_size': 8,
+            # seconds until an unused pooled handle is closed
+            'idle_timeout': 300,
+            # socket: netlink sockets opened inside the namespace
+            # proxy: pyroute2 NetNS proxy process
+            'mode': 'socket',
+        }
+    }
 
     def __init__(self, rosh):
-        super().__init__(rosh, netns_completer)
+        show_completer = RoshLazyCompleter(self.get_show_completer)
+        show_completer.description = '[show ...]'
+
+        super().__init__(rosh, RoshPeerCompleter(RoshNetNSAllCompleter(), show_completer))
+
+        self.show_completer = None
+
+    def get_show_completer(self):
+        if self.show_completer is None:
+            self.show_completer = NestedCompleter.from_nested_dict({
+                'show': self.rosh.get_completers()['show'],
+            })
+
+        return self.show_completer
 
     def handler(self, filters, cmd, *args):
         if len(args) == 0:
-            self.rosh.ipr = IPRoute()
+            self.rosh.switch_namespace()
             return
 
         ns = args[0]
-        if ns not in netns.listnetns():
+        if not netns_registry.exists(ns):
             print("ERR: netns '{}' does not exist".format(ns))
             return
 
-        self.rosh.ipr = NetNS(ns)
+        self.rosh.switch_namespace(ns)
 
-    def validate(self, cmd, args):
-        if len(args) > 1:
-            return (1, "to many parameters (>1)")
+    def run(self, filters, cmd, args, kwargs):
+        if not 'command' in kwargs:
+            self.handler(filters, cmd, *args)
+            return
+
+        # run the command in all matching namespaces
+        ns = args[0]
+        namespaces = [name for name in netns_registry.names() if ns == 'all' or fnmatchcase(name, ns)]
+        if not namespaces:
+            print(f"ERR: no netns matches '{ns}'")
+            return
+
+        (command, arg0, cmd_args) = kwargs['command']
+        workers = self.rosh.config['command.netns'].getint('workers')
+        RoshFanout(self.rosh, workers).run(namespaces, command, filters, arg0, cmd_args)
 
-        if len(args) == 1 and not args[0] in netns.listnetns():
-            return (0, f"{args[0]} does not exist")
+    def parse(self, cmd, args):
+        if len(args) == 0:
+            return (None, None, {})
+
+        ns = args[0]
+        if len(args) == 1:
+            if is_glob(ns):
+                return (1, 'missing command', None)
+
+            if not netns_registry.exists(ns):
+                return (0, f"{ns} does not exist", None)
+
+            return (None, None, {})
+
+        if not is_glob(ns) and not netns_registry.exists(ns):
+            return (0, f"{ns} does not exist", None)
+
+        # only show commands are run in other namespaces
+        (match, candidates) = self.rosh.command_trie.lookup(args[1])
+        if match is None or match is not self.rosh.command_trie.lookup('show')[0]:
+            return (1, 'only show commands are allowed', None)
+
+        (depth, command, arg0, cmd_args) = self.rosh.get_command(*args[1:])
+        if command is None:
+            if depth > len(args) - 1:
+                return (len(args), 'command incomplete', None)
+            return (depth, 'Unknown command: {}'.format(' '.join(args[1:depth + 1])), None)
+
+        # external tools would run in the current namespace
+        if isinstance(command, RoshSystemCommand):
+            return (1, 'command is not supported in other namespaces', None)
+
+        # the arguments are validated in the current namespace and
+        # parsed again in each namespace
+        (pos, msg, kwargs) = command.parse(arg0, cmd_args)
+        if pos is not None:
+            return (depth + pos + 1, msg, None)
+
+        return (None, None, {'command': (command, arg0, cmd_args)})
+
+    def validate(self, cmd, args):
+        (pos, msg, kwargs) = self.parse(cmd, args)
 
-        return (None, None)
+        return (pos, msg)
 
 is_rosh_command = True
 rosh_command = RoshNetnsCommand
@@ -0,0 +1,106 @@
+from socket import AF_INET6
+
+from rosh.commands import RoshCommand
+from rosh.completer import RoshWordCompleter
+from rosh.filters import RoshFilter
+from rosh.monitor.churn import CHURN_WINDOW
+from rosh.output import RoshOutputTable
+from rosh.output.columns import ifname_key, int_key, prefix_key
+from rosh.rtlookup import protos, tables
+
+CHURN_OBJECTS = [
+    'prefixes',
+    'interfaces',
+    'protos',
+]
+
+# rows of the top lists
+CHURN_TOP = 20
+
+def show_churn(rosh, output, filters, objects=CHURN_OBJECTS):
+    '''
+    Prints the churn statistics of the current namespace, they are
+    collected from the first call. The top lists are ordered by the
+    number of events.
+    '''
+    rcvbuf = rosh.config['command.monitor'].getint('rcvbuf')
+    churn = rosh.namespace.get_churn(rcvbuf)
+    minutes = CHURN_WINDOW // 60
+
+    if 'prefixes' in objects:
+        tbl = RoshOutputTable(filters)
+        tbl.field_names = ['prefix', 'table', 'events']
+        tbl.align['prefix'] = 'l'
+        tbl.align['events'] = 'r'
+        tbl.types['prefix'] = prefix_key
+        tbl.types['events'] = int_key
+
+        for ((family, table, dst, dst_len), events) in churn.prefixes(CHURN_TOP):
+            default = '::' if family == AF_INET6 else '0.0.0.0'
+            row = [f'{dst or default}/{dst_len}', str(tables.lookup_str(table)), events]
+            if RoshFilter.filter_test_list(filters, row):
+                tbl.add_row(row)
+
+        output.print_header(f'Flapping prefixes (last {minutes} minutes)')
+        print(tbl)
+        print()
+
+    if 'interfaces' in objects:
+        tbl = RoshOutputTable(filters)
+        tbl.field_names = ['ifname', 'bounces', 'events']
+        tbl.align['ifname'] = 'l'
+        tbl.align['bounces'] = 'r'
+        tbl.align['events'] = 'r'
+        tbl.types['ifname'] = ifname_key
+        tbl.types['bounces'] = int_key
+        tbl.types['events'] = int_key
+
+        for row in churn.interfaces(CHURN_TOP):
+            row = list(row)
+            if RoshFilter.filter_test_list(filters, row):
+                tbl.add_row(row)
+
+        output.print_header(f'Interfaces (last {minutes} minutes)')
+        print(tbl)
+        print()
+
+    if 'protos' in objects:
+        tbl = RoshOutputTable(filters)
+        tbl.field_names = ['proto', 'events', 'add', 'del', 'change']
+        tbl.align['proto'] = 'l'
+        for name in tbl.field_names[1:]:
+            tbl.align[name] = 'r'
+            tbl.types[name] = int_key
+
+        rows = [
+            [str(protos.lookup_str(proto)), sum(counts.values()), counts['add'], counts['del'], counts['change']]
+            for (proto, counts) in churn.protos().items()
+        ]
+        for row in sorted(rows, key=lambda row: row[1], reverse=True):
+            if RoshFilter.filter_test_list(filters, row):
+                tbl.add_row(row)
+
+        output.print_header(f'Route events by proto (last {minutes} minutes)')
+        print(tbl)
+        print()
+
+    print(', '.join(f'{key}: {value}' for (key, value) in churn.stats().items()))
+
+class RoshShowChurnCommand(RoshCommand):
+    description = 'show flapping prefixes and bouncing interfaces'
+
+    def __init__(self, rosh):
+        super().__init__(rosh, RoshWordCompleter(['', *CHURN_OBJECTS]))
+
+    def handler(self, filters, cmd, *args):
+        show_churn(self.rosh, self.output, filters, args or CHURN_OBJECTS)
+
+    def validate(self, cmd, args):
+        for (pos, arg) in enumerate(args):
+            if not arg in CHURN_OBJECTS:
+                return (pos, f"{arg} is no valid churn object")
+
+        return (None, None)
+
+is_rosh_command = True
+rosh_command = RoshShowChurnCommand
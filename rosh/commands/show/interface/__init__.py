@@ -6,6 +6,7 @@ from rosh.commands import RoshCommand, RoshSystemCommand
 from rosh.completer import link_completer, RoshPeerCompleter
 from rosh.filters import RoshFilter
 from rosh.output import RoshOutputTable
+from rosh.output.columns import ifname_key, int_key
 
 
 ethtool_exe = shutil.which('ethtool')
@@ -16,6 +17,7 @@ class RoshEthtoolCommand(RoshSystemCommand):
 
 class RoshShowInterfaceCommand(RoshCommand):
     description = 'show interface details'
+    field_names = ['idx', 'ifname', 'kind', 'alias', 'admin', 'oper', 'carrier']
 
     def __init__(self, rosh):
         self.ethtool_args = {
@@ -51,10 +53,12 @@ class RoshShowInterfaceCommand(RoshCommand):
             self.handler_ethtool(filters, args[0], args[1])
 
     def handler_brief(self, filters):
-        tbl = RoshOutputTable()
-        tbl.field_names = ['idx', 'ifname', 'kind', 'alias', 'admin', 'oper', 'carrier']
+        tbl = RoshOutputTable(filters)
+        tbl.field_names = self.field_names
         tbl.align['idx'] = 'r'
         tbl.align['ifname'] = 'l'
+        tbl.types['idx'] = int_key
+        tbl.types['ifname'] = ifname_key
         size = get_app_session().output.get_size()
         tbl.max_width['alias'] = size.columns - 64
         tbl.sortby = 'ifname'
@@ -148,7 +152,7 @@ class RoshShowInterfaceCommand(RoshCommand):
             addresses['L2']['permanent'] = link.get_attr('IFLA_PERM_ADDRESS')
 
         ipaddrs = []
-        for addr in self.rosh.ipr.get_addr(index=link['index']):
+        for addr in self.rosh.source('addresses').get_addr(index=link['index']):
             ipaddrs.append(self.output.quote_value(addr.get_attr('IFA_ADDRESS') +
                               '/' + str(addr['prefixlen'])))
         if ipaddrs:
@@ -188,7 +192,7 @@ class RoshShowInterfaceCommand(RoshCommand):
         if len(args) > 2:
             return (2, "to many parameters (>2)")
 
-        if len(args) >= 1 and not args[0] in link_completer.get_links():
+        if len(args) >= 1 and not self.rosh.links.exists(args[0]):
             return (0, f"{args[0]} does not exist")
 
         if len(args) == 2 and not args[1] in self.ethtool_args:
@@ -0,0 +1,14 @@
+from socket import AF_INET
+
+from rosh.commands.show.ipv6.route.trie import RoshShowIpv6RouteAggregateCommand
+
+
+class RoshShowIpRouteAggregateCommand(RoshShowIpv6RouteAggregateCommand):
+    description = 'show minimal set of prefixes covering the ipv4 routes'
+
+    def __init__(self, rosh):
+        super().__init__(rosh, AF_INET)
+
+
+is_rosh_command = True
+rosh_command = RoshShowIpRouteAggregateCommand
@@ -0,0 +1,14 @@
+from socket import AF_INET
+
+from rosh.commands.show.ipv6.route.trie import RoshShowIpv6RouteCoveringCommand
+
+
+class RoshShowIpRouteCoveringCommand(RoshShowIpv6RouteCoveringCommand):
+    description = 'show ipv4 routes containing a prefix'
+
+    def __init__(self, rosh):
+        super().__init__(rosh, AF_INET)
+
+
+is_rosh_command = True
+rosh_command = RoshShowIpRouteCoveringCommand
@@ -0,0 +1,14 @@
+from socket import AF_INET
+
+from rosh.commands.show.ipv6.route.get import RoshShowIpv6RouteGetCommand
+
+
+class RoshShowIpRouteGetCommand(RoshShowIpv6RouteGetCommand):
+    description = 'lookup ipv4 routes'
+
+    def __init__(self, rosh):
+        super().__init__(rosh, AF_INET)
+
+
+is_rosh_command = True
+rosh_command = RoshShowIpRouteGetCommand
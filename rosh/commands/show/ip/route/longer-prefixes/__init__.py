@@ -0,0 +1,14 @@
+from socket import AF_INET
+
+from rosh.commands.show.ipv6.route.trie import RoshShowIpv6RouteLongerPrefixesCommand
+
+
+class RoshShowIpRouteLongerPrefixesCommand(RoshShowIpv6RouteLongerPrefixesCommand):
+    description = 'show ipv4 routes inside a prefix'
+
+    def __init__(self, rosh):
+        super().__init__(rosh, AF_INET)
+
+
+is_rosh_command = True
+rosh_command = RoshShowIpRouteLongerPrefixesCommand
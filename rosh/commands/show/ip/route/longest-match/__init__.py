@@ -0,0 +1,14 @@
+from socket import AF_INET
+
+from rosh.commands.show.ipv6.route.trie import RoshShowIpv6RouteLongestMatchCommand
+
+
+class RoshShowIpRouteLongestMatchCommand(RoshShowIpv6RouteLongestMatchCommand):
+    description = 'show most specific ipv4 routes of addresses'
+
+    def __init__(self, rosh):
+        super().__init__(rosh, AF_INET)
+
+
+is_rosh_command = True
+rosh_command = RoshShowIpRouteLongestMatchCommand
@@ -0,0 +1,14 @@
+from socket import AF_INET
+
+from rosh.commands.show.ipv6.route.summary import RoshShowIpv6RouteSummaryCommand
+
+
+class RoshShowIpRouteSummaryCommand(RoshShowIpv6RouteSummaryCommand):
+    description = 'show ipv4 route counters'
+
+    def __init__(self, rosh):
+        super().__init__(rosh, AF_INET)
+
+
+is_rosh_command = True
+rosh_command = RoshShowIpRouteSummaryCommand
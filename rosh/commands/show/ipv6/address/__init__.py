@@ -4,14 +4,16 @@ from socket import AF_INET6
 
 from rosh.commands import RoshTuplesCommand
 from rosh.completer import link_completer, RoshTuplesCompleter
-from rosh.filters import RoshFilter
+from rosh.filters import RoshFilter, RoshFilterChain
 from rosh.lookup import ifa_flags
 from rosh.rtlookup import scopes
-from rosh.output import RoshOutputTable
+from rosh.output import RoshOutputStream
+from rosh.output.columns import ifname_key, prefix_key
 
 
 class RoshShowIpv6AddressCommand(RoshTuplesCommand):
     description = 'show assigned ipv6 addresses'
+    field_names = ['address', 'ifname', 'scope', 'flags']
 
     def __init__(self, rosh, family=AF_INET6):
         self.family = family
@@ -22,21 +24,34 @@ class RoshShowIpv6AddressCommand(RoshTuplesCommand):
 
         super().__init__(rosh, completer)
 
-    def handler(self, filters, cmd, *args):
-        (pos, msg, kwargs) = self.parse_args(cmd, args)
+    def run(self, filters, cmd, args, kwargs):
+        self.dump_addr(filters, **self.pushdown(filters, kwargs))
 
-        assert pos is None
+    def pushdown(self, filters, kwargs):
+        '''
+        Adds the index selector of an include filter naming an
+        interface, the filters are still applied.
+        '''
+        if not isinstance(filters, RoshFilterChain) or 'index' in kwargs:
+            return kwargs
 
-        self.dump_addr(filters, **kwargs)
+        words = [*scopes.id2str.values(), *ifa_flags.str2id]
+        ifname = filters.selector(self.rosh.links.ifnames(), words)
+        if ifname is None:
+            return kwargs
+
+        return {**kwargs, 'index': self.rosh.ifname_to_idx(ifname)}
 
     def dump_addr(self, prompt_filters, **filter):
-        tbl = RoshOutputTable()
-        tbl.field_names = ['address', 'ifname', 'scope', 'flags']
+        tbl = RoshOutputStream(prompt_filters)
+        tbl.field_names = self.field_names
         tbl.align['address'] = 'l'
         tbl.align['ifname'] = 'l'
+        tbl.types['address'] = prefix_key
+        tbl.types['ifname'] = ifname_key
         tbl.sortby = 'address'
 
-        for addr in self.rosh.ipr.get_addr(family=self.family, **filter):
+        for addr in self.rosh.source('addresses').get_addr(family=self.family, **filter):
             row = [
                 ip_interface(addr.get_attr('IFA_ADDRESS') + '/' + str(addr['prefixlen'])),
                 self.rosh.idx_to_ifname(addr['index']),
@@ -46,7 +61,7 @@ class RoshShowIpv6AddressCommand(RoshTuplesCommand):
 
             if RoshFilter.filter_test_list(prompt_filters, row):
                 tbl.add_row(row)
-        print(tbl)
+        tbl.close()
 
 
 is_rosh_command = True
@@ -2,12 +2,14 @@ from socket import AF_INET6
 
 from rosh.commands import RoshTuplesCommand
 from rosh.completer import link_completer, proto_completer, neighstate_completer, RoshIpCompleter, RoshTuplesCompleter
-from rosh.filters import RoshFilter
+from rosh.filters import RoshFilter, RoshFilterChain
 from rosh.lookup import neigh_flags, neigh_states
-from rosh.output import RoshOutputTable
+from rosh.output import RoshOutputStream
+from rosh.output.columns import ifname_key, prefix_key
 
 class RoshShowIpv6NeighbourCommand(RoshTuplesCommand):
     description = 'show ipv4 neighbour cache entries'
+    field_names = ['dst', 'lladdr', 'ifname', 'flags', 'state']
 
     def __init__(self, rosh, family=AF_INET6):
         self.family = family
@@ -15,26 +17,40 @@ class RoshShowIpv6NeighbourCommand(RoshTuplesCommand):
         completer = RoshTuplesCompleter({
             'dst': RoshIpCompleter(family),
             'ifindex': link_completer,
+            'master': link_completer,
             'state': neighstate_completer,
         })
 
         super().__init__(rosh, completer)
 
-    def handler(self, filters, cmd, *args):
-        (pos, msg, kwargs) = self.parse_args(cmd, args)
+    def run(self, filters, cmd, args, kwargs):
+        self.dump_neigh(filters, **self.pushdown(filters, kwargs))
 
-        assert pos is None
+    def pushdown(self, filters, kwargs):
+        '''
+        Adds the ifindex selector of an include filter naming an
+        interface, the filters are still applied.
+        '''
+        if not isinstance(filters, RoshFilterChain) or 'ifindex' in kwargs:
+            return kwargs
 
-        self.dump_neigh(filters, **kwargs)
+        words = ['(incomplete)', *neigh_flags.str2id, *neigh_states.str2id]
+        ifname = filters.selector(self.rosh.links.ifnames(), words)
+        if ifname is None:
+            return kwargs
+
+        return {**kwargs, 'ifindex': self.rosh.ifname_to_idx(ifname)}
 
     def dump_neigh(self, prompt_filters, **filter):
-        tbl = RoshOutputTable()
-        tbl.field_names = ['dst', 'lladdr', 'ifname', 'flags', 'state']
+        tbl = RoshOutputStream(prompt_filters)
+        tbl.field_names = self.field_names
         tbl.align['dst'] = 'l'
         tbl.align['ifname'] = 'l'
+        tbl.types['dst'] = prefix_key
+        tbl.types['ifname'] = ifname_key
         tbl.sortby = 'dst'
 
-        for neigh in self.rosh.ipr.get_neighbours(family=self.family, **filter):
+        for neigh in self.rosh.source('neighbours').get_neighbours(family=self.family, **filter):
             row = [
                 neigh.get_attr('NDA_DST',''),
                 neigh.get_attr('NDA_LLADDR', '(incomplete)'),
@@ -45,7 +61,7 @@ class RoshShowIpv6NeighbourCommand(RoshTuplesCommand):
 
             if RoshFilter.filter_test_list(prompt_filters, row):
                 tbl.add_row(row)
-        print(tbl)
+        tbl.close()
 
 
 is_rosh_command = True
@@ -1,15 +1,16 @@
-from ipaddress import IPv4Address, IPv6Address, ip_address, ip_network
 from prompt_toolkit.completion import NestedCompleter, WordCompleter, DummyCompleter
 from socket import AF_INET6
 
 from rosh.commands import RoshTuplesCommand
-from rosh.completer import link_completer, proto_completer, scope_completer, table_completer, RoshTuplesCompleter, RoshIpCompleter, RoshPfxCompleter
-from rosh.filters import RoshFilter
-from rosh.output import RoshOutputTable
+from rosh.completer import link_completer, proto_completer, rttype_completer, scope_completer, table_completer, RoshTuplesCompleter, RoshIpCompleter, RoshPfxCompleter
+from rosh.filters import RoshFilter, RoshFilterChain
+from rosh.output import RoshOutputStream
+from rosh.output.columns import ifname_key, int_key, prefix_key
 from rosh.rtlookup import protos, scopes
 
 class RoshShowIpv6RouteCommand(RoshTuplesCommand):
     description = 'show ipv6 routes'
+    field_names = ['dst', 'gw', 'oif', 'prio', 'pref', 'proto', 'scope', 'flags']
 
     def __init__(self, rosh, family=AF_INET6):
         self.family = family
@@ -21,45 +22,74 @@ class RoshShowIpv6RouteCommand(RoshTuplesCommand):
             'proto': proto_completer,
             'scope': scope_completer,
             'table': table_completer,
+            'type': rttype_completer,
         })
 
         super().__init__(rosh, completer)
 
-    def handler(self, filters, cmd, *args):
-        (pos, msg, kwargs) = self.parse_args(cmd, args)
+    def run(self, filters, cmd, args, kwargs):
+        self.dump_route(filters, **self.pushdown(filters, kwargs))
 
-        assert pos is None
+    def pushdown(self, filters, kwargs):
+        '''
+        Adds the oif and proto selectors of include filters naming an
+        interface or a proto, the filters are still applied.
+        '''
+        if not isinstance(filters, RoshFilterChain):
+            return kwargs
 
-        self.dump_route(filters, **kwargs)
+        kwargs = dict(kwargs)
+        ifnames = self.rosh.links.ifnames()
+        (proto_names, scope_names) = (list(protos.id2str.values()), list(scopes.id2str.values()))
+
+        if not 'oif' in kwargs:
+            ifname = filters.selector(ifnames, proto_names + scope_names)
+            if ifname is not None:
+                kwargs['oif'] = self.rosh.ifname_to_idx(ifname)
+
+        if not 'proto' in kwargs:
+            proto = filters.selector(proto_names, ifnames + scope_names)
+            if proto is not None:
+                kwargs['proto'] = protos.lookup_id(proto)
+
+        return kwargs
 
     def dump_route(self, prompt_filters, **filter):
-        tbl = RoshOutputTable()
-        tbl.field_names = ['dst', 'gw', 'oif', 'prio', 'pref', 'proto', 'scope', 'flags']
+        tbl = RoshOutputStream(prompt_filters)
+        tbl.field_names = self.field_names
         tbl.align['dst'] = 'l'
         tbl.align['gw'] = 'l'
         tbl.align['oif'] = 'l'
+        self.route_types(tbl)
         tbl.sortby = 'dst'
 
-        for route in self.rosh.ipr.get_routes(family=self.family, **filter):
-            try:
-                via = str(ip_address(route.get_attr('RTA_GATEWAY')))
-            except ValueError:
-                via = '-'
-
-            row = [
-                str(ip_network(route.get_attr('RTA_DST', '::' if self.family == AF_INET6 else '0.0.0.0') + '/' + str(route['dst_len']))),
-                via,
-                self.rosh.idx_to_ifname(route.get_attr('RTA_OIF')),
-                route.get_attr('RTA_PRIORITY', '-'),
-                route.get_attr('RTA_PREF', '-'),
-                protos.lookup_str(route['proto']),
-                scopes.lookup_str(route['scope']),
-                route['flags']
-            ]
+        for route in self.rosh.source('routes').get_route_records(family=self.family, **filter):
+            row = self.route_row(route)
 
             if RoshFilter.filter_test_list(prompt_filters, row):
                 tbl.add_row(row)
-        print(tbl)
+        tbl.close()
+
+    def route_types(self, tbl):
+        tbl.types['dst'] = prefix_key
+        tbl.types['gw'] = prefix_key
+        tbl.types['oif'] = ifname_key
+        tbl.types['prio'] = int_key
+        tbl.types['pref'] = int_key
+        tbl.types['flags'] = int_key
+
+    def route_row(self, route):
+        default = '::' if self.family == AF_INET6 else '0.0.0.0'
+        return [
+            f'{route.dst or default}/{route.dst_len}',
+            route.gateway or '-',
+            str(self.rosh.idx_to_ifname(route.oif)) if route.oif else '-',
+            '-' if route.priority is None else str(route.priority),
+            '-' if route.pref is None else str(route.pref),
+            protos.lookup_str(route.proto),
+            scopes.lookup_str(route.scope),
+            str(route.flags)
+        ]
 
 
 is_rosh_command = True
@@ -0,0 +1,5 @@
+from rosh.commands.show.ipv6.route.trie import RoshShowIpv6RouteAggregateCommand
+
+
+is_rosh_command = True
+rosh_command = RoshShowIpv6RouteAggregateCommand
@@ -0,0 +1,134 @@
+from itertools import chain
+from os import strerror
+from socket import AF_INET6
+
+from pyroute2.netlink.exceptions import NetlinkError
+
+from rosh.commands import RoshArgsTuplesCommand
+from rosh.completer import file_completer, int_completer, link_completer, table_completer, RoshArgsTuplesCompleter, RoshIpCompleter
+from rosh.filters import RoshFilter
+from rosh.output import RoshOutputStream
+from rosh.output.columns import ifname_key, prefix_key
+from rosh.lookup import rt_types
+from rosh.rtlookup import tables
+
+def read_addresses(filename):
+    '''
+    Reads addresses from a file (first word of each line, comments are
+    ignored).
+    '''
+    with open(filename) as fp:
+        for line in fp:
+            words = line.split('#', 1)[0].split()
+            if words:
+                yield words[0]
+
+class RoshShowIpv6RouteGetCommand(RoshArgsTuplesCommand):
+    description = 'lookup ipv6 routes'
+    field_names = ['address', 'route', 'type', 'gw', 'oif', 'prefsrc', 'table']
+
+    def __init__(self, rosh, family=AF_INET6):
+        self.family = family
+
+        completer = RoshArgsTuplesCompleter({
+            'from': RoshIpCompleter(family),
+            'iif': link_completer,
+            'oif': link_completer,
+            'vrf': link_completer,
+            'table': table_completer,
+            'mark': int_completer,
+            'uid': int_completer,
+            'file': file_completer,
+        })
+
+        super().__init__(rosh, completer, RoshIpCompleter(family))
+
+    def parse_args(self, cmd, args):
+        (pos, msg, kwargs) = super().parse_args(cmd, args)
+        if pos is None and not kwargs['args'] and not 'file' in kwargs:
+            return (len(args), 'missing address', None)
+
+        return (pos, msg, kwargs)
+
+    def run(self, filters, cmd, args, kwargs):
+        self.get_route(filters, **kwargs)
+
+    def vrf_by_table(self, table):
+        '''
+        The kernel cannot lookup in a table directly, the lookup is done
+        in the VRF bound to the table.
+        '''
+        index = self.rosh.links.vrf(table)
+        if index is not None:
+            return index
+
+        raise NetlinkError(0, f'no vrf is bound to table {tables.lookup_str(table)}')
+
+    def get_route(self, prompt_filters, args, file=None, table=None, vrf=None, **params):
+        if 'from' in params:
+            params['src'] = params.pop('from')
+
+        # the main table is used by default (like ip route get)
+        if table is not None and table != tables.lookup_id('main'):
+            try:
+                vrf = self.vrf_by_table(table)
+            except NetlinkError as err:
+                print(err.args[1])
+                print()
+                return
+
+        # the VRF is selected as output interface
+        if vrf is not None:
+            params['oif'] = vrf
+
+        addresses = args
+        if file is not None:
+            addresses = chain(addresses, read_addresses(file))
+
+        default = '::' if self.family == AF_INET6 else '0.0.0.0'
+        tbl = RoshOutputStream(prompt_filters)
+        tbl.field_names = self.field_names
+        tbl.align['address'] = 'l'
+        tbl.align['route'] = 'l'
+        tbl.align['gw'] = 'l'
+        tbl.align['oif'] = 'l'
+        tbl.align['prefsrc'] = 'l'
+        tbl.types['address'] = prefix_key
+        tbl.types['route'] = prefix_key
+        tbl.types['gw'] = prefix_key
+        tbl.types['oif'] = ifname_key
+        tbl.types['prefsrc'] = prefix_key
+
+        for (address, match, route) in self.rosh.dump.lookup_routes(self.family, addresses, **params):
+            if isinstance(match, NetlinkError):
+                row = [address, self.error(match), '-', '-', '-', '-', '-']
+            else:
+                row = [
+                    address,
+                    f'{match.dst or default}/{match.dst_len}',
+                    rt_types.lookup_str(match.type),
+                ]
+
+                if isinstance(route, NetlinkError):
+                    row += [self.error(route), '-', '-']
+                else:
+                    row += [
+                        route.gateway or '-',
+                        self.rosh.idx_to_ifname(route.oif) if route.oif else '-',
+                        route.prefsrc or '-',
+                    ]
+                row.append(tables.lookup_str(match.table))
+
+            if RoshFilter.filter_test_list(prompt_filters, row):
+                tbl.add_row(row)
+        tbl.close()
+
+    def error(self, err):
+        if len(err.args) > 1 and err.args[1]:
+            return err.args[1]
+
+        return strerror(err.code)
+
+
+is_rosh_command = True
+rosh_command = RoshShowIpv6RouteGetCommand
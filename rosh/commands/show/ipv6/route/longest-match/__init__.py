@@ -0,0 +1,5 @@
+from rosh.commands.show.ipv6.route.trie import RoshShowIpv6RouteLongestMatchCommand
+
+
+is_rosh_command = True
+rosh_command = RoshShowIpv6RouteLongestMatchCommand
@@ -0,0 +1,70 @@
+from socket import AF_INET6
+
+from rosh.commands.show.ipv6.route import RoshShowIpv6RouteCommand
+from rosh.filters import RoshFilter
+from rosh.output import RoshOutputTable
+from rosh.output.columns import int_key
+from rosh.rtlookup import protos, tables
+
+
+class RoshShowIpv6RouteSummaryCommand(RoshShowIpv6RouteCommand):
+    description = 'show ipv6 route counters'
+    # one table per counter
+    field_names = None
+
+    def __init__(self, rosh, family=AF_INET6):
+        super().__init__(rosh, family)
+
+    def run(self, filters, cmd, args, kwargs):
+        self.dump_summary(filters, **kwargs)
+
+    def dump_summary(self, prompt_filters, **filter):
+        # the dump is streamed, only the counters are kept
+        counters = {
+            'table': {},
+            'proto': {},
+            'prefixlen': {},
+        }
+        total = [0, 0, 0]
+
+        for route in self.rosh.source('routes').get_route_records(family=self.family, **filter):
+            ecmp = route.nexthops > 1
+            for (name, key) in (('table', route.table), ('proto', route.proto), ('prefixlen', route.dst_len)):
+                counter = counters[name].get(key)
+                if counter is None:
+                    counter = counters[name][key] = [0, 0]
+                counter[0] += 1
+                counter[1] += ecmp
+
+            total[0] += 1
+            total[1] += ecmp
+            total[2] += route.nexthops
+
+        lookups = {
+            'table': tables.lookup_str,
+            'proto': protos.lookup_str,
+            'prefixlen': lambda x: f'/{x}',
+        }
+        for (name, counter) in counters.items():
+            tbl = RoshOutputTable(prompt_filters)
+            tbl.field_names = [name, 'routes', 'ecmp']
+            tbl.align[name] = 'l'
+            tbl.align['routes'] = 'r'
+            tbl.align['ecmp'] = 'r'
+            tbl.types['routes'] = int_key
+            tbl.types['ecmp'] = int_key
+
+            for (key, (routes, ecmp)) in sorted(counter.items()):
+                row = [lookups[name](key), routes, ecmp]
+                if RoshFilter.filter_test_list(prompt_filters, row):
+                    tbl.add_row(row)
+
+            if tbl.rows:
+                print(tbl)
+                print()
+
+        print(f'routes: {total[0]}, ecmp: {total[1]}, nexthops: {total[2]}')
+
+
+is_rosh_command = True
+rosh_command = RoshShowIpv6RouteSummaryCommand
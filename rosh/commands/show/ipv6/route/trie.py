@@ -0,0 +1,187 @@
+from bisect import bisect_left
+from itertools import chain
+from socket import AF_INET6
+
+from rosh.commands import RoshArgsTuplesCommand
+from rosh.commands.show.ipv6.route import RoshShowIpv6RouteCommand
+from rosh.commands.show.ipv6.route.get import read_addresses
+from rosh.completer import file_completer, link_completer, proto_completer, rttype_completer, scope_completer, table_completer, RoshArgsTuplesCompleter, RoshIpCompleter, RoshPfxCompleter
+from rosh.filters import RoshFilter
+from rosh.output import RoshOutputStream
+from rosh.output.columns import int_key, prefix_key
+from rosh.trie import aggregate, RoshPrefixTrie
+
+
+class RoshShowIpv6RouteTrieCommand(RoshArgsTuplesCommand):
+    '''
+    Base class of route queries answered by a local prefix trie. The
+    trie is built from one route dump and only gets the routes in the
+    scope of the query, the route mirror keeps a trie of all routes.
+    '''
+    def __init__(self, rosh, family=AF_INET6, args_completer=None, min_args=0, max_args=None, tuples=None):
+        self.family = family
+
+        completer = RoshArgsTuplesCompleter({
+            'oif': link_completer,
+            'gateway': RoshIpCompleter(family),
+            'proto': proto_completer,
+            'scope': scope_completer,
+            'table': table_completer,
+            'type': rttype_completer,
+            **(tuples or {}),
+        })
+
+        super().__init__(rosh, completer, args_completer, min_args, max_args)
+
+    # same columns as `show ipv6 route`
+    field_names = RoshShowIpv6RouteCommand.field_names
+    route_types = RoshShowIpv6RouteCommand.route_types
+    route_row = RoshShowIpv6RouteCommand.route_row
+
+    def run(self, filters, cmd, args, kwargs):
+        args = kwargs.pop('args')
+        self.query(filters, kwargs, *args)
+
+    def get_trie(self, scope, **filter):
+        '''
+        Returns the prefix trie of the routes, `scope` (a test of the key
+        and length of a prefix) selects the routes needed by the query.
+        '''
+        return self.rosh.source('routes').get_route_trie(self.family, scope, **filter)
+
+    def route_table(self, prompt_filters, nodes):
+        tbl = RoshOutputStream(prompt_filters)
+        tbl.field_names = self.field_names
+        tbl.align['dst'] = 'l'
+        tbl.align['gw'] = 'l'
+        tbl.align['oif'] = 'l'
+        self.route_types(tbl)
+
+        for node in nodes:
+            for route in node.values:
+                row = self.route_row(route)
+
+                if RoshFilter.filter_test_list(prompt_filters, row):
+                    tbl.add_row(row)
+        tbl.close()
+
+class RoshShowIpv6RouteLongerPrefixesCommand(RoshShowIpv6RouteTrieCommand):
+    description = 'show ipv6 routes inside a prefix'
+
+    def __init__(self, rosh, family=AF_INET6):
+        super().__init__(rosh, family, RoshPfxCompleter(family), 1, 1)
+
+    def query(self, prompt_filters, filter, prefix):
+        trie = RoshPrefixTrie(self.family)
+        (key, length) = trie.parse(prefix)
+        shift = trie.bits - length
+
+        trie = self.get_trie(lambda route_key, route_length: route_length >= length and (route_key ^ key) >> shift == 0, **filter)
+        self.route_table(prompt_filters, trie.longer(key, length))
+
+class RoshShowIpv6RouteCoveringCommand(RoshShowIpv6RouteTrieCommand):
+    description = 'show ipv6 routes containing a prefix'
+
+    def __init__(self, rosh, family=AF_INET6):
+        super().__init__(rosh, family, RoshPfxCompleter(family), 1, 1)
+
+    def query(self, prompt_filters, filter, prefix):
+        trie = RoshPrefixTrie(self.family)
+        (key, length) = trie.parse(prefix)
+        bits = trie.bits
+
+        trie = self.get_trie(lambda route_key, route_length: route_length <= length and (route_key ^ key) >> (bits - route_length) == 0, **filter)
+        self.route_table(prompt_filters, trie.covering(key, length))
+
+class RoshShowIpv6RouteLongestMatchCommand(RoshShowIpv6RouteTrieCommand):
+    description = 'show most specific ipv6 routes of addresses'
+    field_names = ['address', *RoshShowIpv6RouteCommand.field_names]
+
+    def __init__(self, rosh, family=AF_INET6):
+        super().__init__(rosh, family, RoshIpCompleter(family), tuples={'file': file_completer})
+
+    def parse_args(self, cmd, args):
+        (pos, msg, kwargs) = super().parse_args(cmd, args)
+        if pos is None and not kwargs['args'] and not 'file' in kwargs:
+            return (len(args), 'missing address', None)
+
+        return (pos, msg, kwargs)
+
+    def run(self, filters, cmd, args, kwargs):
+        addresses = kwargs.pop('args')
+        file = kwargs.pop('file', None)
+        if file is not None:
+            addresses = chain(addresses, read_addresses(file))
+
+        self.query(filters, kwargs, addresses)
+
+    def query(self, prompt_filters, filter, addresses):
+        trie = RoshPrefixTrie(self.family)
+        bits = trie.bits
+
+        # the keys of the addresses, None if invalid
+        addresses = [(address, self.address_key(trie, address)) for address in addresses]
+        keys = sorted(key for (address, key) in addresses if key is not None)
+
+        def scope(route_key, route_length):
+            # the first address inside or after the prefix
+            i = bisect_left(keys, route_key)
+            return i < len(keys) and (keys[i] ^ route_key) >> (bits - route_length) == 0
+
+        trie = self.get_trie(scope, **filter)
+
+        tbl = RoshOutputStream(prompt_filters)
+        tbl.field_names = self.field_names
+        tbl.align['address'] = 'l'
+        tbl.align['dst'] = 'l'
+        tbl.align['gw'] = 'l'
+        tbl.align['oif'] = 'l'
+        tbl.types['address'] = prefix_key
+        self.route_types(tbl)
+
+        for (address, key) in addresses:
+            if key is None:
+                rows = [[address, 'invalid address', *['-'] * 7]]
+            else:
+                node = trie.longest_match(key)
+                if node is None:
+                    rows = [[address, 'no route', *['-'] * 7]]
+                else:
+                    rows = [[address, *self.route_row(route)] for route in node.values]
+
+            for row in rows:
+                if RoshFilter.filter_test_list(prompt_filters, row):
+                    tbl.add_row(row)
+        tbl.close()
+
+    def address_key(self, trie, address):
+        try:
+            return trie.to_int(address)
+        except OSError:
+            return None
+
+class RoshShowIpv6RouteAggregateCommand(RoshShowIpv6RouteTrieCommand):
+    description = 'show minimal set of prefixes covering the ipv6 routes'
+    field_names = ['prefix', 'prefixes']
+
+    def __init__(self, rosh, family=AF_INET6):
+        super().__init__(rosh, family, max_args=0)
+
+    def query(self, prompt_filters, filter):
+        # the prefixes are aggregated without building a trie
+        trie = RoshPrefixTrie(self.family)
+        prefixes = self.rosh.source('routes').get_route_prefixes(self.family, **filter)
+
+        tbl = RoshOutputStream(prompt_filters)
+        tbl.field_names = self.field_names
+        tbl.align['prefix'] = 'l'
+        tbl.align['prefixes'] = 'r'
+        tbl.types['prefix'] = prefix_key
+        tbl.types['prefixes'] = int_key
+
+        for (key, length, count) in aggregate(trie.bits, prefixes):
+            row = [trie.format(key, length), count]
+
+            if RoshFilter.filter_test_list(prompt_filters, row):
+                tbl.add_row(row)
+        tbl.close()
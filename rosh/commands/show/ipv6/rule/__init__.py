@@ -5,6 +5,7 @@ from rosh.commands import RoshTuplesCommand
 from rosh.completer import link_completer, proto_completer, table_completer, RoshTuplesCompleter, RoshPfxCompleter
 from rosh.filters import RoshFilter
 from rosh.output import RoshOutputTable
+from rosh.output.columns import ifname_key, int_key, prefix_key
 from rosh.rtlookup import protos, tables
 
 
@@ -20,6 +21,7 @@ FRA_ACTIONS = {
 
 class RoshShowIpv6RuleCommand(RoshTuplesCommand):
     description = 'show ipv6 routing policy rules'
+    field_names = ['prio', 'from', 'to', 'iif', 'oif', 'fwmark', 'ip_proto', 'action', 'target', 'proto']
 
     def __init__(self, rosh, family=AF_INET6):
         self.family = family
@@ -35,17 +37,19 @@ class RoshShowIpv6RuleCommand(RoshTuplesCommand):
 
         super().__init__(rosh, completer)
 
-    def handler(self, filters, cmd, *args):
-        (pos, msg, kwargs) = self.parse_args(cmd, args)
-
-        assert pos is None
-
+    def run(self, filters, cmd, args, kwargs):
         self.dump_rule(filters, **kwargs)
 
     def dump_rule(self, prompt_filters, **filter):
-        tbl = RoshOutputTable()
-        tbl.field_names = ['prio', 'from', 'to', 'iif', 'oif', 'fwmark', 'ip_proto', 'action', 'target', 'proto']
+        tbl = RoshOutputTable(prompt_filters)
+        tbl.field_names = self.field_names
         tbl.align['from'] = 'l'
+        tbl.types['prio'] = int_key
+        tbl.types['from'] = prefix_key
+        tbl.types['to'] = prefix_key
+        tbl.types['iif'] = ifname_key
+        tbl.types['oif'] = ifname_key
+        tbl.types['fwmark'] = int_key
         tbl.sortby = 'prio'
 
         for rule in self.rosh.ipr.get_rules(family=self.family, **filter):
@@ -1,22 +1,22 @@
-from pyroute2 import netns
-
 from rosh.commands import RoshCommand
 from rosh.completer import netns_completer
 from rosh.filters import RoshFilter
 from rosh.output import RoshOutputTable
+from rosh.registry import netns_registry
 
 class RoshShowNetnsCommand(RoshCommand):
     description = 'show netns namespaces'
+    field_names = ['NetNS']
 
     def __init__(self, rosh):
         super().__init__(rosh, netns_completer)
 
     def handler(self, filters, cmd, *args):
-        tbl = RoshOutputTable()
-        tbl.field_names = ['NetNS']
+        tbl = RoshOutputTable(filters)
+        tbl.field_names = self.field_names
         tbl.align = 'l'
         tbl.sortby = 'NetNS'
-        tbl.add_rows([[x] for x in netns.listnetns() if RoshFilter.filter_test_list(filters, [x])])
+        tbl.add_rows([[x] for x in netns_registry.names() if RoshFilter.filter_test_list(filters, [x])])
         print(tbl)
 
 
@@ -24,7 +24,7 @@ class RoshShowNetnsCommand(RoshCommand):
         if len(args) > 1:
             return (1, "to many parameters (>1)")
 
-        if len(args) == 1 and not args[0] in netns.listnetns():
+        if len(args) == 1 and not netns_registry.exists(args[0]):
             return (0, f"{args[0]} does not exist")
 
         return (None, None)
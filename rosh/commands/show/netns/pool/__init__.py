@@ -0,0 +1,49 @@
+from rosh.commands import RoshCommand
+from rosh.filters import RoshFilter
+from rosh.output import RoshOutputTable
+from rosh.output.columns import int_key
+
+class RoshShowNetnsPoolCommand(RoshCommand):
+    description = 'show pooled netns namespace handles'
+    field_names = ['NetNS', 'idle', 'links', 'mirrors', 'current']
+
+    def handler(self, filters, cmd, *args):
+        (handles, counters) = self.rosh.namespace_pool.stats()
+        current = self.rosh.namespace
+
+        tbl = RoshOutputTable(filters)
+        tbl.field_names = self.field_names
+        tbl.align['NetNS'] = 'l'
+        tbl.align['idle'] = 'r'
+        tbl.align['links'] = 'r'
+        tbl.types['idle'] = int_key
+        tbl.types['links'] = int_key
+
+        for (name, idle) in handles:
+            namespace = self.rosh.namespace_pool.handles.get(name)
+            if namespace is None:
+                continue
+
+            links = namespace.links.by_index
+            row = [
+                name or '-',
+                int(idle),
+                len(links) if links is not None else '-',
+                ' '.join(sorted(namespace.mirrors)) or '-',
+                'yes' if namespace is current else '',
+            ]
+            if RoshFilter.filter_test_list(filters, row):
+                tbl.add_row(row)
+        print(tbl)
+
+        print(', '.join(f'{key}: {value}' for (key, value) in counters.items()))
+        print()
+
+    def validate(self, cmd, args):
+        if len(args) > 0:
+            return (0, "to many parameters (>0)")
+
+        return (None, None)
+
+is_rosh_command = True
+rosh_command = RoshShowNetnsPoolCommand
@@ -1,12 +1,12 @@
 from ipaddress import IPv4Address, IPv6Address, IPv4Network, IPv6Network
-from prompt_toolkit.completion import Completer, DummyCompleter, WordCompleter
+from prompt_toolkit.completion import Completer, DummyCompleter, PathCompleter, WordCompleter
 from prompt_toolkit.document import Document
-from pyroute2 import netns, IPRoute
-import shlex
+import os.path
 from socket import AF_INET, AF_INET6
 
 from rosh.commands import RoshCommand
-from rosh.lookup import neigh_flags, neigh_states, ifa_flags
+from rosh.lookup import neigh_flags, neigh_states, ifa_flags, rt_types
+from rosh.registry import netns_registry
 from rosh.rtlookup import protos, realms, tables, scopes
 
 
@@ -37,49 +37,75 @@ class RoshPeerCompleter(Completer):
         else:
             yield from self.base_completer.get_completions(document, complete_event)
 
+class RoshLazyCompleter(Completer):
+    '''
+    Completer proxy which loads the completer of a command when it is
+    used for the first time.
+    '''
+    def __init__(self, get_completer):
+        self.get_completer = get_completer
+
+    def get_completions(self, document, complete_event):
+        completer = self.get_completer()
+        if completer is not None:
+            yield from completer.get_completions(document, complete_event)
+
 class RoshTuplesCompleter(Completer):
+    '''
+    Completer of keyword/value tuples, each keyword may be used once. The
+    keywords already used on the line are skipped while parsing, no
+    completer per ordering of the tuples is built.
+    '''
     def __init__(self, tuples):
         self.flat_tuples = tuples
-        self.tuples = {}
-
-        # build recursive completer
-        for keyword, completer in tuples.items():
-            # get tuples not completed, yet
-            other_tuples = tuples.copy()
-            del other_tuples[keyword]
-
-            # chain current completer with completers of remaining tuples
-            self.tuples[keyword] = RoshPeerCompleter(
-                completer,
-                RoshTuplesCompleter(other_tuples)
-            )
+        self.tuples = tuples
 
-        # keyword completer
-        self.keywords_completer = WordCompleter(sorted(tuples.keys()))
+    def get_completions(self, document, complete_event):
+        text = document.text_before_cursor.lstrip()
+
+        # skip the complete keyword/value pairs
+        used = set()
+        while " " in text:
+            keyword = text.split()[0]
+            if keyword not in self.tuples or keyword in used:
+                return
+
+            remaining_text = text[len(keyword) :].lstrip()
+
+            # the value is completed by the completer of the keyword
+            if not " " in remaining_text:
+                yield from self.tuples[keyword].get_completions(Document(remaining_text), complete_event)
+                return
+
+            used.add(keyword)
+            text = remaining_text[len(remaining_text.split()[0]) :].lstrip()
 
+        # keyword completer
+        keywords = WordCompleter(sorted(keyword for keyword in self.tuples if keyword not in used))
+        yield from keywords.get_completions(Document(text), complete_event)
+
+class RoshArgsTuplesCompleter(RoshTuplesCompleter):
+    '''
+    Tuples completer allowing positional arguments before the first
+    keyword.
+    '''
     def get_completions(self, document, complete_event):
-        # Split document.
         text = document.text_before_cursor.lstrip()
         stripped_len = len(document.text_before_cursor) - len(text)
 
-        # if there is a space and use a subcompleter, if available
-        if " " in text:
-            first_term = text.split()[0]
-            if first_term in self.tuples:
-                remaining_text = text[len(first_term) :].lstrip()
-                move_cursor = len(text) - len(remaining_text) + stripped_len
+        # skip the positional arguments
+        words = text.split(' ')
+        skip = 0
+        while len(words) > 1 and words[0] not in self.tuples:
+            skip += len(words.pop(0)) + 1
+        remaining_text = text[skip:]
 
-                new_document = Document(
-                    remaining_text,
-                    cursor_position=document.cursor_position - move_cursor,
-                )
+        new_document = Document(
+            remaining_text,
+            cursor_position=document.cursor_position - skip - stripped_len,
+        )
 
-                yield from self.tuples[first_term].get_completions(new_document, complete_event)
-            else:
-                return []
-        # no space in the input: use the base completer
-        else:
-            yield from self.keywords_completer.get_completions(document, complete_event)
+        yield from super().get_completions(new_document, complete_event)
 
 class RoshWordCompleter(WordCompleter):
     def parse_value(self, rosh, name, value):
@@ -102,31 +128,30 @@ class RoshWordCompleter(WordCompleter):
 class RoshLinkCompleter(RoshWordCompleter):
     description = '{ifname}'
 
+    # complete physical links only
+    phy = False
+
     def __init__(self):
-        self.ipr = None
+        self.link_index = None
         super().__init__(self.get_links)
 
-    def set_ipr(self, ipr):
-        self.ipr = ipr
-
     def get_links(self):
-        links = []
-        if self.ipr is not None:
-            for link in sorted(self.ipr.get_links(), key=lambda x: x.get_attr('IFLA_IFNAME', x['index'])):
-                links.append(shlex.quote(link.get_attr('IFLA_IFNAME')))
-        return links
+        if self.link_index is None:
+            return []
+
+        return self.link_index.names(self.phy)
+
+    def parse_value(self, rosh, name, value):
+        if not rosh.links.exists(value, self.phy):
+            raise ValueError(f'{value} is invalid for {self.description}')
+
+        return self.lookup_id(rosh, value)
 
     def lookup_id(self, rosh, ifname):
         return rosh.ifname_to_idx(ifname)
 
 class RoshPhyLinkCompleter(RoshLinkCompleter):
-    def get_links(self):
-        links = []
-        if self.ipr is not None:
-            for link in sorted(self.ipr.get_links(), key=lambda x: x.get_attr('IFLA_IFNAME', x['index'])):
-                if link.get_attr('IFLA_PARENT_DEV_BUS_NAME') is not None:
-                    links.append(shlex.quote(link.get_attr('IFLA_IFNAME')))
-        return links
+    phy = True
 
 class RoshNetNSCompleter(RoshWordCompleter):
     description = '{netns}'
@@ -135,10 +160,13 @@ class RoshNetNSCompleter(RoshWordCompleter):
         super().__init__(self.get_netns)
 
     def get_netns(self):
-        l = []
-        for ns in sorted(netns.listnetns()):
-            l.append(shlex.quote(ns))
-        return l
+        return netns_registry.quoted()
+
+class RoshNetNSAllCompleter(RoshNetNSCompleter):
+    description = '{netns}|all'
+
+    def get_netns(self):
+        return ['all', *super().get_netns()]
 
 class RoshProtoCompleter(RoshWordCompleter):
     description = '{proto}'
@@ -226,6 +254,28 @@ class RoshPfxCompleter():
 
         return super().__new__(RoshPfxv6Completer)
 
+class RoshIntCompleter(DummyCompleter):
+    description = '{int}'
+
+    def parse_value(self, rosh, name, value):
+        try:
+            return int(value, 0)
+        except ValueError:
+            raise ValueError(f'{value} is invalid for {self.description}')
+
+class RoshFileCompleter(PathCompleter):
+    description = '{file}'
+
+    def __init__(self):
+        super().__init__(expanduser=True)
+
+    def parse_value(self, rosh, name, value):
+        filename = os.path.expanduser(value)
+        if not os.path.isfile(filename):
+            raise ValueError(f'{value} is not a file')
+
+        return filename
+
 class RoshNeighFlagCompleter(RoshWordCompleter):
     description = '{flags}'
 
@@ -244,6 +294,15 @@ class RoshNeighStateCompleter(RoshWordCompleter):
     def lookup_id(self, rosh, state):
         return neigh_states.lookup_id(state)
 
+class RoshRouteTypeCompleter(RoshWordCompleter):
+    description = '{type}'
+
+    def __init__(self):
+        super().__init__(sorted(rt_types.str2id.keys()))
+
+    def lookup_id(self, rosh, rt_type):
+        return rt_types.lookup_id(rt_type)
+
 class RoshIfaFlagCompleter(RoshWordCompleter):
     description = '{flag}'
 
@@ -263,3 +322,6 @@ table_completer = RoshTableCompleter()
 scope_completer = RoshScopeCompleter()
 neighflag_completer = RoshNeighFlagCompleter()
 neighstate_completer = RoshNeighStateCompleter()
+rttype_completer = RoshRouteTypeCompleter()
+int_completer = RoshIntCompleter()
+file_completer = RoshFileCompleter()
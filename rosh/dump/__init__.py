@@ -0,0 +1,160 @@
+from socket import AF_INET, AF_INET6
+
+from rosh.decoder import RoshRoute, RoshRouteDecoder
+from rosh.trie import build_trie, route_prefixes
+
+
+class RoshDump():
+    '''
+    Filtered netlink dumps of a namespace. The dump socket enables
+    NETLINK_GET_STRICT_CHK, so selectors supported by the kernel are sent
+    as dump filters and only matching messages are returned. Remaining
+    selectors are matched in userspace.
+
+    Kernels without strict checking get a full dump which is filtered
+    in userspace.
+    '''
+
+    # selectors filtered by the kernel
+    route_selectors = ('table', 'oif', 'proto', 'type')
+    neigh_selectors = ('ifindex', 'master')
+    addr_selectors = ('index',)
+
+    def __init__(self, ipr):
+        self.ipr = ipr
+        self.sock = None
+        self.decoder = RoshRouteDecoder()
+
+    @property
+    def strict(self):
+        '''
+        Get the strict checking dump socket, None if not supported.
+        '''
+        if self.sock is None:
+            try:
+                self.sock = self.open_strict()
+            except OSError:
+                self.sock = False
+
+        return self.sock or None
+
+    def open_strict(self):
+        '''
+        Opens a socket like the IPRoute instance (in its namespace) with
+        strict checking, raises OSError if the kernel does not support
+        it. Dumps are returned as generators, so rows are rendered while
+        the dump is received.
+        '''
+        from rosh.namespace import RoshNetNSRoute
+
+        options = {'nlm_generator': True, 'strict_check': True}
+        netns = getattr(self.ipr, 'netns', None)
+        if netns is None:
+            return type(self.ipr)(**dict(self.ipr.config, **options))
+
+        # NetNS proxies have no socket options, the dump socket is opened
+        # inside of the namespace
+        config = self.ipr.config if isinstance(self.ipr, RoshNetNSRoute) else {}
+        return RoshNetNSRoute(netns, **dict(config, **options))
+
+    def split(self, selectors, filter):
+        '''
+        Splits the filter into the kernel and the userspace part.
+        '''
+        kernel = {}
+        match = {}
+        for key, value in filter.items():
+            if key in selectors:
+                kernel[key] = value
+            else:
+                match[key] = value
+
+        return (kernel, match or None)
+
+    def get_routes(self, family=None, **filter):
+        # dst is a route lookup, not a filter
+        if 'dst' in filter or self.strict is None:
+            return self.ipr.get_routes(family=family or 255, **filter)
+
+        (kernel, match) = self.split(self.route_selectors, filter)
+        if family is None:
+            return [
+                route for family in [AF_INET, AF_INET6]
+                for route in self.strict.route('dump', family=family, match=match, **kernel)
+            ]
+
+        return self.strict.route('dump', family=family, match=match, **kernel)
+
+    def get_route_records(self, family, **filter):
+        '''
+        Dumps routes using the fast route decoder, returns RoshRoute
+        records.
+        '''
+        if 'dst' in filter or self.strict is None:
+            return map(RoshRoute.from_nlmsg, self.ipr.get_routes(family=family, **filter))
+
+        (kernel, match) = self.split(self.route_selectors, filter)
+        sock = self.strict
+        records = self.abortable(sock, self.decoder.dump(sock, family, drain=False, **kernel))
+        if match is None:
+            return records
+
+        return (
+            record for record in records
+            if all(getattr(record, key) == value for (key, value) in match.items())
+        )
+
+    def abortable(self, sock, records):
+        '''
+        Yields the records of a dump. The socket of an aborted dump (head
+        filter) is closed instead of receiving the rest of the dump, the
+        kernel stops dumping. It is reopened by the next dump.
+        '''
+        done = False
+        try:
+            yield from records
+            done = True
+        finally:
+            if not done and self.sock is sock:
+                self.close()
+
+    def get_route_trie(self, family, scope=None, **filter):
+        '''
+        Builds a prefix trie from one route dump, `scope` (a test of the
+        key and length of a prefix) selects the routes inserted.
+        '''
+        return build_trie(family, self.get_route_records(family, **filter), scope)
+
+    def get_route_prefixes(self, family, **filter):
+        '''
+        Returns the distinct prefixes of one route dump in address order.
+        '''
+        return route_prefixes(family, self.get_route_records(family, **filter))
+
+    def lookup_routes(self, family, addresses, **params):
+        '''
+        Looks up the routes of the addresses using pipelined RTM_GETROUTE
+        requests on one socket (parameters: src, iif, oif, mark, uid).
+        Yields tuples of the address, the matching route entry and the
+        resolved route (or NetlinkError).
+        '''
+        return self.decoder.lookup(self.strict or self.ipr, family, addresses, **params)
+
+    def get_neighbours(self, family=0, **filter):
+        if self.strict is None:
+            return self.ipr.get_neighbours(family=family, **filter)
+
+        (kernel, match) = self.split(self.neigh_selectors, filter)
+        return self.strict.neigh('dump', family=family, match=match, **kernel)
+
+    def get_addr(self, family=0, **filter):
+        if self.strict is None:
+            return self.ipr.get_addr(family=family, **filter)
+
+        (kernel, match) = self.split(self.addr_selectors, filter)
+        return self.strict.addr('dump', family=family, match=match, **kernel)
+
+    def close(self):
+        if self.sock:
+            self.sock.close()
+        self.sock = None
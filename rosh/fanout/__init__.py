@@ -0,0 +1,168 @@
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+from io import StringIO
+import sys
+from threading import Event, local
+
+from prompt_toolkit.application import create_app_session
+from prompt_toolkit.output import create_output
+
+from rosh.filters import RoshFilterChain
+from rosh.namespace import RoshNamespace, open_netns
+from rosh.output import RoshOutputStream
+from rosh.output.collector import RoshOutputCollector
+from rosh.output.columns import natural_key
+from rosh.output.pipeline import RoshOutputStop
+
+
+class RoshThreadOutput():
+    '''
+    Replacement of sys.stdout collecting the output of each worker thread
+    in its own buffer, other threads write to the original stdout.
+    '''
+    def __init__(self, stdout):
+        self.stdout = stdout
+        self.local = local()
+
+    def target(self):
+        buffer = getattr(self.local, 'buffer', None)
+        return self.stdout if buffer is None else buffer
+
+    def write(self, text):
+        return self.target().write(text)
+
+    def flush(self):
+        self.target().flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stdout, name)
+
+class RoshFanout():
+    '''
+    Runs a command in several network namespaces using a bounded pool of
+    worker threads. The tables of the command are merged into one table
+    (per column layout) having an additional `netns` column, other
+    output is printed per namespace after the tables. A sort filter
+    sorts the merged table.
+
+    The workers are threads since the shell has running threads which a
+    fork would not copy (locks held by them would stay locked). The
+    netlink dumps of the namespaces run concurrently in the kernel.
+    '''
+    def __init__(self, rosh, workers=8):
+        self.rosh = rosh
+        self.workers = workers
+        self.tables = {}
+        self.output = None
+        self.stop = Event()
+
+    def run(self, namespaces, command, filters, cmd, args):
+        self.tables = {}
+        self.stop.clear()
+        texts = {}
+
+        self.output = RoshThreadOutput(sys.stdout)
+        with redirect_stdout(self.output):
+            pool = ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(namespaces))), thread_name_prefix='RoshFanout')
+            try:
+                futures = [pool.submit(self.query, name, command, filters, cmd, args) for name in namespaces]
+
+                # namespaces are merged in order, the rows are sorted
+                # already
+                for (name, future) in zip(namespaces, futures):
+                    try:
+                        (tables, texts[name]) = future.result()
+                    except Exception as err:
+                        (tables, texts[name]) = ([], f'ERR: {err}\n')
+
+                    for (field_names, align, types, sortby, rows) in tables:
+                        merged = self.get_table(filters, field_names, align, types)
+                        for row in rows:
+                            merged.add_row([name, *row])
+            except RoshOutputStop:
+                # a pipe stage (head) has got all rows, the running
+                # queries are stopped and the pending ones are dropped
+                self.stop.set()
+            finally:
+                pool.shutdown(cancel_futures=True)
+
+        for tbl in self.tables.values():
+            tbl.close()
+
+        for name in namespaces:
+            text = texts.get(name, '')
+            if text.strip():
+                print(f'netns {name}:')
+                print(text.rstrip('\n'))
+                print()
+
+    def query(self, name, command, filters, cmd, args):
+        '''
+        Runs the command in one namespace (worker thread), returns the
+        tables (column layout and rows) and the output which is not part
+        of a table.
+        '''
+        stop = self.stop
+
+        tables = []
+        def add_table(tbl):
+            rows = []
+            tables.append((
+                list(tbl.field_names),
+                dict(tbl.align),
+                dict(tbl.types),
+                getattr(tbl, 'sortby', None),
+                rows,
+            ))
+
+            def add_row(row):
+                if stop.is_set():
+                    raise RoshOutputStop()
+                rows.append([str(value) for value in row])
+            return add_row
+
+        buffer = self.output.local.buffer = StringIO()
+        namespace = None
+        try:
+            # the socket is opened inside the namespace, the worker
+            # thread is not moved
+            namespace = RoshNamespace(open_netns(name))
+            with self.rosh.in_namespace(namespace), create_app_session(output=create_output(stdout=buffer)):
+                # values (ifindex etc.) are resolved in the namespace
+                (pos, msg, kwargs) = command.parse(cmd, args)
+                if pos is not None:
+                    print(f'ERR: {msg}')
+                else:
+                    command.run(RoshFilterChain([*(filters or []), RoshOutputCollector(add_table)]), cmd, args, kwargs)
+        except RoshOutputStop:
+            # the merged table is complete
+            return ([], '')
+        except Exception as err:
+            print(f'ERR: {err}')
+        finally:
+            if namespace is not None:
+                namespace.close(ipr=True)
+            self.output.local.buffer = None
+
+        # the rows are sorted by the workers, the merged table is sorted
+        # by the namespace name first
+        for (field_names, align, types, sortby, rows) in tables:
+            if sortby is not None:
+                (i, key) = (field_names.index(sortby), types.get(sortby, natural_key))
+                rows.sort(key=lambda row: key(row[i]))
+
+        # prompt_toolkit ends lines by \r\n
+        return (tables, buffer.getvalue().replace('\r\n', '\n'))
+
+    def get_table(self, filters, field_names, align, types):
+        '''
+        Returns the merged table of a column layout.
+        '''
+        merged = self.tables.get(tuple(field_names))
+        if merged is None:
+            merged = self.tables[tuple(field_names)] = RoshOutputStream(filters)
+            merged.field_names = ['netns', *field_names]
+            merged.align = {'netns': 'l', **align}
+            merged.types = types
+
+        return merged
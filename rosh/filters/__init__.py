@@ -1,5 +1,73 @@
 from abc import ABC, abstractmethod
-from prompt_toolkit.completion import DummyCompleter
+import re
+
+
+# characters having a special meaning in a regex, patterns without them
+# are matched by substring search
+REGEX_META = frozenset('.^$*+?{}[]\\|()')
+
+# separator of the columns of a row joined for searching all columns at
+# once
+COLUMN_SEP = '\n'
+
+# characters of the addresses and numbers shown in the tables
+ADDRESS_CHARS = frozenset('0123456789abcdefABCDEF:./-')
+
+def is_literal(pattern):
+    return COLUMN_SEP not in pattern and REGEX_META.isdisjoint(pattern)
+
+# escapes of letters which never match the column separator (in a
+# class `\b` is a backspace, which may start a range)
+SAFE_ESCAPES = frozenset('bBdw')
+SAFE_CLASS_ESCAPES = frozenset('dw')
+
+def joinable(regex):
+    '''
+    Checks if a regex can be searched in the joined columns of a row
+    with the same result as searching each column: it must not match
+    the separator, so matches do not span columns, and it must not use
+    anchors. The check is syntactic, patterns using other constructs
+    (negated classes, lookarounds, inline flags etc.) are searched per
+    column.
+    '''
+    if regex.flags & (re.DOTALL | re.MULTILINE | re.VERBOSE):
+        return False
+
+    pattern = regex.pattern
+    in_class = False
+    pos = 0
+    while pos < len(pattern):
+        char = pattern[pos]
+        if char < ' ':
+            # control characters, the separator is one of them
+            return False
+
+        if char == '\\':
+            pos += 1
+            if pos == len(pattern):
+                return False
+            char = pattern[pos]
+            if char < ' ' or (char.isalnum() and char not in (SAFE_CLASS_ESCAPES if in_class else SAFE_ESCAPES)):
+                return False
+        elif in_class:
+            in_class = char != ']'
+        elif char == '[':
+            # negated classes match the separator
+            if pattern.startswith('^', pos + 1):
+                return False
+            in_class = True
+            # a leading ']' is part of the class
+            if pattern.startswith(']', pos + 1):
+                pos += 1
+        elif char in '^$':
+            # anchors of the joined text are not the column anchors
+            return False
+        elif char == '(' and pattern.startswith('?', pos + 1) and not pattern.startswith('?:', pos + 1):
+            return False
+
+        pos += 1
+
+    return True
 
 
 class RoshFilter(ABC):
@@ -9,7 +77,8 @@ class RoshFilter(ABC):
 
     min_args = 0
     max_args = None
-    completer = DummyCompleter()
+    # filters without arguments have no completer
+    completer = None
 
     @abstractmethod
     def __init__(self, rosh, cmd, *args):
@@ -19,6 +88,26 @@ class RoshFilter(ABC):
     def match(self, obj):
         return self.match_item(obj)
 
+    def matcher(self):
+        '''
+        Returns the test of the filter used by a compiled filter chain:
+        a tuple of the scope and a function returning True if a row
+        passes. The scope is the input of the function:
+        - `text`: the columns of the row joined by COLUMN_SEP
+        - `cols`: the list of the columns (strings)
+        - `row`: the row as passed to the table
+
+        Filters which do not drop rows return None.
+        '''
+        return ('row', lambda row: self.combine(self.match(col) for col in row))
+
+    def literal(self):
+        '''
+        Returns the plain string each row passing the filter contains,
+        None if there is none.
+        '''
+        return None
+
     @classmethod
     def validate(cls, rosh, cmd, args):
         if len(args) < cls.min_args:
@@ -36,11 +125,30 @@ class RoshFilter(ABC):
 
         return (None, None)
 
+    @classmethod
+    def validate_columns(cls, rosh, field_names, args):
+        '''
+        Validates the filter arguments against the columns of the table
+        the filter gets (None if unknown), called after `validate()`.
+        '''
+        return (None, None)
+
+    @classmethod
+    def columns(cls, field_names, args):
+        '''
+        Returns the columns of the table after the filter (None if
+        unknown).
+        '''
+        return field_names
+
     @classmethod
     def filter_test_item(cls, filters, item):
         if filters is None:
             return True
 
+        if isinstance(filters, RoshFilterChain):
+            return filters.test([str(item)])
+
         for flt in filters:
             if not flt.match(str(item)):
                 return False
@@ -52,8 +160,125 @@ class RoshFilter(ABC):
         if filters is None:
             return True
 
+        if isinstance(filters, RoshFilterChain):
+            return filters.test(row)
+
         for flt in filters:
             if not flt.combine([flt.match(col) for col in row]):
                 return False
 
         return True
+
+class RoshStageFilter(RoshFilter):
+    '''
+    Base class for filters which are structured pipe stages of the
+    tables (see rosh.output.pipeline), they do not match rendered text.
+    '''
+    combine = all
+
+    def match(self, item):
+        return True
+
+    def matcher(self):
+        return None
+
+    @abstractmethod
+    def stage(self):
+        '''
+        Returns a new RoshStage for a table.
+        '''
+        pass
+
+class RoshFilterChain(list):
+    '''
+    The filters of a command line, compiled once into a single test of
+    a row. The row is converted to strings (and joined) once for all
+    filters, the tests are run ordered by cost: substring searches on
+    the joined row, regex searches on the joined row, regex searches
+    per column and other filters.
+    '''
+    def __init__(self, filters=()):
+        super().__init__(filters)
+
+    def test(self, row):
+        # the compiled test replaces this method on first use
+        self.test = self.compile()
+
+        return self.test(row)
+
+    def selector(self, names, words=()):
+        '''
+        Returns the name of `names` which a plain include pattern is equal
+        to, if all rows passing the filters have the name as a column
+        value: it is no substring of other names or of the other `words`
+        shown in the rows, nor of addresses and numbers. Commands dump
+        only the rows of the name (oif etc.), the filters are applied
+        anyway. Returns None if there is no such name.
+        '''
+        for flt in self:
+            literal = getattr(flt, 'literal', None)
+            literal = literal() if literal is not None else None
+            if literal is None or not literal in names:
+                continue
+
+            if not set(literal) - ADDRESS_CHARS:
+                continue
+
+            if any(literal in word for word in words):
+                continue
+
+            if any(literal in name and name != literal for name in names):
+                continue
+
+            return literal
+
+        return None
+
+    def compile(self):
+        tests = {'text': [], 'cols': [], 'row': []}
+        for flt in self:
+            matcher = getattr(flt, 'matcher', None)
+            if matcher is None:
+                # duck typed filter (output collector etc.)
+                matcher = RoshFilter.matcher.__get__(flt)
+
+            result = matcher()
+            if result is not None:
+                tests[result[0]].append(result[1])
+
+        text_tests = tests['text']
+        cols_tests = tests['cols']
+        row_tests = tests['row']
+
+        if not text_tests and not cols_tests:
+            if not row_tests:
+                return lambda row: True
+
+            return lambda row: all(test(row) for test in row_tests)
+
+        join = COLUMN_SEP.join
+
+        def _test(row):
+            # rows of strings are joined directly
+            try:
+                text = join(row)
+                cols = row
+            except TypeError:
+                cols = list(map(str, row))
+                text = join(cols)
+
+            for test in text_tests:
+                if not test(text):
+                    return False
+
+            for test in cols_tests:
+                if not test(cols):
+                    return False
+
+            for test in row_tests:
+                if not test(row):
+                    return False
+
+            return True
+
+        return _test
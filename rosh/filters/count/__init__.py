@@ -0,0 +1,28 @@
+from rosh.filters import RoshStageFilter
+from rosh.output.pipeline import RoshStage
+
+
+class RoshCountStage(RoshStage):
+    def __init__(self):
+        self.count = 0
+
+    def push(self, row):
+        # the table gets no rows and is not rendered
+        self.count += 1
+
+    def flush(self):
+        print(self.count)
+
+class RoshCountFilter(RoshStageFilter):
+    description = 'print the number of rows'
+
+    max_args = 0
+
+    def __init__(self, rosh, cmd, *args):
+        pass
+
+    def stage(self):
+        return RoshCountStage()
+
+is_rosh_filter = True
+rosh_filter = RoshCountFilter
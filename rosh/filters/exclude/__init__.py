@@ -5,6 +5,7 @@ class RoshExcludeFilter(RoshIncludeFilter):
     description = 'exclude items matching a regex'
 
     combine = all
+    invert = True
 
     def match(self, item):
         return not super().match(item)
@@ -0,0 +1,61 @@
+from rosh.filters import RoshStageFilter
+from rosh.output.pipeline import RoshStage
+
+
+class RoshHeadStage(RoshStage):
+    def __init__(self, count):
+        self.count = count
+        self.passed = 0
+        self.limit = False
+
+    def bind(self, tbl, emit):
+        super().bind(tbl, emit)
+
+        # the first rows of a sorted table (sort filter or the default
+        # sort column of the table) are known when the table is closed,
+        # the table limits the written rows
+        self.limit = self.after_sort or getattr(tbl, 'sortby', None) is not None
+        if self.limit:
+            tbl.limit = self.count if tbl.limit is None else min(tbl.limit, self.count)
+
+    def push(self, row):
+        if self.limit:
+            self.emit(row)
+            return
+
+        # rows passed by stages flushed when the table is closed (uniq)
+        # are dropped, the closed table is not stopped
+        if self.passed >= self.count:
+            return
+
+        self.emit(row)
+        self.passed += 1
+        if self.passed >= self.count and not getattr(self.tbl, 'closed', False):
+            # stops the command (and its netlink dump)
+            self.tbl.stop()
+
+class RoshHeadFilter(RoshStageFilter):
+    description = 'show the first rows only'
+
+    min_args = 1
+    max_args = 1
+
+    def __init__(self, rosh, cmd, *args):
+        self.count = int(args[0])
+
+    @classmethod
+    def validate(cls, rosh, cmd, args):
+        result = super().validate(rosh, cmd, args)
+        if result[0] is not None:
+            return result
+
+        if not args[0].isdigit() or int(args[0]) == 0:
+            return (1, 'number of rows expected')
+
+        return (None, None)
+
+    def stage(self):
+        return RoshHeadStage(self.count)
+
+is_rosh_filter = True
+rosh_filter = RoshHeadFilter
@@ -0,0 +1,85 @@
+from rosh.completer import file_completer
+from rosh.filters import RoshFilter
+
+import re
+
+def read_patterns(filename):
+    '''
+    Reads the patterns of a file (one per line, comments are ignored).
+    '''
+    with open(filename) as fp:
+        for line in fp:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line
+
+def trie_regex(words):
+    '''
+    Builds a regex matching any of the words. The words are merged into
+    a prefix trie, so the regex engine follows one trie path per text
+    position instead of trying each word (Aho-Corasick without failure
+    links). Words having a shorter word as prefix are dropped, they do
+    not change the result of a search.
+    '''
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            if '' in node:
+                break
+            node = node.setdefault(char, {})
+        else:
+            node.clear()
+            node[''] = True
+
+    def _regex(node):
+        if '' in node:
+            return ''
+
+        alternatives = [re.escape(char) + _regex(child) for (char, child) in sorted(node.items())]
+        if len(alternatives) == 1:
+            return alternatives[0]
+
+        return '(?:{})'.format('|'.join(alternatives))
+
+    if not trie:
+        # no patterns: matches nothing
+        return '(?!)'
+
+    return _regex(trie)
+
+class RoshIncludeAnyFilter(RoshFilter):
+    description = 'include items containing any string of a file'
+
+    min_args = 1
+    max_args = 1
+    combine = any
+    completer = file_completer
+
+    def __init__(self, rosh, cmd, *args):
+        self.regex = re.compile(trie_regex(read_patterns(file_completer.parse_value(rosh, None, args[0]))))
+
+    @classmethod
+    def validate(cls, rosh, cmd, args):
+        result = super().validate(rosh, cmd, args)
+        if result[0] is not None:
+            return result
+
+        try:
+            for pattern in read_patterns(file_completer.parse_value(rosh, None, args[0])):
+                pass
+        except (OSError, UnicodeDecodeError) as err:
+            return (1, str(err))
+
+        return (None, None)
+
+    def match(self, item):
+        return self.regex.search(str(item)) is not None
+
+    def matcher(self):
+        # the patterns are plain strings, so the joined row is searched
+        search = self.regex.search
+        return ('text', lambda text: search(text) is not None)
+
+is_rosh_filter = True
+rosh_filter = RoshIncludeAnyFilter
@@ -1,4 +1,4 @@
-from rosh.filters import RoshFilter
+from rosh.filters import is_literal, joinable, RoshFilter
 
 import re
 
@@ -9,11 +9,53 @@ class RoshIncludeFilter(RoshFilter):
     max_args = 1
     combine = any
 
+    # the filter drops rows matching the pattern
+    invert = False
+
     def __init__(self, rosh, cmd, *args):
+        self.pattern = args[0]
         self.regex = re.compile(args[0])
 
+    @classmethod
+    def validate(cls, rosh, cmd, args):
+        result = super().validate(rosh, cmd, args)
+        if result[0] is not None:
+            return result
+
+        try:
+            re.compile(args[0])
+        except re.error as err:
+            return (1, f'invalid regex: {err}')
+
+        return (None, None)
+
     def match(self, item):
         return self.regex.search(str(item)) is not None
 
+    def literal(self):
+        if self.invert or not is_literal(self.pattern):
+            return None
+
+        return self.pattern
+
+    def matcher(self):
+        # plain strings are found by a substring search in the joined
+        # row, most regexes are searched in the joined row, too
+        if is_literal(self.pattern):
+            pattern = self.pattern
+            if self.invert:
+                return ('text', lambda text: pattern not in text)
+            return ('text', lambda text: pattern in text)
+
+        search = self.regex.search
+        if joinable(self.regex):
+            if self.invert:
+                return ('text', lambda text: search(text) is None)
+            return ('text', lambda text: search(text) is not None)
+
+        if self.invert:
+            return ('cols', lambda cols: not any(map(search, cols)))
+        return ('cols', lambda cols: any(map(search, cols)))
+
 is_rosh_filter = True
 rosh_filter = RoshIncludeFilter
@@ -0,0 +1,47 @@
+from rosh.filters import RoshFilter
+from rosh.output.columns import find_column
+
+
+class RoshSortFilter(RoshFilter):
+    description = 'sort table by a column (asc|desc)'
+
+    min_args = 1
+    max_args = 2
+    combine = all
+
+    def __init__(self, rosh, cmd, *args):
+        self.sortby = args[0]
+        self.reverse = len(args) > 1 and args[1] == 'desc'
+
+    @classmethod
+    def validate(cls, rosh, cmd, args):
+        result = super().validate(rosh, cmd, args)
+        if result[0] is not None:
+            return result
+
+        if len(args) > 1 and not args[1] in ('asc', 'desc'):
+            return (2, 'order must be asc or desc')
+
+        return (None, None)
+
+    @classmethod
+    def validate_columns(cls, rosh, field_names, args):
+        if field_names is None:
+            return (None, None)
+
+        try:
+            find_column(field_names, args[0])
+        except ValueError as err:
+            return (1, str(err))
+
+        return (None, None)
+
+    def match(self, item):
+        # the rows are sorted by the table
+        return True
+
+    def matcher(self):
+        return None
+
+is_rosh_filter = True
+rosh_filter = RoshSortFilter
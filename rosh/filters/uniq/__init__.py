@@ -0,0 +1,93 @@
+from rosh.filters import RoshStageFilter
+from rosh.output.columns import find_column, int_key
+from rosh.output.pipeline import RoshStage
+
+
+class RoshUniqStage(RoshStage):
+    def __init__(self, columns, counts):
+        self.names = columns
+        self.counts = counts
+        self.seen = {}
+
+    def bind(self, tbl, emit):
+        super().bind(tbl, emit)
+
+        self.indices = None
+        try:
+            if self.names:
+                self.indices = [self.column(name) for name in self.names]
+            else:
+                self.indices = list(range(len(tbl.field_names)))
+        except ValueError as err:
+            print(f'ERR: uniq {err}')
+
+    def push(self, row):
+        if self.indices is None:
+            return
+
+        # distinct rows are kept in the order they were seen first
+        key = tuple(str(row[i]) for i in self.indices)
+        self.seen[key] = self.seen.get(key, 0) + 1
+
+    def flush(self):
+        if self.indices is None or not self.seen:
+            return
+
+        tbl = self.tbl
+        names = [tbl.field_names[i] for i in self.indices]
+        aligns = {name: tbl.align.get(name, 'c') for name in names}
+
+        # the default sort column of the table is dropped by the table
+        # if it is gone
+        tbl.set_columns(names + ['count'] if self.counts else names)
+        for (name, align) in aligns.items():
+            tbl.align[name] = align
+        if self.counts:
+            tbl.align['count'] = 'r'
+            tbl.types['count'] = int_key
+
+        for (key, count) in self.seen.items():
+            self.emit([*key, count] if self.counts else list(key))
+        self.seen = {}
+
+class RoshUniqFilter(RoshStageFilter):
+    description = 'drop repeated rows or column values (-c: count them)'
+
+    def __init__(self, rosh, cmd, *args):
+        self.counts = len(args) > 0 and args[0] == '-c'
+        self.names = args[1:] if self.counts else args
+
+    @classmethod
+    def validate_columns(cls, rosh, field_names, args):
+        if field_names is None:
+            return (None, None)
+
+        counts = len(args) > 0 and args[0] == '-c'
+        for (pos, name) in enumerate(args[1:] if counts else args, 2 if counts else 1):
+            try:
+                find_column(field_names, name)
+            except ValueError as err:
+                return (pos, str(err))
+
+        return (None, None)
+
+    @classmethod
+    def columns(cls, field_names, args):
+        if field_names is None:
+            return None
+
+        counts = len(args) > 0 and args[0] == '-c'
+        names = args[1:] if counts else args
+        try:
+            if names:
+                field_names = [find_column(field_names, name) for name in names]
+        except ValueError:
+            return None
+
+        return field_names + ['count'] if counts else field_names
+
+    def stage(self):
+        return RoshUniqStage(self.names, self.counts)
+
+is_rosh_filter = True
+rosh_filter = RoshUniqFilter
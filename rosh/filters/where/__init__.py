@@ -0,0 +1,104 @@
+import operator
+import re
+
+from rosh.filters import RoshStageFilter
+from rosh.output.columns import find_column, natural_key
+from rosh.output.pipeline import RoshStage
+
+
+OPERATORS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+    '~': None,
+    '!~': None,
+}
+
+class RoshWhereStage(RoshStage):
+    def __init__(self, column, op, value):
+        self.name = column
+        self.op = op
+        self.value = value
+
+    def bind(self, tbl, emit):
+        super().bind(tbl, emit)
+
+        try:
+            index = self.column(self.name)
+        except ValueError as err:
+            print(f'ERR: where {err}')
+            self.test = lambda row: False
+            return
+
+        if self.op in ('~', '!~'):
+            search = re.compile(self.value).search
+            if self.op == '~':
+                self.test = lambda row: search(str(row[index])) is not None
+            else:
+                self.test = lambda row: search(str(row[index])) is None
+        elif self.op in ('==', '!='):
+            # values are compared as rendered
+            (op, value) = (OPERATORS[self.op], self.value)
+            self.test = lambda row: op(str(row[index]), value)
+        else:
+            # values are compared by the sort key of the column
+            key = tbl.types.get(tbl.field_names[index], natural_key)
+            (op, value) = (OPERATORS[self.op], key(self.value))
+
+            def _test(row):
+                try:
+                    return op(key(row[index]), value)
+                except TypeError:
+                    return False
+            self.test = _test
+
+    def push(self, row):
+        if self.test(row):
+            self.emit(row)
+
+class RoshWhereFilter(RoshStageFilter):
+    description = 'include rows by a column value (<column> ==|!=|<|<=|>|>=|~|!~ <value>)'
+
+    min_args = 3
+    max_args = 3
+
+    def __init__(self, rosh, cmd, *args):
+        (self.column, self.op, self.value) = args
+
+    @classmethod
+    def validate(cls, rosh, cmd, args):
+        result = super().validate(rosh, cmd, args)
+        if result[0] is not None:
+            return result
+
+        if not args[1] in OPERATORS:
+            return (2, 'operator must be one of {}'.format('|'.join(OPERATORS)))
+
+        if args[1] in ('~', '!~'):
+            try:
+                re.compile(args[2])
+            except re.error as err:
+                return (3, f'invalid regex: {err}')
+
+        return (None, None)
+
+    @classmethod
+    def validate_columns(cls, rosh, field_names, args):
+        if field_names is None:
+            return (None, None)
+
+        try:
+            find_column(field_names, args[0])
+        except ValueError as err:
+            return (1, str(err))
+
+        return (None, None)
+
+    def stage(self):
+        return RoshWhereStage(self.column, self.op, self.value)
+
+is_rosh_filter = True
+rosh_filter = RoshWhereFilter
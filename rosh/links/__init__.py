@@ -0,0 +1,215 @@
+import errno
+import select
+import shlex
+import socket
+from threading import RLock
+
+from pyroute2.netlink.exceptions import NetlinkError
+from pyroute2.netlink.rtnl import RTMGRP_LINK
+
+
+# receive buffer of the event socket
+RCVBUF_SIZE = 1024 * 1024
+
+class RoshLink():
+    __slots__ = ('index', 'ifname', 'phy', 'vrf_table')
+
+    def __init__(self, index, ifname, phy, vrf_table=None):
+        self.index = index
+        self.ifname = ifname
+        self.phy = phy
+        # table of a VRF device
+        self.vrf_table = vrf_table
+
+def vrf_table(link):
+    '''
+    Returns the table bound to a VRF link (or None).
+    '''
+    linkinfo = link.get_attr('IFLA_LINKINFO')
+    if linkinfo is None or linkinfo.get_attr('IFLA_INFO_KIND') != 'vrf':
+        return None
+
+    data = linkinfo.get_attr('IFLA_INFO_DATA')
+    if data is None:
+        return None
+    return data.get_attr('IFLA_VRF_TABLE')
+
+class RoshLinkIndex():
+    '''
+    Index of the interfaces of a namespace. It does one full dump on the
+    first use and is kept current by a RTNLGRP_LINK subscription, so
+    lookups by ifindex, by ifname and of VRFs by table are O(1).
+
+    The events are applied by refresh(), which is called once per command
+    line (and per batch of the monitor). Lookups are plain dict reads,
+    they do not take the lock or poll the event socket.
+    '''
+    def __init__(self, ipr):
+        self.ipr = ipr
+        self.sock = None
+        self.lock = RLock()
+
+        self.by_index = None
+        self.by_name = None
+        self.by_vrf_table = None
+        self._names = {}
+
+        # statistics
+        self.resyncs = 0
+
+    def subscribe(self):
+        '''
+        Opens the event socket in the namespace of the IPRoute / NetNS
+        instance.
+        '''
+        self.sock = self.ipr.clone()
+        try:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RCVBUF_SIZE)
+        except (OSError, AttributeError):
+            pass
+        self.sock.bind(groups=RTMGRP_LINK)
+
+    def dump(self):
+        '''
+        Rebuilds the index from a full link dump. The new index replaces
+        the old one when it is complete, by_index is set last.
+        '''
+        index = RoshLinkIndex(self.ipr)
+        (index.by_index, index.by_name, index.by_vrf_table) = ({}, {}, {})
+        for link in self.ipr.get_links():
+            index.add(link)
+
+        (self.by_name, self.by_vrf_table, self.by_index) = (index.by_name, index.by_vrf_table, index.by_index)
+        self._names = {}
+
+    def add(self, link):
+        index = link['index']
+        ifname = link.get_attr('IFLA_IFNAME')
+        table = vrf_table(link)
+
+        old = self.by_index.get(index)
+        if old is not None:
+            if ifname is None:
+                ifname = old.ifname
+            if link.get_attr('IFLA_LINKINFO') is None:
+                table = old.vrf_table
+            self.forget(old)
+
+        if ifname is None:
+            return
+
+        entry = RoshLink(index, ifname, link.get_attr('IFLA_PARENT_DEV_BUS_NAME') is not None, table)
+        self.by_index[index] = entry
+        self.by_name[ifname] = entry
+        if table is not None:
+            self.by_vrf_table[table] = entry
+
+    def remove(self, link):
+        entry = self.by_index.pop(link['index'], None)
+        if entry is not None:
+            self.forget(entry)
+
+    def forget(self, entry):
+        if self.by_name.get(entry.ifname) is entry:
+            del self.by_name[entry.ifname]
+        if entry.vrf_table is not None and self.by_vrf_table.get(entry.vrf_table) is entry:
+            del self.by_vrf_table[entry.vrf_table]
+
+    def refresh(self):
+        '''
+        Applies pending link events, builds the index on first use.
+        '''
+        with self.lock:
+            if self.sock is None:
+                self.subscribe()
+                self.dump()
+
+            changed = False
+            try:
+                while select.select([self.sock], [], [], 0)[0]:
+                    for msg in self.sock.get():
+                        if msg.get('event') == 'RTM_NEWLINK':
+                            self.add(msg)
+                            changed = True
+                        elif msg.get('event') == 'RTM_DELLINK':
+                            self.remove(msg)
+                            changed = True
+            except (OSError, NetlinkError) as ex:
+                if getattr(ex, 'errno', None) != errno.ENOBUFS and getattr(ex, 'code', None) != errno.ENOBUFS:
+                    raise
+
+                # events were lost, resync
+                self.resyncs += 1
+                self.dump()
+                changed = True
+
+            if changed:
+                self._names = {}
+
+    def build(self):
+        '''
+        Builds the index on first use.
+        '''
+        if self.by_index is None:
+            self.refresh()
+
+    def ifname(self, index):
+        '''
+        Returns the ifname of an ifindex (or None).
+        '''
+        self.build()
+        entry = self.by_index.get(index)
+        if entry is None:
+            return None
+        return entry.ifname
+
+    def index(self, ifname):
+        '''
+        Returns the ifindex of an ifname (or None).
+        '''
+        self.build()
+        entry = self.by_name.get(ifname)
+        if entry is None:
+            return None
+        return entry.index
+
+    def vrf(self, table):
+        '''
+        Returns the ifindex of the VRF bound to a table (or None).
+        '''
+        self.build()
+        entry = self.by_vrf_table.get(table)
+        if entry is None:
+            return None
+        return entry.index
+
+    def exists(self, ifname, phy=False):
+        self.build()
+        entry = self.by_name.get(ifname)
+        return entry is not None and (entry.phy or not phy)
+
+    def names(self, phy=False):
+        '''
+        Returns the sorted and quoted ifnames used for completion.
+        '''
+        self.refresh()
+        names = self._names.get(phy)
+        if names is None:
+            names = self._names[phy] = [
+                shlex.quote(entry.ifname) for entry in sorted(self.by_name.values(), key=lambda x: x.ifname)
+                if entry.phy or not phy
+            ]
+        return names
+
+    def ifnames(self):
+        '''
+        Returns the (unquoted) ifnames.
+        '''
+        self.build()
+        return list(self.by_name)
+
+    def close(self):
+        with self.lock:
+            if self.sock is not None:
+                self.sock.close()
+                self.sock = None
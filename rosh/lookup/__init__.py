@@ -1,3 +1,4 @@
+import pyroute2.netlink.rtnl
 import pyroute2.netlink.rtnl.ndmsg
 import pyroute2.netlink.rtnl.ifaddrmsg
 
@@ -20,3 +21,5 @@ neigh_states = LookupID(pyroute2.netlink.rtnl.ndmsg.states)
 
 ifa_flags_map = {x[6:].lower(): y for x,y in pyroute2.netlink.rtnl.ifaddrmsg.IFA_F_NAMES.items()}
 ifa_flags = LookupID(ifa_flags_map)
+
+rt_types = LookupID({k: v for k, v in pyroute2.netlink.rtnl.rt_type.items() if isinstance(k, str)})
@@ -0,0 +1,261 @@
+import hashlib
+import importlib
+import json
+import os
+import pkgutil
+
+
+MANIFEST_FORMAT = 2
+
+class RoshManifestEntry():
+    '''
+    Lazy reference to a command or filter module listed in the manifest.
+    The module is imported on the first call of `load()`.
+    '''
+    def __init__(self, path, module, description='', completer=False, config=None):
+        self.path = tuple(path)
+        self.module = module
+        self.description = description
+        self.has_completer = completer
+        self.config = config or {}
+        self.instance = None
+
+    def load(self, rosh):
+        if self.instance is None:
+            self.instance = self.create(rosh, importlib.import_module(self.module))
+        return self.instance
+
+    def create(self, rosh, module):
+        raise NotImplementedError()
+
+    def to_dict(self):
+        return {
+            'path': list(self.path),
+            'module': self.module,
+            'description': self.description,
+            'completer': self.has_completer,
+            'config': self.config,
+        }
+
+class RoshCommandEntry(RoshManifestEntry):
+    def create(self, rosh, module):
+        return module.rosh_command(rosh)
+
+    def arguments(self, rosh):
+        '''
+        Returns the argument description of the command help output, the
+        command is loaded (it is not part of the manifest).
+        '''
+        completer = self.load(rosh).completer
+        return _get_description(completer) if completer is not None else []
+
+class RoshFilterEntry(RoshManifestEntry):
+    def create(self, rosh, module):
+        return module.rosh_filter
+
+    def arguments(self, rosh):
+        return _get_description(self.load(rosh).completer)
+
+def _get_description(completer):
+    '''
+    Builds the argument description of a completer used in the command
+    help output.
+    '''
+    from prompt_toolkit.completion import WordCompleter
+    from rosh.completer import RoshPeerCompleter, RoshTuplesCompleter
+
+    description = getattr(completer, 'description', None)
+    if description is None:
+        if isinstance(completer, WordCompleter):
+            words = completer.words
+            if callable(words):
+                words = words()
+            if '' in words:
+                return ['[{}]'.format('|'.join([w for w in words if w != '']))]
+            else:
+                return ['<{}>'.format('|'.join(words))]
+        elif isinstance(completer, RoshPeerCompleter):
+            return _get_description(completer.base_completer) + _get_description(completer.sub_completer)
+        elif isinstance(completer, RoshTuplesCompleter):
+            descriptions = []
+            for key, val in sorted(completer.flat_tuples.items(), key=lambda x: x[0]):
+                descriptions.append(f'[{key} <{"|".join(_get_description(val))}>]')
+            return descriptions
+    else:
+        return [description]
+
+    return []
+
+def build_tree(entries):
+    '''
+    Builds the nested commands dict from a list of manifest entries. A
+    command having sub commands is stored with the empty key.
+    '''
+    tree = {}
+    for entry in entries:
+        node = tree
+        for name in entry.path[:-1]:
+            child = node.get(name)
+            if child is None:
+                child = node[name] = {}
+            elif isinstance(child, RoshManifestEntry):
+                child = node[name] = {'': child}
+            node = child
+
+        name = entry.path[-1]
+        if isinstance(node.get(name), dict):
+            node[name][''] = entry
+        else:
+            node[name] = entry
+
+    return tree
+
+class RoshManifest():
+    '''
+    Cached manifest of all available commands and filters. The manifest
+    is rebuilt if the installed package or the executables in $PATH
+    have changed, so the command modules need only be imported when a
+    command is used.
+    '''
+    def __init__(self, rosh, version, cache_file=None):
+        self.rosh = rosh
+        self.version = version
+        self.base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+        if cache_file is None:
+            cache_dir = os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache'))
+            cache_file = os.path.join(cache_dir, 'rosh', 'manifest.json')
+        self.cache_file = cache_file
+
+        self.commands = []
+        self.filters = []
+
+    def signature(self):
+        '''
+        Returns a hash of the installed command and filter modules and
+        the $PATH directories (commands depend on external executables).
+        '''
+        h = hashlib.sha1(f'{MANIFEST_FORMAT}:{self.version}'.encode())
+
+        for pkg in ['commands', 'filters']:
+            for root, dirs, files in os.walk(os.path.join(self.base_dir, pkg)):
+                dirs[:] = sorted(d for d in dirs if d != '__pycache__')
+                for fn in sorted(files):
+                    if fn.endswith('.py'):
+                        st = os.stat(os.path.join(root, fn))
+                        rel = os.path.relpath(os.path.join(root, fn), self.base_dir)
+                        h.update(f'{rel}:{st.st_mtime_ns}:{st.st_size}\n'.encode())
+
+        for d in os.environ.get('PATH', '').split(os.pathsep):
+            try:
+                h.update(f'{d}:{os.stat(d).st_mtime_ns}\n'.encode())
+            except OSError:
+                pass
+        h.update(os.environ.get('SHELL', '').encode())
+
+        return h.hexdigest()
+
+    def load(self):
+        '''
+        Loads the manifest from the cache file or rebuilds it, returns
+        the commands and filters tree.
+        '''
+        signature = self.signature()
+
+        if not self.read(signature):
+            self.build()
+            self.write(signature)
+
+        return (build_tree(self.commands), build_tree(self.filters))
+
+    def read(self, signature):
+        try:
+            with open(self.cache_file, 'r') as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            return False
+
+        if data.get('signature') != signature:
+            return False
+
+        self.commands = [RoshCommandEntry(**entry) for entry in data['commands']]
+        self.filters = [RoshFilterEntry(**entry) for entry in data['filters']]
+
+        return True
+
+    def write(self, signature):
+        data = {
+            'signature': signature,
+            'commands': [entry.to_dict() for entry in self.commands],
+            'filters': [entry.to_dict() for entry in self.filters],
+        }
+
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            tmp_file = f'{self.cache_file}.{os.getpid()}'
+            with open(tmp_file, 'w') as fh:
+                json.dump(data, fh)
+            os.replace(tmp_file, self.cache_file)
+        except OSError:
+            # the manifest will be rebuilt on next start
+            pass
+
+    def build(self):
+        '''
+        Imports all command and filter modules and builds the manifest
+        entries. The commands created while building are kept.
+        '''
+        import rosh.commands
+        import rosh.filters
+
+        self.commands = []
+        for (path, module) in self.find_modules(rosh.commands, 'is_rosh_command'):
+            cmd = module.rosh_command(self.rosh)
+
+            entry = RoshCommandEntry(
+                path,
+                module.__name__,
+                description=getattr(cmd, 'description', ''),
+                completer=cmd.completer is not None,
+                config={section: {k: str(v) for k, v in options.items()} for section, options in cmd.config_defaults.items()},
+            )
+            entry.instance = cmd
+            self.commands.append(entry)
+
+        self.filters = []
+        for (path, module) in self.find_modules(rosh.filters, 'is_rosh_filter'):
+            flt = module.rosh_filter
+
+            entry = RoshFilterEntry(
+                path,
+                module.__name__,
+                description=getattr(flt, 'description', ''),
+            )
+            entry.instance = flt
+            self.filters.append(entry)
+
+    def find_modules(self, ns_pkg, attr, path=()):
+        '''
+        Finds packages in a namespace which have the `attr` attribute
+        set to `True`, recursively.
+        '''
+        for finder, name, ispkg in pkgutil.iter_modules(ns_pkg.__path__, ns_pkg.__name__ + "."):
+            module = importlib.import_module(name)
+            module_path = path + (name.rsplit('.', 1)[1],)
+
+            if getattr(module, attr, False):
+                yield (module_path, module)
+
+            if ispkg:
+                yield from self.find_modules(module, attr, module_path)
+
+    @property
+    def config(self):
+        '''
+        Returns the config defaults of all commands.
+        '''
+        config = {}
+        for entry in self.commands:
+            for section, options in entry.config.items():
+                config.setdefault(section, {}).update(options)
+        return config
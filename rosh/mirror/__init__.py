@@ -0,0 +1,329 @@
+import errno
+import select
+import socket
+from threading import RLock
+
+from pyroute2.netlink.exceptions import NetlinkError
+from pyroute2.netlink.rtnl import (
+    RTMGRP_IPV4_IFADDR, RTMGRP_IPV6_IFADDR,
+    RTMGRP_IPV4_ROUTE, RTMGRP_IPV6_ROUTE,
+    RTMGRP_NEIGH,
+)
+from socket import AF_BRIDGE, AF_INET, AF_INET6
+
+from rosh.decoder import RoshRoute
+from rosh.dump import RoshDump
+from rosh.trie import build_trie, route_prefixes
+
+
+# receive buffer of the event sockets
+RCVBUF_SIZE = 4 * 1024 * 1024
+
+def is_enobufs(ex):
+    return getattr(ex, 'errno', None) == errno.ENOBUFS or getattr(ex, 'code', None) == errno.ENOBUFS
+
+class RoshMirror():
+    '''
+    Base class for in-memory mirrors of netlink objects of a namespace.
+    The mirror does one full dump on first use and applies the
+    RTM_NEW*/RTM_DEL* events of its multicast groups afterwards. Pending
+    events are applied when the mirror is accessed, lost events (ENOBUFS)
+    trigger a resync.
+    '''
+
+    # multicast groups of the event socket
+    groups = 0
+
+    # event names adding/removing entries
+    new_event = None
+    del_event = None
+
+    def __init__(self, ipr):
+        self.ipr = ipr
+        self.sock = None
+        self.lock = RLock()
+
+        self.entries = None
+
+        # incremented on each change
+        self.generation = 0
+
+        # statistics
+        self.resyncs = 0
+
+    def subscribe(self):
+        '''
+        Opens the event socket in the namespace of the IPRoute / NetNS
+        instance.
+        '''
+        self.sock = self.ipr.clone()
+        try:
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RCVBUF_SIZE)
+        except (OSError, AttributeError):
+            pass
+        self.sock.bind(groups=self.groups)
+
+    def dump(self):
+        '''
+        Rebuilds the mirror from a full dump.
+        '''
+        self.entries = {}
+        for entry in self.get_dump():
+            self.add(entry)
+        self.generation += 1
+
+    def get_dump(self):
+        raise NotImplementedError()
+
+    def key(self, entry):
+        raise NotImplementedError()
+
+    def entry(self, msg):
+        '''
+        Returns the entry of an event message, the message by default.
+        '''
+        return msg
+
+    def add(self, entry):
+        self.entries[self.key(entry)] = entry
+
+    def remove(self, entry):
+        self.entries.pop(self.key(entry), None)
+
+    def apply(self, msgs):
+        '''
+        Applies event messages, returns True if the mirror has changed.
+        '''
+        changed = False
+        for msg in msgs:
+            event = msg.get('event')
+            if event == self.new_event:
+                self.add(self.entry(msg))
+                changed = True
+            elif event == self.del_event:
+                self.remove(self.entry(msg))
+                changed = True
+
+        if changed:
+            self.generation += 1
+        return changed
+
+    def resync(self):
+        self.resyncs += 1
+        self.dump()
+
+    def refresh(self):
+        '''
+        Applies pending events, builds the mirror on first use.
+        '''
+        with self.lock:
+            if self.sock is None:
+                self.subscribe()
+                self.dump()
+
+            try:
+                while select.select([self.sock], [], [], 0)[0]:
+                    self.apply(self.sock.get())
+            except (OSError, NetlinkError) as ex:
+                if not is_enobufs(ex):
+                    raise
+
+                # events were lost
+                self.resync()
+
+    def values(self):
+        '''
+        Returns a snapshot of the mirrored entries.
+        '''
+        self.refresh()
+        with self.lock:
+            return list(self.entries.values())
+
+    def match(self, entry, fields, filter):
+        '''
+        Matches the entry against the filter, the fields return the
+        tuple of values of an entry.
+        '''
+        for name, value in filter.items():
+            if not value in fields[name](entry):
+                return False
+        return True
+
+    def close(self):
+        with self.lock:
+            if self.sock is not None:
+                self.sock.close()
+                self.sock = None
+
+    def __len__(self):
+        self.refresh()
+        return len(self.entries)
+
+class RoshRouteMirror(RoshMirror):
+    '''
+    Mirror of the IPv4 and IPv6 routes of all tables. The routes are kept
+    as RoshRoute records, the dump uses the route decoder and events are
+    converted from the pyroute2 messages.
+    '''
+    groups = RTMGRP_IPV4_ROUTE | RTMGRP_IPV6_ROUTE
+    new_event = 'RTM_NEWROUTE'
+    del_event = 'RTM_DELROUTE'
+
+    fields = {
+        'table': lambda route: (route.table,),
+        'oif': lambda route: (route.oif, *(route.oifs or ())),
+        'gateway': lambda route: (route.gateway,),
+        'proto': lambda route: (route.proto,),
+        'scope': lambda route: (route.scope,),
+        'type': lambda route: (route.type,),
+    }
+
+    def __init__(self, ipr):
+        super().__init__(ipr)
+
+        # prefix tries of all routes by family, built on first use and
+        # updated by the events
+        self.tries = {}
+
+    def dump(self):
+        self.tries = {}
+        super().dump()
+
+    def get_dump(self):
+        dump = RoshDump(self.ipr)
+        try:
+            for family in [AF_INET, AF_INET6]:
+                yield from dump.get_route_records(family)
+        finally:
+            dump.close()
+
+    def entry(self, msg):
+        return RoshRoute.from_nlmsg(msg)
+
+    def add(self, route):
+        key = self.key(route)
+        trie = self.tries.get(route.family)
+        if trie is not None:
+            old = self.entries.get(key)
+            if old is not None:
+                trie.remove(*trie.route_prefix(old), old)
+            trie.insert(*trie.route_prefix(route), route)
+
+        self.entries[key] = route
+
+    def remove(self, route):
+        old = self.entries.pop(self.key(route), None)
+        trie = self.tries.get(route.family)
+        if trie is not None and old is not None:
+            trie.remove(*trie.route_prefix(old), old)
+
+    def key(self, route):
+        # identity of a route in the kernel, a replace changes the next
+        # hops of the same entry
+        return (
+            route.family,
+            route.table,
+            route.dst,
+            route.dst_len,
+            route.src,
+            route.src_len,
+            route.tos,
+            route.priority,
+        )
+
+    def get_route_records(self, family, **filter):
+        # dst is a route lookup, not a filter
+        if 'dst' in filter:
+            return map(RoshRoute.from_nlmsg, self.ipr.get_routes(family=family, **filter))
+
+        return [route for route in self.values() if family in (None, route.family) and self.match(route, self.fields, filter)]
+
+    def get_route_trie(self, family, scope=None, **filter):
+        '''
+        Returns a prefix trie of the routes. The trie of all routes is
+        kept up to date by the events (`scope` is not needed), filtered
+        tries only get the routes selected by `scope`.
+        '''
+        if filter:
+            return build_trie(family, self.get_route_records(family, **filter), scope)
+
+        self.refresh()
+        with self.lock:
+            trie = self.tries.get(family)
+            if trie is None:
+                trie = self.tries[family] = build_trie(family, self.get_route_records(family))
+
+            return trie
+
+    def get_route_prefixes(self, family, **filter):
+        '''
+        Returns the distinct prefixes of the routes in address order.
+        '''
+        if filter:
+            return route_prefixes(family, self.get_route_records(family, **filter))
+
+        return list(self.get_route_trie(family).prefixes())
+
+class RoshAddressMirror(RoshMirror):
+    '''
+    Mirror of the IPv4 and IPv6 addresses.
+    '''
+    groups = RTMGRP_IPV4_IFADDR | RTMGRP_IPV6_IFADDR
+    new_event = 'RTM_NEWADDR'
+    del_event = 'RTM_DELADDR'
+
+    fields = {
+        'index': lambda msg: (msg['index'],),
+    }
+
+    def get_dump(self):
+        for family in [AF_INET, AF_INET6]:
+            yield from self.ipr.get_addr(family=family)
+
+    def key(self, msg):
+        return (
+            msg['family'],
+            msg['index'],
+            msg.get_attr('IFA_ADDRESS'),
+            msg['prefixlen'],
+        )
+
+    def get_addr(self, family=None, **filter):
+        return [msg for msg in self.values() if family in (None, msg['family']) and self.match(msg, self.fields, filter)]
+
+class RoshNeighbourMirror(RoshMirror):
+    '''
+    Mirror of the IPv4 and IPv6 neighbour caches and the bridge FDB.
+    '''
+    groups = RTMGRP_NEIGH
+    new_event = 'RTM_NEWNEIGH'
+    del_event = 'RTM_DELNEIGH'
+
+    fields = {
+        'dst': lambda msg: (msg.get_attr('NDA_DST'),),
+        'ifindex': lambda msg: (msg['ifindex'],),
+        'master': lambda msg: (msg.get_attr('NDA_MASTER'),),
+        'state': lambda msg: (msg['state'],),
+    }
+
+    def get_dump(self):
+        for family in [AF_INET, AF_INET6, AF_BRIDGE]:
+            yield from self.ipr.get_neighbours(family=family)
+
+    def key(self, msg):
+        return (
+            msg['family'],
+            msg['ifindex'],
+            msg.get_attr('NDA_DST'),
+            msg.get_attr('NDA_LLADDR') if msg['family'] == AF_BRIDGE else None,
+            msg.get_attr('NDA_VLAN'),
+        )
+
+    def get_neighbours(self, family=None, **filter):
+        return [msg for msg in self.values() if family in (None, msg['family']) and self.match(msg, self.fields, filter)]
+
+MIRRORS = {
+    'addresses': RoshAddressMirror,
+    'neighbours': RoshNeighbourMirror,
+    'routes': RoshRouteMirror,
+}
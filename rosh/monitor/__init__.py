@@ -0,0 +1,582 @@
+import errno
+from ipaddress import ip_interface, ip_network
+import select
+import socket
+import struct
+import time
+from socket import AF_INET, AF_INET6, inet_ntop
+
+from pyroute2.netlink.rtnl import (
+    RTM_NEWADDR, RTM_DELADDR,
+    RTM_NEWLINK, RTM_DELLINK,
+    RTM_NEWNEIGH, RTM_DELNEIGH,
+    RTM_NEWROUTE, RTM_DELROUTE,
+    RTM_NEWRULE, RTM_DELRULE,
+    RTMGRP_IPV4_IFADDR, RTMGRP_IPV6_IFADDR,
+    RTMGRP_IPV4_ROUTE, RTMGRP_IPV6_ROUTE,
+    RTMGRP_IPV4_RULE, RTMGRP_IPV6_RULE,
+    RTMGRP_IPV6_PREFIX,
+    RTMGRP_LINK,
+    RTMGRP_NEIGH,
+    RTNLGRP_IPV4_NETCONF, RTNLGRP_IPV6_NETCONF,
+)
+from pyroute2.netlink.rtnl.marshal import MarshalRtnl
+
+from rosh.decoder import NLMSGHDR, RECV_SIZE, RTATTR, RoshRouteDecoder, compressed
+from rosh.lookup import ifa_flags, neigh_flags, neigh_states, rt_types
+from rosh.output.columns import ifname_key, int_key, prefix_key
+from rosh.rtlookup import protos, scopes, tables
+
+
+# receive buffer of the event sockets, events are lost if it overflows
+RCVBUF_SIZE = 32 * 1024 * 1024
+
+# not exported by the socket module
+SO_RCVBUFFORCE = 33
+
+# datagrams received per read
+READ_BUDGET = 4096
+
+RTM_NEWPREFIX = 52
+RTM_NEWNETCONF = 80
+RTM_DELNETCONF = 81
+
+PREFIXMSG = struct.Struct('=BxxxiBBBx')
+PREFIX_ADDRESS = 1
+
+NETCONFMSG = struct.Struct('=Bxxx')
+NETCONFA_IFINDEX = 1
+NETCONFA_FORWARDING = 2
+NETCONFA_RP_FILTER = 3
+NETCONFA_MC_FORWARDING = 4
+NETCONFA_PROXY_NEIGH = 5
+
+I32 = struct.Struct('=i')
+
+NLM_F_REPLACE = 0x100
+
+# groups shown per second by the event summary
+SUMMARY_GROUPS = 8
+
+def split_messages(data):
+    '''
+    Splits a receive buffer into the netlink messages, yields tuples of
+    the message type and the message.
+    '''
+    view = memoryview(data)
+    offset = 0
+    end = len(data)
+    while offset + NLMSGHDR.size <= end:
+        (length, msg_type, flags, seq, pid) = NLMSGHDR.unpack_from(view, offset)
+        if length < NLMSGHDR.size:
+            break
+
+        yield (msg_type, bytes(view[offset:offset + length]))
+        offset += (length + 3) & ~3
+
+def attrs(view, pos, end):
+    '''
+    Yields the type and the value offsets of the attributes of a message.
+    '''
+    while pos + RTATTR.size <= end:
+        (rta_len, rta_type) = RTATTR.unpack_from(view, pos)
+        if rta_len < RTATTR.size:
+            break
+        yield (rta_type & 0x3fff, pos + RTATTR.size, pos + rta_len)
+        pos += (rta_len + 3) & ~3
+
+class RoshEventSource():
+    '''
+    Netlink event socket of a namespace bound to RTNL multicast groups.
+    The raw messages are returned, they are decoded by the event columns
+    (or recorded). Overflows of the receive buffer (ENOBUFS) are counted,
+    their events are lost.
+    '''
+    # the source never ends (unlike replays)
+    done = False
+
+    def __init__(self, ipr, groups, rcvbuf=RCVBUF_SIZE):
+        self.sock = ipr.clone()
+
+        # SO_RCVBUFFORCE ignores rmem_max (CAP_NET_ADMIN)
+        for option in (SO_RCVBUFFORCE, socket.SO_RCVBUF):
+            try:
+                self.sock.setsockopt(socket.SOL_SOCKET, option, rcvbuf)
+                break
+            except (OSError, AttributeError):
+                pass
+        self.sock.bind(groups=groups)
+
+        # receive buffer reused by all reads, recv() would allocate
+        # RECV_SIZE bytes per datagram
+        self.buffer = memoryview(bytearray(RECV_SIZE))
+
+        # statistics
+        self.events = 0
+        self.overflows = 0
+
+    def fileno(self):
+        return self.sock.fileno()
+
+    def wait(self, timeout):
+        '''
+        Waits up to `timeout` seconds for messages, returns True if there
+        are messages to read.
+        '''
+        return bool(select.select([self], [], [], timeout)[0])
+
+    def recv(self):
+        '''
+        Receives the pending datagrams without blocking, returns a list of
+        tuples of the receive time and the datagram.
+        '''
+        datagrams = []
+        for _ in range(READ_BUDGET):
+            try:
+                length = self.sock.recv_into(self.buffer, RECV_SIZE, socket.MSG_DONTWAIT)
+            except BlockingIOError:
+                break
+            except OSError as ex:
+                if ex.errno != errno.ENOBUFS:
+                    raise
+                self.overflows += 1
+                continue
+
+            datagrams.append((time.time(), self.buffer[:length].tobytes()))
+
+        return datagrams
+
+    def read(self):
+        '''
+        Receives the pending messages without blocking, returns a list of
+        tuples of the receive time, the message type and the message.
+        '''
+        events = []
+        for (ts, data) in self.recv():
+            events.extend((ts, msg_type, msg) for (msg_type, msg) in split_messages(data))
+
+        self.events += len(events)
+        return events
+
+    def now(self):
+        return time.time()
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+class RoshEventColumns():
+    '''
+    Base class of the columns of the events of one object, they match
+    the columns of the show command. The rows are built from the raw
+    messages.
+    '''
+    # name of the monitor object
+    name = None
+
+    # multicast groups of the events
+    groups = 0
+
+    # message types and their event names
+    events = {}
+
+    field_names = []
+    align = {}
+    types = {}
+
+    def __init__(self, rosh):
+        self.rosh = rosh
+
+    def decode(self, msg_type, msg):
+        raise NotImplementedError()
+
+    def event(self, msg_type, msg):
+        '''
+        Returns the event name of a message, new messages replacing an
+        object are changes.
+        '''
+        event = self.events[msg_type]
+        if event == 'add' and NLMSGHDR.unpack_from(msg)[2] & NLM_F_REPLACE:
+            return 'change'
+        return event
+
+    def ifindex(self, obj):
+        '''
+        Returns the ifindex of the decoded message (or None).
+        '''
+        return None
+
+    def key(self, obj):
+        '''
+        Returns the key of the object of an event, repeated events of a
+        key are coalesced.
+        '''
+        return tuple(self.row(obj))
+
+    def group(self, obj):
+        '''
+        Returns the group of an event counted by the event summary.
+        '''
+        return self.ifname(self.ifindex(obj))
+
+    def row(self, obj):
+        raise NotImplementedError()
+
+    def ifname(self, index):
+        return str(self.rosh.idx_to_ifname(index)) if index else '-'
+
+class RoshMarshalEventColumns(RoshEventColumns):
+    '''
+    Event columns of messages decoded by pyroute2.
+    '''
+    marshal = MarshalRtnl()
+
+    def decode(self, msg_type, msg):
+        return next(iter(self.marshal.parse(msg)))
+
+class RoshRouteEventColumns(RoshEventColumns):
+    name = 'route'
+    groups = RTMGRP_IPV4_ROUTE | RTMGRP_IPV6_ROUTE
+    events = {RTM_NEWROUTE: 'add', RTM_DELROUTE: 'del'}
+
+    field_names = ['dst', 'gw', 'oif', 'prio', 'pref', 'proto', 'scope', 'flags', 'table', 'type']
+    align = {'dst': 'l', 'gw': 'l', 'oif': 'l'}
+    types = {
+        'dst': prefix_key,
+        'gw': prefix_key,
+        'oif': ifname_key,
+        'prio': int_key,
+        'pref': int_key,
+        'flags': int_key,
+    }
+
+    decoder = RoshRouteDecoder()
+
+    def decode(self, msg_type, msg):
+        return self.decoder.parse_route(memoryview(msg), NLMSGHDR.size, len(msg))
+
+    def ifindex(self, route):
+        return route.oif
+
+    def key(self, route):
+        return (route.family, route.table, route.dst, route.dst_len, route.priority)
+
+    def group(self, route):
+        return f'{protos.lookup_str(route.proto)}/{tables.lookup_str(route.table)}'
+
+    def row(self, route):
+        default = '::' if route.family == AF_INET6 else '0.0.0.0'
+        return [
+            f'{route.dst or default}/{route.dst_len}',
+            route.gateway or '-',
+            self.ifname(route.oif),
+            '-' if route.priority is None else str(route.priority),
+            '-' if route.pref is None else str(route.pref),
+            str(protos.lookup_str(route.proto)),
+            str(scopes.lookup_str(route.scope)),
+            str(route.flags),
+            str(tables.lookup_str(route.table)),
+            str(rt_types.lookup_str(route.type)),
+        ]
+
+class RoshLinkEventColumns(RoshMarshalEventColumns):
+    name = 'interface'
+    groups = RTMGRP_LINK
+    events = {RTM_NEWLINK: 'add', RTM_DELLINK: 'del'}
+
+    field_names = ['idx', 'ifname', 'kind', 'admin', 'oper', 'carrier']
+    align = {'idx': 'r', 'ifname': 'l'}
+    types = {'idx': int_key, 'ifname': ifname_key}
+
+    def ifindex(self, link):
+        return link['index']
+
+    def key(self, link):
+        return link['index']
+
+    def row(self, link):
+        link_info = link.get_attr('IFLA_LINKINFO')
+        if link_info is not None:
+            kind = link_info.get_attr('IFLA_INFO_KIND')
+        else:
+            kind = link.get_attr('IFLA_PARENT_DEV_BUS_NAME', '-')
+
+        return [
+            str(link['index']),
+            link.get_attr('IFLA_IFNAME', '-'),
+            kind or '-',
+            link['state'],
+            (link.get_attr('IFLA_OPERSTATE') or '-').lower(),
+            'up' if link.get_attr('IFLA_CARRIER') else 'down',
+        ]
+
+class RoshAddressEventColumns(RoshMarshalEventColumns):
+    name = 'address'
+    groups = RTMGRP_IPV4_IFADDR | RTMGRP_IPV6_IFADDR
+    events = {RTM_NEWADDR: 'add', RTM_DELADDR: 'del'}
+
+    field_names = ['address', 'ifname', 'scope', 'flags']
+    align = {'address': 'l', 'ifname': 'l'}
+    types = {'address': prefix_key, 'ifname': ifname_key}
+
+    def ifindex(self, addr):
+        return addr['index']
+
+    def key(self, addr):
+        return (addr['index'], addr.get_attr('IFA_ADDRESS'), addr['prefixlen'])
+
+    def row(self, addr):
+        return [
+            str(ip_interface(f"{addr.get_attr('IFA_ADDRESS')}/{addr['prefixlen']}")),
+            self.ifname(addr['index']),
+            str(scopes.lookup_str(addr['scope'])),
+            str(ifa_flags.lookup_str(addr.get_attr('IFA_FLAGS', addr['flags']))),
+        ]
+
+class RoshNeighEventColumns(RoshMarshalEventColumns):
+    name = 'neigh'
+    groups = RTMGRP_NEIGH
+    events = {RTM_NEWNEIGH: 'add', RTM_DELNEIGH: 'del'}
+
+    field_names = ['dst', 'lladdr', 'ifname', 'flags', 'state']
+    align = {'dst': 'l', 'ifname': 'l'}
+    types = {'dst': prefix_key, 'ifname': ifname_key}
+
+    def ifindex(self, neigh):
+        return neigh['ifindex']
+
+    def key(self, neigh):
+        return (neigh['ifindex'], neigh.get_attr('NDA_DST'))
+
+    def row(self, neigh):
+        return [
+            neigh.get_attr('NDA_DST', '-'),
+            neigh.get_attr('NDA_LLADDR', '(incomplete)'),
+            self.ifname(neigh['ifindex']),
+            str(neigh_flags.lookup_str(neigh['flags']) or '-'),
+            str(neigh_states.lookup_str(neigh['state']) or '-'),
+        ]
+
+class RoshRuleEventColumns(RoshMarshalEventColumns):
+    name = 'rule'
+    groups = RTMGRP_IPV4_RULE | RTMGRP_IPV6_RULE
+    events = {RTM_NEWRULE: 'add', RTM_DELRULE: 'del'}
+
+    field_names = ['prio', 'from', 'to', 'iif', 'oif', 'action', 'target', 'proto']
+    align = {'from': 'l', 'to': 'l'}
+    types = {'prio': int_key, 'from': prefix_key, 'to': prefix_key, 'iif': ifname_key, 'oif': ifname_key}
+
+    def prefix(self, rule, name):
+        if rule[f'{name}_len'] == 0:
+            return 'all'
+        return ip_network(f"{rule.get_attr('FRA_' + name.upper())}/{rule[name + '_len']}").with_prefixlen
+
+    def row(self, rule):
+        # the show command module is imported on first use
+        from rosh.commands.show.ipv6.rule import FRA_ACTIONS
+
+        action = FRA_ACTIONS.get(rule['action'], rule['action'])
+        if action == 'lookup':
+            target = tables.lookup_str(rule.get_attr('FRA_TABLE', rule['table']))
+        elif action == 'goto':
+            target = rule.get_attr('FRA_GOTO', '-')
+        else:
+            target = '-'
+
+        return [
+            str(rule.get_attr('FRA_PRIORITY', 0)),
+            self.prefix(rule, 'src'),
+            self.prefix(rule, 'dst'),
+            rule.get_attr('FRA_IIFNAME', '-'),
+            rule.get_attr('FRA_OIFNAME', '-'),
+            str(action),
+            str(target),
+            str(protos.lookup_str(rule.get_attr('FRA_PROTOCOL', '-'))),
+        ]
+
+class RoshPrefixEventColumns(RoshEventColumns):
+    name = 'prefix'
+    groups = RTMGRP_IPV6_PREFIX
+    events = {RTM_NEWPREFIX: 'add'}
+
+    field_names = ['prefix', 'ifname', 'flags']
+    align = {'prefix': 'l', 'ifname': 'l'}
+    types = {'prefix': prefix_key, 'ifname': ifname_key}
+
+    def decode(self, msg_type, msg):
+        view = memoryview(msg)
+        pos = NLMSGHDR.size
+        (family, ifindex, prefix_type, length, flags) = PREFIXMSG.unpack_from(view, pos)
+
+        prefix = None
+        for (attr, start, stop) in attrs(view, pos + PREFIXMSG.size, len(msg)):
+            if attr == PREFIX_ADDRESS:
+                prefix = compressed(inet_ntop(AF_INET6, view[start:stop]))
+
+        return (prefix, length, ifindex, flags)
+
+    def ifindex(self, obj):
+        return obj[2]
+
+    def key(self, obj):
+        return obj
+
+    def row(self, obj):
+        (prefix, length, ifindex, flags) = obj
+        return [f'{prefix}/{length}', self.ifname(ifindex), str(flags)]
+
+class RoshNetconfEventColumns(RoshEventColumns):
+    name = 'netconf'
+    groups = (1 << (RTNLGRP_IPV4_NETCONF - 1)) | (1 << (RTNLGRP_IPV6_NETCONF - 1))
+    events = {RTM_NEWNETCONF: 'add', RTM_DELNETCONF: 'del'}
+
+    field_names = ['family', 'ifname', 'forwarding', 'rp_filter', 'mc_forwarding', 'proxy_neigh']
+    align = {'ifname': 'l'}
+    types = {'ifname': ifname_key}
+
+    names = {
+        NETCONFA_FORWARDING: 'forwarding',
+        NETCONFA_RP_FILTER: 'rp_filter',
+        NETCONFA_MC_FORWARDING: 'mc_forwarding',
+        NETCONFA_PROXY_NEIGH: 'proxy_neigh',
+    }
+
+    def decode(self, msg_type, msg):
+        view = memoryview(msg)
+        pos = NLMSGHDR.size
+        values = {'family': NETCONFMSG.unpack_from(view, pos)[0]}
+        for (attr, start, stop) in attrs(view, pos + NETCONFMSG.size, len(msg)):
+            if attr == NETCONFA_IFINDEX:
+                values['ifindex'] = I32.unpack_from(view, start)[0]
+            elif attr in self.names:
+                values[self.names[attr]] = I32.unpack_from(view, start)[0]
+
+        return values
+
+    def ifindex(self, values):
+        return values.get('ifindex')
+
+    def key(self, values):
+        return (values['family'], values.get('ifindex'))
+
+    def group(self, values):
+        return self.row(values)[1]
+
+    def row(self, values):
+        ifindex = values.get('ifindex')
+        if ifindex == -1:
+            ifname = 'all'
+        elif ifindex == -2:
+            ifname = 'default'
+        else:
+            ifname = self.ifname(ifindex)
+
+        return [
+            {AF_INET: 'ipv4', AF_INET6: 'ipv6'}.get(values['family'], str(values['family'])),
+            ifname,
+            *[str(values.get(name, '-')) for name in self.field_names[2:]],
+        ]
+
+# event columns of the monitor objects
+EVENT_COLUMNS = {
+    'address': RoshAddressEventColumns,
+    'interface': RoshLinkEventColumns,
+    'neigh': RoshNeighEventColumns,
+    'netconf': RoshNetconfEventColumns,
+    'prefix': RoshPrefixEventColumns,
+    'route': RoshRouteEventColumns,
+    'rule': RoshRuleEventColumns,
+}
+
+class RoshEventBatch():
+    '''
+    Events received during one refresh interval. Repeated events of the
+    same object (add/del of a prefix etc.) are coalesced into the last
+    event and the number of events, in the order the objects were seen
+    first.
+    '''
+    def __init__(self):
+        self.entries = {}
+        self.events = 0
+
+    def add(self, ts, cols, event, obj):
+        self.events += 1
+
+        key = (cols, cols.key(obj))
+        entry = self.entries.get(key)
+        if entry is None:
+            self.entries[key] = [ts, cols, event, obj, 1]
+        else:
+            entry[0] = ts
+            entry[2] = event
+            entry[3] = obj
+            entry[4] += 1
+
+    def values(self):
+        '''
+        Yields tuples of the time, the event columns, the event, the
+        object and the number of coalesced events.
+        '''
+        for entry in self.entries.values():
+            yield tuple(entry)
+
+    def __len__(self):
+        return self.events
+
+class RoshEventSummary():
+    '''
+    Event counters of one second by object, group (proto/table of
+    routes, interface) and event. The memory usage is bounded by the
+    number of groups, not by the number of events.
+    '''
+    field_names = ['time', 'object', 'group', 'events', 'add', 'del', 'change']
+    align = {'object': 'l', 'group': 'l', 'events': 'r', 'add': 'r', 'del': 'r', 'change': 'r'}
+    types = {'events': int_key, 'add': int_key, 'del': int_key, 'change': int_key}
+    width = {'object': 9, 'group': 16, 'events': 7, 'add': 7, 'del': 7, 'change': 7}
+
+    def __init__(self):
+        self.second = None
+        self.counts = {}
+        self.events = 0
+
+    def add(self, ts, cols, event, obj):
+        self.events += 1
+
+        key = (cols.name, cols.group(obj))
+        counts = self.counts.get(key)
+        if counts is None:
+            counts = self.counts[key] = {'add': 0, 'del': 0, 'change': 0}
+        counts[event] += 1
+
+    def rows(self, limit=SUMMARY_GROUPS):
+        '''
+        Returns the rows of the second: the groups with most events and
+        the sum of the other groups.
+        '''
+        ts = event_time(self.second)[:8]
+        groups = sorted(self.counts.items(), key=lambda item: sum(item[1].values()), reverse=True)
+
+        rows = []
+        for ((name, group), counts) in groups[:limit]:
+            rows.append([ts, name, group, sum(counts.values()), counts['add'], counts['del'], counts['change']])
+
+        other = {'add': 0, 'del': 0, 'change': 0}
+        for (key, counts) in groups[limit:]:
+            for (event, count) in counts.items():
+                other[event] += count
+        if groups[limit:]:
+            rows.append([ts, '-', f'({len(groups) - limit} more)', sum(other.values()), other['add'], other['del'], other['change']])
+
+        return rows
+
+    def reset(self, second):
+        self.second = second
+        self.counts = {}
+        self.events = 0
+
+def event_time(ts):
+    '''
+    Formats the receive time of an event (with milliseconds).
+    '''
+    return time.strftime('%H:%M:%S', time.localtime(ts)) + f'.{int(ts * 1000) % 1000:03d}'
@@ -0,0 +1,257 @@
+from array import array
+from collections import deque
+from threading import Event, Lock, Thread
+import time
+
+from pyroute2.netlink.rtnl import RTM_NEWLINK, RTM_DELLINK, RTM_NEWROUTE, RTM_DELROUTE
+
+from rosh.monitor import RCVBUF_SIZE, RoshEventSource, RoshLinkEventColumns, RoshRouteEventColumns
+
+
+# time window of the churn statistics (seconds), split into buckets which
+# are dropped as a whole when they leave the window
+CHURN_WINDOW = 300
+CHURN_BUCKETS = 5
+
+# size of the count-min sketches (counters per row, rows), the widths are
+# powers of two
+PREFIX_SKETCH_WIDTH = 65536
+LINK_SKETCH_WIDTH = 1024
+SKETCH_DEPTH = 4
+
+# candidates of the top lists kept per bucket
+TOP_PREFIXES = 64
+TOP_LINKS = 64
+
+# seconds between checks of the stop flag
+CHURN_INTERVAL = 0.5
+
+class RoshCountMinSketch():
+    '''
+    Count-min sketch: approximate counters of an unbounded number of keys
+    in `depth` rows of `width` counters. A key increments one counter per
+    row, its estimate is the smallest of them. Estimates are never too
+    small, collisions make them too large by about events/width.
+
+    The counters of a key are taken from separate bits of its hash, the
+    width is a power of two and depth * log2(width) must not exceed 64.
+    '''
+    def __init__(self, width, depth=SKETCH_DEPTH):
+        self.bits = width.bit_length() - 1
+        self.mask = width - 1
+        self.rows = [array('I', bytes(4 * width)) for _ in range(depth)]
+
+    def positions(self, key):
+        (bits, mask) = (self.bits, self.mask)
+        h = hash(key)
+        return [(h >> (bits * i)) & mask for i in range(len(self.rows))]
+
+    def add(self, key):
+        '''
+        Counts an event of a key, returns the new estimate of the key.
+        '''
+        estimate = None
+        for (row, pos) in zip(self.rows, self.positions(key)):
+            count = row[pos] = row[pos] + 1
+            if estimate is None or count < estimate:
+                estimate = count
+
+        return estimate
+
+    def estimate(self, key):
+        return min(row[pos] for (row, pos) in zip(self.rows, self.positions(key)))
+
+    def size(self):
+        return sum(row.itemsize * len(row) for row in self.rows)
+
+class RoshHeavyHitters():
+    '''
+    Keys with the most events: all keys are counted by a count-min
+    sketch, the `size` keys with the largest estimates are kept as
+    candidates of the top list. A key replaces the smallest candidate as
+    soon as its estimate is larger.
+    '''
+    def __init__(self, width, size):
+        self.sketch = RoshCountMinSketch(width)
+        self.size = size
+        self.top = {}
+
+    def add(self, key):
+        estimate = self.sketch.add(key)
+
+        top = self.top
+        if key in top or len(top) < self.size:
+            top[key] = estimate
+            return
+
+        # the estimates of the candidates grow, compare against the
+        # current smallest one
+        smallest = min(top, key=top.get)
+        if estimate > top[smallest]:
+            del top[smallest]
+            top[key] = estimate
+
+    def estimate(self, key):
+        return self.sketch.estimate(key)
+
+class RoshChurnBucket():
+    '''
+    Churn counters of one part of the time window.
+    '''
+    def __init__(self, epoch):
+        self.epoch = epoch
+
+        # (family, table, dst, dst_len) => events
+        self.prefixes = RoshHeavyHitters(PREFIX_SKETCH_WIDTH, TOP_PREFIXES)
+        # ifname => events / changes of the oper state to down
+        self.links = RoshHeavyHitters(LINK_SKETCH_WIDTH, TOP_LINKS)
+        self.bounces = RoshHeavyHitters(LINK_SKETCH_WIDTH, TOP_LINKS)
+        # proto => add/del/change counters (at most 256 protos)
+        self.protos = {}
+
+    def size(self):
+        return sum(hitters.sketch.size() for hitters in (self.prefixes, self.links, self.bounces))
+
+class RoshChurn():
+    '''
+    Route and link churn of a namespace, collected from the netlink events
+    by a background thread. The events are counted per prefix, interface
+    and proto in buckets of count-min sketches and top lists of fixed
+    size, the memory usage does not grow with the number of events or
+    the uptime.
+    '''
+    def __init__(self, ipr, rcvbuf=RCVBUF_SIZE):
+        self.routes = RoshRouteEventColumns(None)
+        self.links = RoshLinkEventColumns(None)
+        self.source = RoshEventSource(ipr, self.routes.groups | self.links.groups, rcvbuf)
+
+        self.span = CHURN_WINDOW // CHURN_BUCKETS
+        self.buckets = deque(maxlen=CHURN_BUCKETS)
+
+        # last oper state by ifindex, to detect bounces
+        self.opers = {
+            link['index']: link.get_attr('IFLA_OPERSTATE')
+            for link in ipr.get_links()
+        }
+
+        self.since = time.time()
+        self.lock = Lock()
+        self.stop = Event()
+        self.thread = Thread(target=self.collect, name='RoshChurn', daemon=True)
+        self.thread.start()
+
+    def collect(self):
+        try:
+            while not self.stop.is_set():
+                if self.source.wait(CHURN_INTERVAL):
+                    events = self.source.read()
+                    with self.lock:
+                        for (ts, msg_type, msg) in events:
+                            self.add(ts, msg_type, msg)
+        finally:
+            self.source.close()
+
+    def bucket(self, ts):
+        epoch = int(ts) // self.span
+        if not self.buckets or self.buckets[-1].epoch < epoch:
+            self.buckets.append(RoshChurnBucket(epoch))
+        return self.buckets[-1]
+
+    def add(self, ts, msg_type, msg):
+        if msg_type == RTM_NEWROUTE or msg_type == RTM_DELROUTE:
+            route = self.routes.decode(msg_type, msg)
+            bucket = self.bucket(ts)
+            bucket.prefixes.add((route.family, route.table, route.dst, route.dst_len))
+
+            counts = bucket.protos.get(route.proto)
+            if counts is None:
+                counts = bucket.protos[route.proto] = {'add': 0, 'del': 0, 'change': 0}
+            counts[self.routes.event(msg_type, msg)] += 1
+        elif msg_type == RTM_NEWLINK or msg_type == RTM_DELLINK:
+            link = self.links.decode(msg_type, msg)
+            ifname = link.get_attr('IFLA_IFNAME') or str(link['index'])
+            bucket = self.bucket(ts)
+            bucket.links.add(ifname)
+
+            if msg_type == RTM_DELLINK:
+                self.opers.pop(link['index'], None)
+                return
+
+            oper = link.get_attr('IFLA_OPERSTATE')
+            if self.opers.get(link['index']) == 'UP' and oper != 'UP':
+                bucket.bounces.add(ifname)
+            self.opers[link['index']] = oper
+
+    def window(self, now=None):
+        '''
+        Returns the buckets inside of the time window.
+        '''
+        epoch = int(now or time.time()) // self.span
+        return [bucket for bucket in self.buckets if bucket.epoch > epoch - CHURN_BUCKETS]
+
+    def top(self, attr, limit, now=None):
+        '''
+        Returns a list of tuples of the keys with most events in the time
+        window and their (estimated) number of events.
+        '''
+        with self.lock:
+            buckets = [getattr(bucket, attr) for bucket in self.window(now)]
+            keys = set()
+            for hitters in buckets:
+                keys.update(hitters.top)
+            counts = [(key, sum(hitters.estimate(key) for hitters in buckets)) for key in keys]
+
+        return sorted(counts, key=lambda item: item[1], reverse=True)[:limit]
+
+    def prefixes(self, limit, now=None):
+        return self.top('prefixes', limit, now)
+
+    def interfaces(self, limit, now=None):
+        '''
+        Returns a list of tuples of the interfaces with most bounces (or
+        events) in the time window, the bounces and the events.
+        '''
+        with self.lock:
+            buckets = self.window(now)
+            keys = set()
+            for bucket in buckets:
+                keys.update(bucket.links.top)
+                keys.update(bucket.bounces.top)
+            counts = [(
+                    key,
+                    sum(bucket.bounces.estimate(key) for bucket in buckets),
+                    sum(bucket.links.estimate(key) for bucket in buckets),
+                ) for key in keys]
+
+        return sorted(counts, key=lambda item: item[1:], reverse=True)[:limit]
+
+    def protos(self, now=None):
+        '''
+        Returns a dict of the add/del/change counters of the protos in the
+        time window.
+        '''
+        protos = {}
+        with self.lock:
+            for bucket in self.window(now):
+                for (proto, counts) in bucket.protos.items():
+                    total = protos.setdefault(proto, {'add': 0, 'del': 0, 'change': 0})
+                    for (event, count) in counts.items():
+                        total[event] += count
+
+        return protos
+
+    def stats(self):
+        with self.lock:
+            size = sum(bucket.size() for bucket in self.buckets)
+
+        return {
+            'since': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.since)),
+            'events': self.source.events,
+            'overflows': self.source.overflows,
+            'window': f'{CHURN_WINDOW}s',
+            'memory': f'{size // 1024} KiB',
+        }
+
+    def close(self):
+        self.stop.set()
+        self.thread.join()
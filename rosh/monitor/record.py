@@ -0,0 +1,185 @@
+import gzip
+import io
+import lzma
+import os
+import struct
+from threading import Event, Thread
+import time
+
+from rosh.monitor import READ_BUDGET, split_messages
+
+
+# file header of event logs
+LOG_MAGIC = b'ROSHNL\x00\x01'
+
+# record header: receive time and length of the datagram
+RECORD = struct.Struct('=dI')
+
+# write buffer of event logs (bytes)
+LOG_BUFFER = 1024 * 1024
+
+# seconds between flushes of the log file
+FLUSH_INTERVAL = 1.0
+
+# seconds between checks of the stop flag
+RECORD_INTERVAL = 0.2
+
+# seconds to let datagrams queue up in the receive buffer before they are
+# read, a wakeup per datagram costs more than writing it
+RECORD_DELAY = 0.01
+
+def open_log(filename, mode):
+    '''
+    Opens an event log for appending ('ab') or reading ('rb'), logs named
+    *.gz or *.xz are compressed.
+    '''
+    if filename.endswith('.gz'):
+        # fast compression, appending adds a gzip member
+        file = gzip.open(filename, mode, compresslevel=1)
+    elif filename.endswith('.xz'):
+        file = lzma.open(filename, mode, preset=0)
+    else:
+        return open(filename, mode, buffering=LOG_BUFFER)
+
+    if 'a' in mode:
+        return io.BufferedWriter(file, LOG_BUFFER)
+    return file
+
+class RoshEventRecorder():
+    '''
+    Appends the raw datagrams of an event source and their receive time
+    to an event log, written by a background thread. The messages are not
+    decoded while recording.
+    '''
+    def __init__(self, source, filename):
+        self.source = source
+        self.filename = filename
+
+        empty = not os.path.exists(filename) or os.path.getsize(filename) == 0
+        self.file = open_log(filename, 'ab')
+        if empty:
+            self.file.write(LOG_MAGIC)
+
+        # statistics
+        self.records = 0
+        self.bytes = 0
+
+        self.stop = Event()
+        self.thread = Thread(target=self.record, name='RoshRecorder', daemon=True)
+        self.thread.start()
+
+    def record(self):
+        write = self.file.write
+        flushed = time.monotonic()
+        try:
+            while not self.stop.is_set():
+                if self.source.wait(RECORD_INTERVAL):
+                    datagrams = self.source.recv()
+                    for (ts, data) in datagrams:
+                        write(RECORD.pack(ts, len(data)))
+                        write(data)
+                        self.records += 1
+                        self.bytes += len(data)
+
+                    if len(datagrams) < READ_BUDGET:
+                        time.sleep(RECORD_DELAY)
+
+                if time.monotonic() - flushed >= FLUSH_INTERVAL:
+                    self.file.flush()
+                    flushed = time.monotonic()
+        finally:
+            self.file.close()
+            self.source.close()
+
+    def close(self):
+        self.stop.set()
+        self.thread.join()
+
+class RoshEventReplay():
+    '''
+    Event source reading the datagrams of an event log, they are returned
+    at their recorded pace (`speed` times faster, at once if `speed` is
+    0). Raises ValueError if the file is no event log.
+    '''
+    # the kernel can not drop recorded events
+    overflows = 0
+
+    def __init__(self, filename, speed=1.0):
+        self.file = open_log(filename, 'rb')
+        try:
+            magic = self.file.read(len(LOG_MAGIC))
+        except (OSError, EOFError, lzma.LZMAError):
+            magic = None
+        if magic != LOG_MAGIC:
+            self.file.close()
+            raise ValueError(f'{filename} is no event log')
+
+        self.speed = speed
+        self.events = 0
+        self.done = False
+
+        self.next = self.read_record()
+        self.first = self.ts = self.next[0] if self.next else time.time()
+        self.start = time.monotonic()
+
+    def read_record(self):
+        '''
+        Returns the next record, None at the end of the log (a truncated
+        record is ignored).
+        '''
+        header = self.file.read(RECORD.size)
+        if len(header) < RECORD.size:
+            return None
+
+        (ts, length) = RECORD.unpack(header)
+        data = self.file.read(length)
+        if len(data) < length:
+            return None
+
+        return (ts, data)
+
+    def delay(self):
+        '''
+        Returns the seconds until the next record is due.
+        '''
+        if self.speed == 0:
+            return 0
+        return (self.next[0] - self.first) / self.speed - (time.monotonic() - self.start)
+
+    def wait(self, timeout):
+        if self.next is None:
+            return True
+
+        delay = self.delay()
+        if delay > timeout:
+            time.sleep(timeout)
+            return False
+
+        if delay > 0:
+            time.sleep(delay)
+        return True
+
+    def read(self):
+        events = []
+        for _ in range(READ_BUDGET):
+            if self.next is None or self.delay() > 0:
+                break
+
+            (self.ts, data) = self.next
+            events.extend((self.ts, msg_type, msg) for (msg_type, msg) in split_messages(data))
+            self.next = self.read_record()
+
+        if self.next is None:
+            self.done = True
+
+        self.events += len(events)
+        return events
+
+    def now(self):
+        '''
+        Returns the recorded time of the replay.
+        '''
+        return self.ts
+
+    def close(self):
+        self.file.close()
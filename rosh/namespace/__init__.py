@@ -0,0 +1,302 @@
+from collections import OrderedDict
+import os
+from threading import Event, Lock, Thread
+import time
+
+from pyroute2 import IPRoute, NetNS
+from pyroute2.netns import setns
+
+from rosh.dump import RoshDump
+from rosh.links import RoshLinkIndex
+from rosh.registry import netns_registry
+
+
+# maximum delay of closing idle handles (seconds)
+EXPIRE_INTERVAL = 10
+
+
+def in_netns(netns, func, *args, **kwargs):
+    '''
+    Calls `func` in a short-lived thread moved into the netns namespace
+    (setns only changes the namespace of the calling thread), sockets
+    created by `func` stay bound to the namespace.
+    '''
+    result = {}
+
+    def _run():
+        try:
+            setns(netns, flags=0)
+            result['value'] = func(*args, **kwargs)
+        except Exception as err:
+            result['error'] = err
+
+    thread = Thread(target=_run, name='RoshNetNS', daemon=True)
+    thread.start()
+    thread.join()
+
+    if 'error' in result:
+        raise result['error']
+
+    return result['value']
+
+def netns_id(name):
+    '''
+    Returns the device and inode of the netns file of a namespace (None
+    if it does not exist). A namespace deleted and created again with the
+    same name has another inode.
+    '''
+    try:
+        st = os.stat(os.path.join(netns_registry.path, name))
+    except OSError:
+        return None
+
+    return (st.st_dev, st.st_ino)
+
+class RoshNetNSRoute(IPRoute):
+    '''
+    IPRoute using a netlink socket opened inside a netns namespace. Unlike
+    pyroute2's NetNS there is no proxy process, the messages are not
+    passed through a pipe.
+    '''
+    def __init__(self, netns, **kwargs):
+        self.netns = netns
+        in_netns(netns, super().__init__, **kwargs)
+
+    def clone(self):
+        return type(self)(self.netns, **self.config)
+
+    def bind(self, *args, **kwargs):
+        # a failed bind (port in use) recreates the socket, this has to
+        # happen inside the namespace, too
+        return in_netns(self.netns, super().bind, *args, **kwargs)
+
+def open_netns(name, mode='socket'):
+    '''
+    Opens a netns namespace: an IPRoute using a socket opened inside the
+    namespace (`socket`) or a pyroute2 NetNS proxy (`proxy`).
+    '''
+    if mode == 'proxy':
+        return NetNS(name)
+
+    return RoshNetNSRoute(name)
+
+class RoshNamespace():
+    '''
+    State of a network namespace: the IPRoute or NetNS instance, its link
+    index, dump helper, mirrors and churn statistics.
+    '''
+    def __init__(self, ipr):
+        self.ipr = ipr
+        self.name = getattr(ipr, 'netns', None)
+        # identity of the namespace, to detect a replaced netns file
+        self.id = netns_id(self.name) if self.name else None
+
+        self.links = RoshLinkIndex(ipr)
+        self.dump = RoshDump(ipr)
+        self.mirrors = {}
+        self.churn = None
+
+    def mirror(self, name):
+        '''
+        Get the in-memory mirror (addresses, neighbours or routes) of the
+        namespace, it is created on first use.
+        '''
+        mirror = self.mirrors.get(name)
+        if mirror is None:
+            from rosh.mirror import MIRRORS
+
+            mirror = self.mirrors[name] = MIRRORS[name](self.ipr)
+
+        return mirror
+
+    def get_churn(self, rcvbuf):
+        '''
+        Get the churn statistics of the namespace, they are collected from
+        the first use until the namespace is closed.
+        '''
+        if self.churn is None:
+            from rosh.monitor.churn import RoshChurn
+
+            self.churn = RoshChurn(self.ipr, rcvbuf)
+
+        return self.churn
+
+    def close(self, ipr=False):
+        '''
+        Closes the sockets of the link index, dumps and mirrors (and the
+        IPRoute or NetNS instance if `ipr` is set).
+        '''
+        self.links.close()
+        self.dump.close()
+
+        for mirror in self.mirrors.values():
+            mirror.close()
+        self.mirrors = {}
+
+        if self.churn is not None:
+            self.churn.close()
+            self.churn = None
+
+        if ipr:
+            self.ipr.close()
+
+class RoshNamespacePool():
+    '''
+    LRU pool of namespace handles (RoshNamespace), keyed by the netns name
+    (None for the main namespace). Switching back to a pooled namespace
+    reuses its NetNS instance, link index and mirrors.
+
+    At most `size` handles are kept, the least recently used one is
+    closed if the pool is full. Handles which have not been used for
+    `timeout` seconds are closed by a background thread. The main
+    namespace, the current namespace and namespaces collecting churn
+    statistics are never expired.
+
+    Handles of namespaces which have been deleted are closed by the
+    background thread, too (except the current one). A handle whose
+    netns file has been replaced (namespace deleted and created again)
+    is opened again when it is used.
+    '''
+    def __init__(self, size=8, timeout=300, mode='socket'):
+        self.size = size
+        self.timeout = timeout
+        self.mode = mode
+
+        self.handles = OrderedDict()
+        self.used = {}
+        self.current = None
+        self.lock = Lock()
+        self.stop = Event()
+        self.expirer = None
+
+        # statistics
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self.expired = 0
+        self.stale = 0
+
+    def get(self, name=None):
+        '''
+        Get the handle of a namespace (opened if not pooled), it becomes
+        the current namespace.
+        '''
+        stale = []
+        with self.lock:
+            namespace = self.handles.get(name)
+            if namespace is not None and name is not None and namespace.id != netns_id(name):
+                # the netns file has been replaced, the handle refers to
+                # the old namespace
+                stale.append(self.handles.pop(name))
+                del self.used[name]
+                self.stale += 1
+                namespace = None
+
+            if namespace is None:
+                self.misses += 1
+                namespace = self.handles[name] = RoshNamespace(open_netns(name, self.mode) if name else IPRoute())
+            else:
+                self.hits += 1
+                self.handles.move_to_end(name)
+
+            self.used[name] = time.monotonic()
+            self.current = name
+
+            evicted = self.evict()
+
+        for handle in stale + evicted:
+            handle.close(ipr=True)
+
+        if self.expirer is None:
+            self.expirer = Thread(target=self.expire_loop, name='RoshNamespacePool', daemon=True)
+            self.expirer.start()
+
+        return namespace
+
+    def holds(self, namespace):
+        return self.handles.get(namespace.name) is namespace
+
+    def evict(self):
+        '''
+        Removes the least recently used handles if the pool is full,
+        returns the removed handles (lock must be held).
+        '''
+        evicted = []
+        for name in list(self.handles):
+            if len(self.handles) <= self.size:
+                break
+
+            if name is None or name == self.current:
+                continue
+
+            evicted.append(self.handles.pop(name))
+            del self.used[name]
+            self.evicted += 1
+
+        return evicted
+
+    def expire(self):
+        '''
+        Closes the handles which have been idle for `timeout` seconds and
+        the handles of deleted namespaces.
+        '''
+        # handles are not expired if the timeout is 0
+        deadline = time.monotonic() - self.timeout if self.timeout > 0 else None
+        names = set(netns_registry.names())
+        expired = []
+        with self.lock:
+            for name in list(self.handles):
+                namespace = self.handles[name]
+                if name is None or name == self.current:
+                    continue
+
+                if name in names and (namespace.churn is not None or deadline is None or self.used[name] > deadline):
+                    continue
+
+                expired.append(self.handles.pop(name))
+                del self.used[name]
+                if name in names:
+                    self.expired += 1
+                else:
+                    self.stale += 1
+
+        for handle in expired:
+            handle.close(ipr=True)
+
+    def expire_loop(self):
+        while not self.stop.wait(min(self.timeout, EXPIRE_INTERVAL) if self.timeout > 0 else EXPIRE_INTERVAL):
+            self.expire()
+
+    def stats(self):
+        '''
+        Returns a list of (name, idle seconds) of the pooled handles (most
+        recently used first) and the counters.
+        '''
+        now = time.monotonic()
+        with self.lock:
+            handles = [(name, now - self.used[name]) for name in reversed(self.handles)]
+
+        lookups = self.hits + self.misses
+        return (handles, {
+            'size': len(handles),
+            'max': self.size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit rate': f'{100 * self.hits / lookups:.1f}%' if lookups else '-',
+            'evicted': self.evicted,
+            'expired': self.expired,
+            'stale': self.stale,
+        })
+
+    def close(self):
+        '''
+        Closes all handles.
+        '''
+        self.stop.set()
+        with self.lock:
+            handles = list(self.handles.values())
+            self.handles.clear()
+            self.used.clear()
+
+        for handle in handles:
+            handle.close(ipr=True)
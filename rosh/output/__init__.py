@@ -1,2 +1,3 @@
 from rosh.output.details import RoshOutputDetails
 from rosh.output.table import RoshOutputTable
+from rosh.output.stream import RoshOutputStream
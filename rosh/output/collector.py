@@ -0,0 +1,26 @@
+class RoshOutputCollector():
+    '''
+    Pseudo filter which redirects the rows of the tables of a command to
+    `add_table(tbl)`, which returns the function receiving the rows. It
+    is used to merge the tables of a command run in several namespaces.
+    '''
+    combine = all
+
+    def __init__(self, add_table):
+        self.add_table = add_table
+
+    def match(self, item):
+        return True
+
+    def matcher(self):
+        return None
+
+def get_collector(filters):
+    '''
+    Returns the output collector of the filters (if any).
+    '''
+    for flt in filters or []:
+        if isinstance(flt, RoshOutputCollector):
+            return flt
+
+    return None
@@ -0,0 +1,100 @@
+import re
+from socket import AF_INET, AF_INET6, inet_pton
+from struct import Struct
+
+
+# sort keys of column values, the key of a row is computed once when the
+# row is added to a table
+
+_digits = re.compile(r'(\d+)')
+
+# natural keys of repeated values (interface names etc.)
+_natural_keys = {}
+NATURAL_CACHE_SIZE = 4096
+
+def natural_key(value):
+    '''
+    Natural sort key (eth2 < eth10), used by columns without a type.
+    '''
+    value = str(value)
+    key = _natural_keys.get(value)
+    if key is None:
+        # keep the memory usage bounded
+        if len(_natural_keys) >= NATURAL_CACHE_SIZE:
+            _natural_keys.clear()
+
+        key = _natural_keys[value] = tuple(
+            int(part) if i & 1 else part
+            for (i, part) in enumerate(_digits.split(value))
+        )
+    return key
+
+# interface names are sorted naturally
+ifname_key = natural_key
+
+def int_key(value):
+    '''
+    Integer sort key, values which are not numbers ('-') sort first.
+    '''
+    if isinstance(value, int):
+        return value
+
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return -1
+
+_lengths = {str(length): length for length in range(129)}
+_unpack_ipv4 = Struct('!I').unpack
+
+def prefix_key(value):
+    '''
+    Sort key of addresses and prefixes (addr/len): a single number of the
+    address and the prefix length, IPv4 sorts before IPv6 and values
+    which are not addresses sort first.
+
+    IPv4 keys are floats (exact below 2**53), lists of floats are sorted
+    much faster than lists of large integers.
+    '''
+    (addr, sep, length) = str(value).partition('/')
+    try:
+        if ':' in addr:
+            return (1 << 136) | (int.from_bytes(inet_pton(AF_INET6, addr), 'big') << 8) | (_lengths[length] if sep else 128)
+        return _unpack_ipv4(inet_pton(AF_INET, addr))[0] * 256.0 + (_lengths[length] if sep else 32)
+    except (OSError, KeyError):
+        return -1
+
+def find_column(field_names, column):
+    '''
+    Returns the name of a column of a table, the name may be abbreviated.
+    Raises ValueError if the column is unknown or ambiguous.
+    '''
+    names = [name for name in field_names if name.lower() == column.lower()]
+    if not names:
+        names = [name for name in field_names if name.lower().startswith(column.lower())]
+    if len(names) != 1:
+        raise ValueError(f'column "{column}" is {"ambiguous" if names else "unknown"}')
+
+    return names[0]
+
+def get_sortby(filters, field_names, sortby=None):
+    '''
+    Returns the sort column and order of a table: the column of the last
+    sort filter of the command line (names may be abbreviated) or the
+    default `sortby` of the table.
+    '''
+    if not sortby in field_names:
+        sortby = None
+
+    reverse = False
+    for flt in filters or []:
+        column = getattr(flt, 'sortby', None)
+        if column is None:
+            continue
+
+        try:
+            (sortby, reverse) = (find_column(field_names, column), flt.reverse)
+        except ValueError as err:
+            print(f'ERR: sort {err}')
+
+    return (sortby, reverse)
@@ -0,0 +1,79 @@
+from rosh.output.columns import find_column
+
+
+class RoshOutputStop(Exception):
+    '''
+    Raised by a table when no more rows are wanted (`head`), the command
+    line stops the command. The table has been closed already.
+    '''
+
+class RoshStage():
+    '''
+    Base class of structured pipe stages: filters working on the rows of
+    a table, they know its columns. Stages are created per table and
+    chained in the order of the command line, the last stage passes the
+    rows to the table.
+    '''
+    # the stage follows a sort filter, the table sorts the rows later
+    after_sort = False
+
+    def bind(self, tbl, emit):
+        self.tbl = tbl
+        self.emit = emit
+
+    def column(self, column):
+        '''
+        Returns the index of a (possibly abbreviated) column.
+        '''
+        return self.tbl.field_names.index(find_column(self.tbl.field_names, column))
+
+    def push(self, row):
+        self.emit(row)
+
+    def flush(self):
+        '''
+        Passes pending rows when the table is closed.
+        '''
+        pass
+
+class RoshOutputPipeline():
+    '''
+    The pipe stages of a table.
+    '''
+    def __init__(self, stages):
+        self.stages = stages
+        self.push = None
+
+    def bind(self, tbl, emit):
+        for stage in reversed(self.stages):
+            stage.bind(tbl, emit)
+            emit = stage.push
+        self.push = emit
+
+    def flush(self):
+        for stage in self.stages:
+            stage.flush()
+
+def get_pipeline(tbl, filters, emit):
+    '''
+    Returns the pipeline of the stage filters (if any), the rows leaving
+    the pipeline are passed to `emit`.
+    '''
+    stages = []
+    after_sort = False
+    for flt in filters or []:
+        if getattr(flt, 'sortby', None) is not None:
+            after_sort = True
+
+        stage = getattr(flt, 'stage', None)
+        if stage is not None:
+            stages.append(stage())
+            stages[-1].after_sort = after_sort
+
+    if not stages:
+        return None
+
+    pipeline = RoshOutputPipeline(stages)
+    pipeline.bind(tbl, emit)
+
+    return pipeline
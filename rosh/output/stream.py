@@ -0,0 +1,285 @@
+import heapq
+from itertools import repeat
+from operator import itemgetter
+import pickle
+import sys
+from tempfile import TemporaryFile
+
+from rosh.output.collector import get_collector
+from rosh.output.columns import get_sortby, natural_key
+from rosh.output.pipeline import get_pipeline, RoshOutputStop
+
+
+class RoshOutputStream():
+    '''
+    Table output which is written while the rows arrive, so the memory
+    usage does not depend on the number of rows. The layout matches
+    RoshOutputTable.
+
+    The column widths are computed from the first `sample` rows (unless
+    set in `width`), later rows with wider values are not truncated.
+
+    If `sortby` is set (or a sort filter is given), the rows are sorted in
+    memory, tables with more than `chunk` rows are sorted in runs which
+    are spilled to temporary files (pickled in blocks of `block` rows)
+    and merged when the table is closed (external merge sort). Sorted
+    tables use exact column widths, which are computed per run. The sort
+    key of a row is computed once by the key function of the column in
+    `types` (natural sort by default).
+
+    Rows are written in blocks of `sample` rows.
+
+    Structured pipe stages (where, uniq, head, ...) get the rows before
+    they are sorted or written, `limit` caps the number of written rows.
+    '''
+    def __init__(self, filters=None, file=None, sample=1000, chunk=1000000, block=10000):
+        self.field_names = []
+        self.align = {}
+        self.width = {}
+        self.types = {}
+        self.sortby = None
+        self.limit = None
+
+        self.filters = filters
+        self.sortkey = None
+        self.sortindex = None
+        self.reverse = False
+
+        # rows are passed to an output collector
+        self.collect = None
+
+        # rows are passed to the pipe stages
+        self.pipeline = None
+
+        self.file = file
+        self.sample = sample
+        self.chunk = chunk
+        self.block = block
+
+        self.rows = []
+        self.runs = []
+        self.widths = None
+        self.justs = None
+        self.pending = []
+        self.count = 0
+        self.started = False
+        self.closed = False
+
+    def start(self):
+        '''
+        Sets up the pipe stages when the first row is added.
+        '''
+        collector = get_collector(self.filters)
+        if collector is not None:
+            self.collect = collector.add_table(self)
+            return
+
+        self.pipeline = get_pipeline(self, self.filters, self.put_row)
+
+    def start_sort(self):
+        '''
+        Resolves the sort column when the first row leaves the pipe
+        stages (they may change the columns).
+        '''
+        (self.sortby, self.reverse) = get_sortby(self.filters, self.field_names, self.sortby)
+        if self.sortby is not None:
+            self.sortindex = self.field_names.index(self.sortby)
+            self.sortkey = self.types.get(self.sortby, natural_key)
+
+    def add_row(self, row):
+        if not self.started:
+            self.started = True
+            self.start()
+
+        if self.collect is not None:
+            self.collect(row)
+            return
+
+        if self.pipeline is not None:
+            self.pipeline.push(row)
+            return
+
+        self.put_row(row)
+
+    def put_row(self, row):
+        if self.count == 0:
+            self.start_sort()
+        self.count += 1
+
+        if self.sortby is None:
+            if self.limit is not None and self.count > self.limit:
+                return
+
+            row = tuple(map(str, row))
+            if self.widths is None:
+                self.rows.append(row)
+                if len(self.rows) >= self.sample:
+                    self.flush()
+            else:
+                self.write_row(row)
+            return
+
+        key = self.sortkey(row[self.sortindex])
+        row = tuple(map(str, row))
+        if self.limit is not None:
+            # only the first `limit` rows are kept
+            self.rows.append((key, row))
+            if len(self.rows) >= max(self.chunk, 2 * self.limit):
+                self.prune()
+            return
+
+        self.rows.append((key, row))
+        if len(self.rows) > self.chunk:
+            self.spill()
+
+    def update_widths(self, rows):
+        '''
+        Widens the columns to the values of `rows`.
+        '''
+        if self.widths is None:
+            self.widths = [
+                self.width.get(name, len(name))
+                for name in self.field_names
+            ]
+
+        if not rows:
+            return
+
+        widths = self.widths
+        for (i, name) in enumerate(self.field_names):
+            if not name in self.width:
+                widths[i] = max(widths[i], max(map(len, map(itemgetter(i), rows))))
+
+    def spill(self):
+        '''
+        Sorts the buffered rows and writes them into a temporary file.
+        '''
+        self.update_widths(list(map(itemgetter(1), self.rows)))
+        self.rows.sort(key=itemgetter(0), reverse=self.reverse)
+
+        fp = TemporaryFile()
+        pickler = pickle.Pickler(fp, pickle.HIGHEST_PROTOCOL)
+        for i in range(0, len(self.rows), self.block):
+            pickler.dump(self.rows[i:i + self.block])
+        fp.seek(0)
+
+        self.runs.append(fp)
+        self.rows = []
+
+    def prune(self):
+        '''
+        Drops the buffered rows which are not written due to `limit`.
+        '''
+        select = heapq.nlargest if self.reverse else heapq.nsmallest
+        self.rows = select(self.limit, self.rows, key=itemgetter(0))
+
+    def read_run(self, fp):
+        unpickler = pickle.Unpickler(fp)
+        while True:
+            try:
+                yield from unpickler.load()
+            except EOFError:
+                return
+
+    def flush(self):
+        '''
+        Fixes the column widths and writes the header and the
+        buffered rows.
+        '''
+        self.update_widths(self.rows)
+
+        self.write_header()
+        for row in self.rows:
+            self.write_row(row)
+        self.rows = []
+
+    def write_header(self):
+        justs = {'l': str.ljust, 'r': str.rjust}
+        self.justs = [justs.get(self.align.get(name), str.center) for name in self.field_names]
+        self.write_row([name.upper() for name in self.field_names])
+        self.write_pending()
+        self.write('+'.join('-' * (width + 2) for width in self.widths) + '\n')
+
+    def write_row(self, row):
+        self.pending.append(row)
+        if len(self.pending) >= self.sample:
+            self.write_pending()
+
+    def write_pending(self):
+        '''
+        Writes the pending rows, the cells are justified column by column.
+        '''
+        if not self.pending:
+            return
+
+        rows = self.pending
+        self.pending = []
+        columns = [
+            map(just, map(itemgetter(i), rows), repeat(width))
+            for (i, (just, width)) in enumerate(zip(self.justs, self.widths))
+        ]
+        self.write(''.join(map(' {}  \n'.format, map(' | '.join, zip(*columns)))))
+
+    def write(self, text):
+        (self.file or sys.stdout).write(text)
+
+    def set_columns(self, field_names):
+        '''
+        Replaces the columns of the table before rows are added (pipe
+        stages changing the columns).
+        '''
+        self.field_names = field_names
+
+    def stop(self):
+        '''
+        Closes the table and stops the command, no more rows are wanted.
+        '''
+        self.close()
+        raise RoshOutputStop()
+
+    def close(self):
+        '''
+        Writes all pending rows.
+        '''
+        if self.closed or self.collect is not None:
+            return
+        self.closed = True
+
+        if self.pipeline is not None:
+            self.pipeline.flush()
+
+        # empty tables are not printed (like RoshOutputTable)
+        if self.count == 0:
+            self.write('\n')
+            return
+
+        if self.sortby is None:
+            if self.widths is None:
+                self.flush()
+        else:
+            if self.runs:
+                self.spill()
+                rows = heapq.merge(*[self.read_run(fp) for fp in self.runs], key=itemgetter(0), reverse=self.reverse)
+            else:
+                self.rows.sort(key=itemgetter(0), reverse=self.reverse)
+                if self.limit is not None:
+                    self.rows = self.rows[:self.limit]
+                rows = self.rows
+                self.update_widths(list(map(itemgetter(1), rows)))
+
+            self.write_header()
+            for (key, row) in rows:
+                self.write_row(row)
+
+        self.write_pending()
+        self.discard()
+
+    def discard(self):
+        '''
+        Drops pending rows and temporary files.
+        '''
+        for fp in self.runs:
+            fp.close()
+        self.runs = []
+        self.rows = []
+        self.pending = []
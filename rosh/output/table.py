@@ -1,10 +1,93 @@
 from prettytable import PrettyTable
 
+from rosh.output.collector import get_collector
+from rosh.output.columns import get_sortby, natural_key
+from rosh.output.pipeline import get_pipeline
+
 
 class RoshOutputTable(PrettyTable):
-    def __init__(self):
+    '''
+    PrettyTable using the rosh table style. Sorting uses the key
+    functions of the columns in `types` (natural sort by default) and
+    the sort filter of the command line. Structured pipe stages get the
+    rows before they are added, `limit` caps the number of printed rows.
+    '''
+    def __init__(self, filters=None):
         super().__init__(
             header_style='upper',
             border=False,
             preserve_internal_border=True
         )
+        self.types = {}
+        self.filters = filters
+        self.limit = None
+
+        # rows are passed to an output collector
+        self.collector = get_collector(filters)
+        self.collect = None
+
+        # rows are passed to the pipe stages
+        self.pipeline = None
+        self.started = False
+        self.stopped = False
+
+    def add_row(self, row, *args, **kwargs):
+        if self.collector is not None:
+            if self.collect is None:
+                self.collect = self.collector.add_table(self)
+            self.collect(row)
+            return
+
+        if not self.started:
+            self.started = True
+            self.pipeline = get_pipeline(self, self.filters, self.put_row)
+
+        if self.stopped:
+            return
+
+        if self.pipeline is not None:
+            self.pipeline.push(row)
+            return
+
+        self.put_row(row)
+
+    def put_row(self, row):
+        super().add_row(row)
+
+    def stop(self):
+        '''
+        No more rows are wanted, the table is printed by the command.
+        '''
+        self.stopped = True
+
+    def set_columns(self, field_names):
+        '''
+        Replaces the columns of the table before rows are added (pipe
+        stages changing the columns).
+        '''
+        self.clear()
+        self.field_names = field_names
+
+    def get_string(self, **kwargs):
+        if self.collector is not None:
+            return ''
+
+        if self.pipeline is not None:
+            pipeline = self.pipeline
+            self.pipeline = None
+            pipeline.flush()
+
+        if self.limit is not None:
+            kwargs.setdefault('end', self.limit)
+
+        (sortby, reverse) = get_sortby(self.filters, self.field_names, kwargs.get('sortby', self.sortby))
+        if sortby is not None:
+            key = self.types.get(sortby, natural_key)
+            kwargs['sortby'] = sortby
+            kwargs['reversesort'] = reverse
+            kwargs['sort_key'] = lambda row: key(row[0])
+        else:
+            # the default sort column may be gone (uniq)
+            kwargs['sortby'] = None
+
+        return super().get_string(**kwargs)
@@ -0,0 +1,163 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import shlex
+from threading import Lock
+import time
+
+from pyroute2.netns import NETNS_RUN_DIR
+
+
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+
+WATCH_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF
+
+# seconds until the directory is scanned again if it cannot be watched
+NETNS_TTL = 5
+
+class RoshNetnsRegistry():
+    '''
+    In-memory list of the netns namespaces (the files in the netns run
+    directory). The directory is watched using inotify, so it is only
+    scanned again after a namespace has been added or removed. Checking
+    for changes is a single non-blocking read of the inotify fd.
+
+    If inotify is not available (or the directory does not exist yet)
+    the directory is scanned again after `ttl` seconds.
+    '''
+    def __init__(self, path=NETNS_RUN_DIR, ttl=NETNS_TTL):
+        self.path = path
+        self.ttl = ttl
+        self.lock = Lock()
+
+        self.fd = None
+        self.wd = None
+        self.dir_id = None
+        self.libc = None
+
+        self._names = None
+        self._quoted = []
+        self._set = frozenset()
+        self.scanned = 0
+
+        # statistics
+        self.scans = 0
+
+    def watch(self):
+        '''
+        Adds the inotify watch of the directory, returns False if it is
+        not available.
+        '''
+        try:
+            if self.fd is None:
+                self.libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+                fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+                if fd < 0:
+                    return False
+                self.fd = fd
+
+            # the directory may get replaced by a mount (ip netns)
+            st = os.stat(self.path)
+            self.dir_id = (st.st_dev, st.st_ino)
+
+            wd = self.libc.inotify_add_watch(self.fd, self.path.encode(), WATCH_MASK)
+        except (OSError, AttributeError):
+            return False
+
+        if wd < 0:
+            return False
+        self.wd = wd
+
+        return True
+
+    def changed(self):
+        '''
+        Checks if the directory has changed since the last scan.
+        '''
+        # not watched: scan (and try to watch) again after ttl seconds
+        if self.wd is None:
+            if time.monotonic() - self.scanned <= self.ttl:
+                return False
+            self.watch()
+            return True
+
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            self.wd = None
+            return True
+
+        if (st.st_dev, st.st_ino) != self.dir_id:
+            self.libc.inotify_rm_watch(self.fd, self.wd)
+            self.wd = None
+            return True
+
+        # drain all pending events
+        changed = False
+        while True:
+            try:
+                if not os.read(self.fd, 4096):
+                    break
+                changed = True
+            except OSError as err:
+                if err.errno != errno.EAGAIN:
+                    self.wd = None
+                    changed = True
+                break
+
+        return changed
+
+    def scan(self):
+        try:
+            names = sorted(os.listdir(self.path))
+        except OSError:
+            names = []
+
+        self._names = names
+        self._quoted = [shlex.quote(name) for name in names]
+        self._set = frozenset(names)
+        self.scanned = time.monotonic()
+        self.scans += 1
+
+    def refresh(self):
+        with self.lock:
+            if self._names is None:
+                self.watch()
+                self.scan()
+            elif self.changed():
+                self.scan()
+
+    def names(self):
+        '''
+        Get the sorted list of namespace names.
+        '''
+        self.refresh()
+        return self._names
+
+    def quoted(self):
+        '''
+        Get the sorted list of shell quoted namespace names (completion).
+        '''
+        self.refresh()
+        return self._quoted
+
+    def exists(self, name):
+        self.refresh()
+        return name in self._set
+
+    def close(self):
+        with self.lock:
+            if self.fd is not None:
+                os.close(self.fd)
+            self.fd = None
+            self.wd = None
+
+netns_registry = RoshNetnsRegistry()
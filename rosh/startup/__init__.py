@@ -0,0 +1,108 @@
+import os
+import re
+import subprocess
+import sys
+import time
+
+
+# child process: time from interpreter startup to the first prompt, it is
+# reported on a pipe (stderr is interleaved with the importtime lines of
+# other threads)
+PROBE_CODE = '''
+import time
+t_start = time.perf_counter()
+import sys
+import rosh.startup
+rosh.startup.probe(t_start, sys.argv[1], int(sys.argv[2]))
+'''
+
+class RoshStartupProfile():
+    '''
+    Profiles the startup of the interactive shell in a child process
+    (`python -X importtime`) and reports the per-module import time and
+    the time to the first prompt.
+    '''
+    def __init__(self, config_file, budget=None, limit=25):
+        self.config_file = config_file
+        self.budget = budget
+        self.limit = limit
+
+        self.imports = []
+        self.first_prompt = None
+        self.wall_time = None
+
+    def run(self):
+        (rfd, wfd) = os.pipe()
+        try:
+            t_start = time.perf_counter()
+            p = subprocess.run(
+                [sys.executable, '-X', 'importtime', '-c', PROBE_CODE, self.config_file, str(wfd)],
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+                pass_fds=(wfd, ),
+                text=True
+            )
+            self.wall_time = time.perf_counter() - t_start
+        finally:
+            os.close(wfd)
+
+        with os.fdopen(rfd) as marker:
+            self.parse(p.stderr, marker.read())
+
+        if self.first_prompt is None:
+            raise RuntimeError('startup probe failed:\n{}'.format(
+                '\n'.join(l for l in p.stderr.splitlines() if not l.startswith('import time:'))))
+
+    def parse(self, output, marker):
+        for line in output.splitlines():
+            m = re.match(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$', line)
+            if m:
+                self.imports.append((m.group(4), int(m.group(1)), int(m.group(2)), len(m.group(3))))
+
+        m = re.match(r'^rosh-startup: (\d+)$', marker.strip())
+        if m:
+            self.first_prompt = int(m.group(1))
+
+    def report(self):
+        from rosh.output import RoshOutputTable
+
+        tbl = RoshOutputTable()
+        tbl.field_names = ['module', 'self', 'cumulative']
+        tbl.align['module'] = 'l'
+        tbl.align['self'] = 'r'
+        tbl.align['cumulative'] = 'r'
+
+        for (module, us_self, us_cumulative, level) in sorted(self.imports, key=lambda x: x[2], reverse=True)[:self.limit]:
+            tbl.add_row([
+                '{}{}'.format(' ' * level, module),
+                '{:.1f}ms'.format(us_self / 1000),
+                '{:.1f}ms'.format(us_cumulative / 1000),
+            ])
+        print(tbl)
+        print()
+
+        print('modules imported:     {}'.format(len(self.imports)))
+        print('time to first prompt: {:.1f}ms'.format(self.first_prompt / 1000))
+        print('process wall time:    {:.1f}ms'.format(self.wall_time * 1000))
+
+        if self.budget is not None:
+            print('startup budget:       {:.1f}ms'.format(self.budget))
+
+    def within_budget(self):
+        if self.budget is None:
+            return True
+
+        return self.first_prompt / 1000 <= self.budget
+
+def probe(t_start, config_file, fd):
+    '''
+    Runs the shell startup up to the first prompt and reports the
+    elapsed time on the pipe `fd` (a single write).
+    '''
+    from rosh import Rosh
+
+    rosh = Rosh(config_file)
+    rosh.init_session()
+
+    os.write(fd, 'rosh-startup: {}\n'.format(int((time.perf_counter() - t_start) * 1000000)).encode())
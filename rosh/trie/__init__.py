@@ -0,0 +1,257 @@
+from itertools import chain
+from socket import AF_INET6, inet_ntop, inet_pton
+
+from rosh.decoder import ADDR_SIZE, compressed
+
+
+class RoshTrieNode():
+    __slots__ = ('key', 'length', 'values', 'children')
+
+    def __init__(self, key, length, values=None):
+        self.key = key
+        self.length = length
+        self.values = values
+        self.children = [None, None]
+
+class RoshPrefixTrie():
+    '''
+    Path compressed binary (Patricia) trie of the prefixes of one address
+    family. Prefixes are integers aligned to the address width, each
+    prefix node keeps the list of values (routes) inserted for it.
+
+    Lookups walk at most one node per prefix bit, so they are O(prefix
+    length) and do not depend on the number of prefixes.
+    '''
+    def __init__(self, family):
+        self.family = family
+        self.size = ADDR_SIZE[family]
+        self.bits = self.size * 8
+        self.default = '::' if family == AF_INET6 else '0.0.0.0'
+        self.root = RoshTrieNode(0, 0)
+        self.count = 0
+
+    def to_int(self, addr):
+        return int.from_bytes(inet_pton(self.family, addr), 'big')
+
+    def to_str(self, key):
+        return compressed(inet_ntop(self.family, key.to_bytes(self.size, 'big')))
+
+    def parse(self, prefix):
+        '''
+        Converts a prefix string (addr/len or addr) into a key tuple.
+        '''
+        (addr, sep, length) = prefix.partition('/')
+        return (self.to_int(addr), int(length) if sep else self.bits)
+
+    def route_prefix(self, route):
+        '''
+        Returns the key and the length of the prefix of a route record.
+        '''
+        return (self.to_int(route.dst or self.default), route.dst_len)
+
+    def format(self, key, length):
+        return f'{self.to_str(key)}/{length}'
+
+    def bit(self, key, pos):
+        return (key >> (self.bits - 1 - pos)) & 1
+
+    def common(self, a, b, length):
+        '''
+        Length of the common prefix of two keys, up to length bits.
+        '''
+        return min(length, self.bits - (a ^ b).bit_length())
+
+    def covers(self, node, key):
+        return (node.key ^ key) >> (self.bits - node.length) == 0 if node.length else True
+
+    def insert(self, key, length, value):
+        # the bit operations are inlined, this is the hot path of
+        # building tries of large route tables
+        bits = self.bits
+        node = self.root
+        self.count += 1
+
+        while True:
+            if node.length == length:
+                if node.values is None:
+                    node.values = []
+                node.values.append(value)
+                return
+
+            bit = (key >> (bits - 1 - node.length)) & 1
+            child = node.children[bit]
+            if child is None:
+                node.children[bit] = RoshTrieNode(key, length, [value])
+                return
+
+            common = min(child.length, length, bits - (child.key ^ key).bit_length())
+            if common == child.length:
+                node = child
+                continue
+
+            if common == length:
+                # the new prefix covers the child
+                new = RoshTrieNode(key, length, [value])
+                new.children[(child.key >> (bits - 1 - length)) & 1] = child
+                node.children[bit] = new
+                return
+
+            # glue node at the branching bit
+            glue = RoshTrieNode(key >> (bits - common) << (bits - common), common)
+            glue.children[(child.key >> (bits - 1 - common)) & 1] = child
+            glue.children[(key >> (bits - 1 - common)) & 1] = RoshTrieNode(key, length, [value])
+            node.children[bit] = glue
+            return
+
+    def remove(self, key, length, value):
+        '''
+        Removes a value inserted for the prefix. Nodes without values are
+        kept, they are skipped like glue nodes.
+        '''
+        node = self.root
+        while node is not None and node.length < length:
+            node = node.children[self.bit(key, node.length)]
+
+        if node is None or node.length != length or node.key != key or node.values is None:
+            return
+
+        for (i, item) in enumerate(node.values):
+            if item is value:
+                del node.values[i]
+                self.count -= 1
+                break
+
+        if not node.values:
+            node.values = None
+
+    def path(self, key, length):
+        '''
+        Yields the nodes covering the prefix, shortest first.
+        '''
+        node = self.root
+        while node is not None and node.length <= length and self.covers(node, key):
+            yield node
+            if node.length == length:
+                return
+            node = node.children[self.bit(key, node.length)]
+
+    def longest_match(self, key):
+        '''
+        Returns the most specific prefix node containing the address,
+        None if there is none.
+        '''
+        best = None
+        for node in self.path(key, self.bits):
+            if node.values is not None:
+                best = node
+        return best
+
+    def covering(self, key, length):
+        '''
+        Returns the prefix nodes containing the prefix, shortest first.
+        '''
+        return [node for node in self.path(key, length) if node.values is not None]
+
+    def longer(self, key, length):
+        '''
+        Yields the prefix nodes inside the prefix (including the prefix
+        itself) in address order.
+        '''
+        node = self.root
+        while node is not None and node.length < length:
+            if not self.covers(node, key):
+                return
+            node = node.children[self.bit(key, node.length)]
+
+        if node is not None and self.common(node.key, key, length) == length:
+            yield from self.walk(node)
+
+    def walk(self, node=None):
+        '''
+        Yields the prefix nodes of a subtree in address order.
+        '''
+        stack = [node or self.root]
+        while stack:
+            node = stack.pop()
+            if node.values is not None:
+                yield node
+            for child in reversed(node.children):
+                if child is not None:
+                    stack.append(child)
+
+    def prefixes(self):
+        '''
+        Yields the (key, length) tuples of the prefixes in address order.
+        '''
+        for node in self.walk():
+            yield (node.key, node.length)
+
+    def aggregate(self):
+        return aggregate(self.bits, self.prefixes())
+
+    def __len__(self):
+        return self.count
+
+def aggregate(bits, prefixes):
+    '''
+    Computes the minimal set of prefixes covering the distinct (key,
+    length) prefixes given in address order (shorter prefixes first):
+    covered prefixes are dropped and adjacent siblings merged. Returns a
+    list of (key, length, number of prefixes) tuples.
+    '''
+    stack = []
+    top = None
+    for (key, length) in chain(prefixes, [(None, None)]):
+        # prefixes inside the current top level prefix
+        if top is not None and key is not None and length >= top[1] and (key ^ top[0]) >> (bits - top[1]) == 0:
+            top[2] += 1
+            continue
+
+        if top is not None:
+            (top_key, top_length, count) = top
+
+            # merge with the preceding sibling
+            while stack and stack[-1][1] == top_length and top_length > 0:
+                (prev_key, prev_length, prev_count) = stack[-1]
+                shift = bits - top_length
+                if prev_key >> shift ^ top_key >> shift != 1 or (prev_key >> shift) & 1:
+                    break
+                stack.pop()
+                (top_key, top_length, count) = (prev_key, top_length - 1, prev_count + count)
+
+            stack.append((top_key, top_length, count))
+
+        top = None if key is None else [key, length, 1]
+
+    return stack
+
+def route_keys(family, routes, scope=None):
+    '''
+    Yields the prefix key, the prefix length and the route of route
+    records, `scope` (a test of the key and length) selects the routes.
+    '''
+    default = '::' if family == AF_INET6 else '0.0.0.0'
+    for route in routes:
+        key = int.from_bytes(inet_pton(family, route.dst or default), 'big')
+        if scope is None or scope(key, route.dst_len):
+            yield (key, route.dst_len, route)
+
+def build_trie(family, routes, scope=None):
+    '''
+    Builds a prefix trie of route records, `scope` (a test of the key and
+    length of a prefix) selects the routes inserted.
+    '''
+    trie = RoshPrefixTrie(family)
+    for (key, length, route) in route_keys(family, routes, scope):
+        trie.insert(key, length, route)
+
+    return trie
+
+def route_prefixes(family, routes):
+    '''
+    Yields the distinct (key, length) prefixes of route records in
+    address order. The prefixes are packed into one integer each, this
+    uses much less memory than a trie.
+    '''
+    for value in sorted({key << 8 | length for (key, length, route) in route_keys(family, routes)}):
+        yield (value >> 8, value & 0xff)
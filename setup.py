@@ -18,11 +18,9 @@ def version():
 
 def install_requires():
     requires = [
-        "cachetools",
         "prettytable",
         "prompt_toolkit",
         "pyroute2",
-        "fuzzyfinder",
         "setproctitle"
     ]
 
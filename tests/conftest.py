@@ -0,0 +1,30 @@
+import os
+import shutil
+import subprocess
+import uuid
+
+import pytest
+
+
+def ip(*args):
+    subprocess.run(['ip', *args], check=True, stdout=subprocess.DEVNULL)
+
+@pytest.fixture
+def netns():
+    '''
+    Creates a scratch netns namespace with a veth pair `d0`/`d1` (d0 has
+    10.77.0.1/24), requires root.
+    '''
+    if os.geteuid() != 0 or shutil.which('ip') is None:
+        pytest.skip('netns tests require root and iproute2')
+
+    name = f'rosh-test-{uuid.uuid4().hex[:8]}'
+    ip('netns', 'add', name)
+    try:
+        ip('-n', name, 'link', 'add', 'd0', 'type', 'veth', 'peer', 'name', 'd1')
+        ip('-n', name, 'addr', 'add', '10.77.0.1/24', 'dev', 'd0')
+        ip('-n', name, 'link', 'set', 'd1', 'up')
+        ip('-n', name, 'link', 'set', 'd0', 'up')
+        yield name
+    finally:
+        subprocess.run(['ip', 'netns', 'del', name], stderr=subprocess.DEVNULL)
@@ -0,0 +1,80 @@
+import time
+
+from rosh.abbrev import RoshAbbrevTrie
+
+BUILD_BUDGET = 1.0
+LOOKUP_BUDGET = 2.0
+
+
+def test_abbrev_lookup():
+    trie = RoshAbbrevTrie({
+        'interface': 1,
+        'ip': {
+            'route': 2,
+            'rule': 3,
+        },
+        'ipv6': 4,
+        'monitor': 5,
+        'neighbor': 6,
+        'netns': 7,
+    })
+
+    # exact names, even if they are a prefix of other names
+    assert trie.lookup('monitor') == (5, ())
+    assert trie.lookup('ipv6') == (4, ())
+    (ip, candidates) = trie.lookup('ip')
+    assert isinstance(ip, RoshAbbrevTrie)
+    assert candidates == ()
+
+    # unique abbreviations
+    assert trie.lookup('m') == (5, ())
+    assert trie.lookup('int') == (1, ())
+    assert trie.lookup('ipv') == (4, ())
+    assert trie.lookup('nei') == (6, ())
+    assert ip.lookup('ro') == (2, ())
+
+    # ambiguous abbreviations return the candidates
+    assert trie.lookup('n') == (None, ('neighbor', 'netns'))
+    assert trie.lookup('ne') == (None, ('neighbor', 'netns'))
+    assert trie.lookup('i') == (None, ('interface', 'ip', 'ipv6'))
+    assert ip.lookup('r') == (None, ('route', 'rule'))
+
+    # unknown names and the empty key
+    assert trie.lookup('x') == (None, ())
+    assert trie.lookup('monitors') == (None, ())
+    assert trie.lookup('') == (None, ())
+
+    assert 'mon' in trie
+    assert 'n' not in trie
+    assert 'bogus' not in trie
+
+def test_abbrev_empty_name():
+    # the empty name is the default entry of a command
+    trie = RoshAbbrevTrie({'': 1, 'detail': 2})
+
+    assert trie.lookup('') == (1, ())
+    assert trie.lookup('d') == (2, ())
+
+def test_abbrev_lookup_budget():
+    # synthetic command tree: 3 levels of 32 names sharing long prefixes
+    names = [f'command{i:02d}' for i in range(32)]
+    tree = {a: {b: {c: c for c in names} for b in names} for a in names}
+
+    start = time.monotonic()
+    trie = RoshAbbrevTrie(tree)
+    build = time.monotonic() - start
+
+    lines = [(a, b, c) for a in names[::4] for b in names[::4] for c in names]
+    start = time.monotonic()
+    for _ in range(100):
+        for line in lines:
+            node = trie
+            for name in line:
+                (node, _) = node.lookup(name)
+    elapsed = time.monotonic() - start
+
+    assert node == names[-1]
+    assert trie.lookup('command0') == (None, tuple(names[:10]))
+    assert build < BUILD_BUDGET
+    # 3 * 100 * 2048 lookups
+    assert elapsed < LOOKUP_BUDGET
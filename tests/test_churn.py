@@ -0,0 +1,19 @@
+from rosh.monitor.churn import RoshHeavyHitters
+
+
+def test_heavy_hitters_keep_grown_candidates():
+    hitters = RoshHeavyHitters(1024, 4)
+    for key in 'abcd':
+        hitters.add(key)
+
+    # x replaces a, the estimates of b/c/d grow past the one of x
+    for _ in range(100):
+        for key in 'bcdx':
+            hitters.add(key)
+
+    # y must only replace the smallest candidate
+    for _ in range(2):
+        hitters.add('y')
+
+    assert 'b' in hitters.top
+    assert set(hitters.top) == {'b', 'c', 'd', 'x'}
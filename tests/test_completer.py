@@ -0,0 +1,58 @@
+import time
+
+from prompt_toolkit.completion import CompleteEvent, WordCompleter
+from prompt_toolkit.document import Document
+
+from rosh.completer import RoshArgsTuplesCompleter, RoshTuplesCompleter
+
+
+def complete(completer, text):
+    return sorted(c.text for c in completer.get_completions(Document(text), CompleteEvent()))
+
+def test_tuples_completer():
+    completer = RoshTuplesCompleter({
+        'proto': WordCompleter(['boot', 'bgp']),
+        'table': WordCompleter(['main', 'local']),
+        'type': WordCompleter(['unicast']),
+    })
+
+    assert complete(completer, '') == ['proto', 'table', 'type']
+    assert complete(completer, 't') == ['table', 'type']
+    assert complete(completer, 'proto b') == ['bgp', 'boot']
+    # used keywords are not completed again
+    assert complete(completer, 'proto boot ') == ['table', 'type']
+    assert complete(completer, 'proto boot table main t') == ['type']
+    assert complete(completer, 'proto boot proto ') == []
+    assert complete(completer, 'bogus x ') == []
+
+def test_args_tuples_completer():
+    completer = RoshArgsTuplesCompleter({
+        'table': WordCompleter(['main']),
+        'uid': WordCompleter(['0']),
+    })
+
+    assert complete(completer, '10.0.0.1 ') == ['table', 'uid']
+    assert complete(completer, '10.0.0.1 table main ') == ['uid']
+
+def test_tuples_completer_size():
+    # the completer must not grow with the orderings of the tuples
+    tuples = {f'key{i}': WordCompleter([str(i)]) for i in range(16)}
+
+    start = time.monotonic()
+    completer = RoshTuplesCompleter(tuples)
+    assert complete(completer, 'key3 3 key7 7 key1') == sorted(f'key1{i}' for i in ('', *range(6)))
+    assert time.monotonic() - start < 0.1
+
+def test_route_completer_build():
+    from rosh.commands.show.ip.route import RoshShowIpRouteCommand
+    from rosh.commands.show.ipv6.route import RoshShowIpv6RouteCommand
+    from rosh.commands.show.ipv6.route.get import RoshShowIpv6RouteGetCommand
+
+    start = time.monotonic()
+    for command in (RoshShowIpRouteCommand, RoshShowIpv6RouteCommand, RoshShowIpv6RouteGetCommand):
+        command(None)
+    assert time.monotonic() - start < 0.1
+
+    completer = RoshShowIpRouteCommand(None).completer
+    assert complete(completer, '') == ['dst', 'gateway', 'oif', 'proto', 'scope', 'table', 'type']
+    assert complete(completer, 'type blackhole t') == ['table']
@@ -0,0 +1,108 @@
+import time
+from socket import AF_INET, AF_INET6
+
+from pyroute2 import IPRoute
+from pyroute2.netlink.rtnl.marshal import MarshalRtnl
+
+from conftest import ip
+
+from rosh.decoder import RoshRoute, RoshRouteDecoder
+from rosh.namespace import open_netns
+
+# RTM_NEWROUTE messages recorded from a route dump
+RECORDED_ROUTES = {
+    # 10.99.1.0/24 proto bgp nexthop via 10.77.0.2 dev d0 nexthop via 10.77.0.3 dev d0
+    'multipath': bytes.fromhex(
+        '500000001800020001000000d50e000002180000feba00010000000008000f00fe000000'
+        '080001000a630100240009001000000003000000080005000a4d00021000000003000000'
+        '080005000a4d0003'),
+    # 2001:db8:1::/48 via 2001:db8::2 dev d0 metric 1024 pref high
+    'ipv6': bytes.fromhex(
+        '880000001800020002000000d50e00000a300000fe0300010000000008000f00fe000000'
+        '1400010020010db800010000000000000000000008000600000400001400050020010db8'
+        '000000000000000000000002080004000300000024000c00000000000000000000000000'
+        '00000000000000000000000000000000000000000500140001000000'),
+    # 10.99.5.0/24 via 10.77.0.2 dev d0 table 1000 metric 20 (VRF table, the
+    # rtmsg has RT_TABLE_COMPAT)
+    'vrf': bytes.fromhex(
+        '440000001800020001000000d50e000002180000fc0300010000000008000f00e8030000'
+        '080001000a6305000800060014000000080005000a4d00020800040003000000'),
+}
+
+NLMSG_DONE = bytes.fromhex('140000000300020001000000d50e000000000000')
+
+# minimal speedup of the struct decoder over pyroute2
+DECODER_SPEEDUP = 4
+
+
+def records(routes):
+    return sorted(tuple(getattr(route, name) for name in RoshRoute.__slots__) for route in routes)
+
+def assert_parity(ipr):
+    '''
+    The struct decoder must return the same records as pyroute2 for a
+    route dump.
+    '''
+    decoder = RoshRouteDecoder()
+    for family in (AF_INET, AF_INET6):
+        expected = records(map(RoshRoute.from_nlmsg, ipr.get_routes(family=family)))
+        assert records(decoder.dump(ipr, family)) == expected
+
+def test_parity_current_namespace():
+    with IPRoute() as ipr:
+        assert_parity(ipr)
+
+def test_parity_route_types(netns):
+    for route in (
+        'route add 10.99.0.0/24 via 10.77.0.2 metric 100',
+        'route add 10.99.1.0/24 proto bgp nexthop via 10.77.0.2 nexthop via 10.77.0.3',
+        'route add blackhole 10.99.2.0/24 table 42',
+        'route add 10.99.3.0/24 dev d0 src 10.77.0.1 scope link',
+        '-6 addr add 2001:db8::1/64 dev d0 nodad',
+        '-6 route add 2001:db8:1::/48 via 2001:db8::2 pref high',
+        '-6 route add 2001:db8:2::/48 nexthop via 2001:db8::2 nexthop via 2001:db8::3',
+        'route add 10.99.4.0/24 tos 0x10 via 10.77.0.2',
+        '-6 route add 2001:db8:3::/48 from 2001:db8:4::/48 via 2001:db8::2',
+    ):
+        ip('-n', netns, *route.split())
+
+    ipr = open_netns(netns)
+    try:
+        assert_parity(ipr)
+    finally:
+        ipr.close()
+
+def test_recorded_routes():
+    (routes, done) = RoshRouteDecoder().decode(b''.join(RECORDED_ROUTES.values()) + NLMSG_DONE)
+    assert done
+    (multipath, ipv6, vrf) = routes
+
+    assert (multipath.dst, multipath.dst_len, multipath.table, multipath.proto) == ('10.99.1.0', 24, 254, 186)
+    assert (multipath.gateway, multipath.oif) == (None, None)
+    assert (multipath.nexthops, multipath.oifs) == (2, (3, 3))
+
+    assert (ipv6.family, ipv6.dst, ipv6.dst_len) == (AF_INET6, '2001:db8:1::', 48)
+    assert (ipv6.gateway, ipv6.oif, ipv6.priority, ipv6.pref) == ('2001:db8::2', 3, 1024, 1)
+    assert (ipv6.nexthops, ipv6.oifs) == (1, None)
+
+    assert (vrf.dst, vrf.table, vrf.gateway, vrf.oif, vrf.priority) == ('10.99.5.0', 1000, '10.77.0.2', 3, 20)
+
+    # same records as pyroute2
+    for (name, data) in RECORDED_ROUTES.items():
+        (msg, ) = MarshalRtnl().parse(data)
+        assert records(RoshRouteDecoder().decode(data)[0]) == records([RoshRoute.from_nlmsg(msg)]), name
+
+def test_decoder_benchmark():
+    data = b''.join(RECORDED_ROUTES.values()) * 3000
+
+    start = time.monotonic()
+    (routes, done) = RoshRouteDecoder().decode(data)
+    decoder = time.monotonic() - start
+
+    start = time.monotonic()
+    expected = [RoshRoute.from_nlmsg(msg) for msg in MarshalRtnl().parse(data)]
+    pyroute2 = time.monotonic() - start
+
+    assert len(routes) == len(expected) == 9000
+    assert records(routes) == records(expected)
+    assert decoder * DECODER_SPEEDUP < pyroute2
@@ -0,0 +1,27 @@
+import threading
+
+from rosh import Rosh
+
+
+def run(rosh, text):
+    cmdline = rosh.parse_command_line(text)
+    assert cmdline.error is None
+    cmdline.run()
+
+def test_fanout(netns, capsys):
+    rosh = Rosh('/nonexistent')
+
+    # tables are merged
+    run(rosh, f'netns {netns} show interface')
+    out = capsys.readouterr().out
+    rows = [[col.strip() for col in line.split('|')] for line in out.splitlines()]
+    assert [(row[0], row[2]) for row in rows if 'veth' in row] == [(netns, 'd0'), (netns, 'd1')]
+
+    # other output is printed per namespace
+    run(rosh, f'netns {netns} show interface lo')
+    out = capsys.readouterr().out
+    assert out.startswith(f'netns {netns}:\n')
+    assert '  name : lo\n' in out
+
+    # no worker thread is left
+    assert not [thread for thread in threading.enumerate() if thread.name.startswith('RoshFanout')]
@@ -0,0 +1,52 @@
+import re
+import time
+
+from rosh.filters import RoshFilter, RoshFilterChain, joinable
+from rosh.filters.exclude import RoshExcludeFilter
+from rosh.filters.include import RoshIncludeFilter
+
+FILTER_BUDGET = 4.0
+
+
+def route_rows(count):
+    for i in range(count):
+        yield [f'10.{(i >> 8) & 255}.{i & 255}.0/24', f'192.0.2.{i % 7 + 1}', f'vb{i % 13}', '-', '-',
+               'bgp' if i % 3 else 'static', 'global', '0']
+
+def test_joinable():
+    for pattern in ('vb1', r'10\.1\.\d+', r'\bbgp\b', 'vb[0-9]+', 'a.b', '(?:bgp|static)', '[]x]', r'[\]^]', r'\.'):
+        assert joinable(re.compile(pattern)), pattern
+
+    for pattern in ('^10', '0$', r'a\sb', r'\Sb', r'\D', '[^x]', 'a\nb', r'a\nb', r'\x0a', r'[\b-z]',
+                    r'\Aa', r'a\Z', '(?s)a.b', '(?m)^a', '(?=a)', '(?<!a)b', r'(a)\1', '(?P<x>a)'):
+        assert not joinable(re.compile(pattern)), pattern
+
+    for flags in (re.DOTALL, re.MULTILINE, re.VERBOSE):
+        assert not joinable(re.compile('a.b', flags))
+
+def test_filter_chain_parity():
+    rows = list(route_rows(2000))
+    for pattern in ('vb1', r'\.1\.', r'vb1\b', r'^10\.1\.', 'static|vb12', r'0\s', '[^0-9./]+$', r'c$'):
+        for cls in (RoshIncludeFilter, RoshExcludeFilter):
+            flt = cls(None, cls.__name__, pattern)
+            chain = RoshFilterChain([flt])
+            expected = [row for row in rows if RoshFilter.filter_test_list([flt], row)]
+            assert [row for row in rows if chain.test(row)] == expected, (cls.__name__, pattern)
+
+def test_filter_chain_budget():
+    filters = [
+        RoshIncludeFilter(None, 'include', 'bgp'),
+        RoshIncludeFilter(None, 'include', r'vb1\d'),
+        RoshExcludeFilter(None, 'exclude', r'192\.0\.2\.[12]\b'),
+    ]
+    chain = RoshFilterChain(filters)
+
+    start = time.monotonic()
+    count = sum(1 for row in route_rows(1000000) if chain.test(row))
+    elapsed = time.monotonic() - start
+
+    # per filter and column matching
+    expected = sum(1 for row in route_rows(100000) if RoshFilter.filter_test_list(filters, row))
+    assert sum(1 for row in route_rows(100000) if chain.test(row)) == expected
+    assert count > 0
+    assert elapsed < FILTER_BUDGET
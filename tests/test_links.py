@@ -0,0 +1,30 @@
+import time
+
+from conftest import ip
+
+from rosh.links import RoshLinkIndex
+from rosh.namespace import open_netns
+
+
+def test_link_index(netns):
+    ipr = open_netns(netns)
+    links = RoshLinkIndex(ipr)
+    try:
+        index = links.index('d0')
+        assert links.ifname(index) == 'd0'
+
+        # lookups read the index, the events are applied by refresh()
+        ip('-n', netns, 'link', 'set', 'd0', 'name', 'd2')
+        assert links.ifname(index) == 'd0'
+        links.refresh()
+        assert links.ifname(index) == 'd2'
+        assert links.index('d0') is None
+
+        # lookups do not poll the event socket
+        start = time.monotonic()
+        for _ in range(100000):
+            links.ifname(index)
+        assert time.monotonic() - start < 0.1
+    finally:
+        links.close()
+        ipr.close()
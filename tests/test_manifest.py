@@ -0,0 +1,33 @@
+import json
+import os
+import subprocess
+import sys
+
+
+# seconds a cold start (no cached manifest) may take
+COLD_BUILD_BUDGET = 3.0
+
+BUILD = '''
+import time
+start = time.monotonic()
+import rosh
+rosh.Rosh('/nonexistent')
+print(time.monotonic() - start)
+'''
+
+def build(cache_dir):
+    env = dict(os.environ, XDG_CACHE_HOME=str(cache_dir))
+    p = subprocess.run([sys.executable, '-c', BUILD], env=env, capture_output=True, text=True, check=True)
+    return float(p.stdout)
+
+def test_manifest_cold_build(tmp_path):
+    elapsed = build(tmp_path)
+    assert elapsed < COLD_BUILD_BUDGET
+
+    with open(tmp_path / 'rosh' / 'manifest.json') as fh:
+        manifest = json.load(fh)
+    paths = [entry['path'] for entry in manifest['commands']]
+    assert ['show', 'ipv6', 'route', 'get'] in paths
+
+    # the cached manifest is used on the next start
+    assert build(tmp_path) < elapsed
@@ -0,0 +1,78 @@
+from socket import AF_INET
+
+from conftest import ip
+
+from rosh.mirror import RoshRouteMirror
+from rosh.namespace import open_netns
+
+
+def routes(mirror, dst, **filter):
+    return [route for route in mirror.get_route_records(AF_INET, **filter) if route.dst == dst]
+
+def test_route_replace(netns):
+    ipr = open_netns(netns)
+    mirror = RoshRouteMirror(ipr)
+    try:
+        assert routes(mirror, '10.99.0.0') == []
+
+        ip('-n', netns, 'route', 'add', '10.99.0.0/24', 'via', '10.77.0.2')
+        assert [route.gateway for route in routes(mirror, '10.99.0.0')] == ['10.77.0.2']
+
+        # a replace must not leave the entry of the old gateway
+        ip('-n', netns, 'route', 'replace', '10.99.0.0/24', 'via', '10.77.0.3')
+        assert [route.gateway for route in routes(mirror, '10.99.0.0')] == ['10.77.0.3']
+
+        ip('-n', netns, 'route', 'del', '10.99.0.0/24')
+        assert routes(mirror, '10.99.0.0') == []
+    finally:
+        mirror.close()
+        ipr.close()
+
+def test_route_records(netns):
+    ip('-n', netns, 'route', 'add', '10.99.1.0/24', 'proto', 'bgp', 'nexthop', 'via', '10.77.0.2', 'nexthop', 'via', '10.77.0.3')
+    ip('-n', netns, 'route', 'add', '10.99.2.0/24', 'via', '10.77.0.2', 'table', '42')
+
+    ipr = open_netns(netns)
+    mirror = RoshRouteMirror(ipr)
+    try:
+        oif = ipr.link_lookup(ifname='d0')[0]
+
+        # the records of the dump and of the events are the same
+        [dumped] = routes(mirror, '10.99.1.0')
+        ip('-n', netns, 'route', 'add', '10.99.3.0/24', 'proto', 'bgp', 'nexthop', 'via', '10.77.0.2', 'nexthop', 'via', '10.77.0.3')
+        [added] = routes(mirror, '10.99.3.0')
+        assert (added.nexthops, added.oifs, added.proto) == (dumped.nexthops, dumped.oifs, dumped.proto) == (2, (oif, oif), 186)
+
+        # multipath routes match the interfaces of their next hops
+        assert len(routes(mirror, '10.99.1.0', oif=oif)) == 1
+        assert routes(mirror, '10.99.1.0', oif=oif + 100) == []
+
+        assert [route.table for route in routes(mirror, '10.99.2.0', table=42)] == [42]
+        assert routes(mirror, '10.99.2.0', table=254) == []
+    finally:
+        mirror.close()
+        ipr.close()
+
+def test_route_trie(netns):
+    ipr = open_netns(netns)
+    mirror = RoshRouteMirror(ipr)
+    try:
+        trie = mirror.get_route_trie(AF_INET)
+        key = trie.to_int('10.99.0.1')
+        assert trie.longest_match(key) is None
+
+        # the trie of the mirror is updated by the events
+        ip('-n', netns, 'route', 'add', '10.99.0.0/24', 'via', '10.77.0.2')
+        assert mirror.get_route_trie(AF_INET) is trie
+        assert [route.gateway for route in trie.longest_match(key).values] == ['10.77.0.2']
+
+        ip('-n', netns, 'route', 'replace', '10.99.0.0/24', 'via', '10.77.0.3')
+        mirror.refresh()
+        assert [route.gateway for route in trie.longest_match(key).values] == ['10.77.0.3']
+
+        ip('-n', netns, 'route', 'del', '10.99.0.0/24')
+        mirror.refresh()
+        assert trie.longest_match(key) is None
+    finally:
+        mirror.close()
+        ipr.close()
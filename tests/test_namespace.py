@@ -0,0 +1,63 @@
+from socket import AF_INET
+import time
+
+from conftest import ip
+
+from rosh.decoder import RoshRouteDecoder
+from rosh.namespace import RoshNamespacePool, open_netns
+
+
+def test_pool_replaced_netns(netns):
+    pool = RoshNamespacePool(timeout=0)
+    try:
+        old = pool.get(netns)
+        assert pool.get(netns) is old
+
+        # the handle must not refer to the deleted namespace
+        ip('netns', 'del', netns)
+        ip('netns', 'add', netns)
+        new = pool.get(netns)
+        assert new is not old
+        assert [link.get_attr('IFLA_IFNAME') for link in new.ipr.get_links()] == ['lo']
+        assert pool.stats()[1]['stale'] == 1
+    finally:
+        pool.close()
+
+def test_pool_deleted_netns(netns):
+    pool = RoshNamespacePool(timeout=0)
+    try:
+        pool.get(netns)
+        pool.get()
+
+        ip('netns', 'del', netns)
+        pool.expire()
+        assert list(pool.handles) == [None]
+        assert pool.stats()[1]['stale'] == 1
+    finally:
+        pool.close()
+
+def test_netns_modes_benchmark(netns, tmp_path):
+    # 500k routes, dumped through a NetNS proxy and an in-process socket
+    batch = tmp_path / 'routes.batch'
+    batch.write_text(''.join(f'route add {100 + (i >> 16)}.{(i >> 8) & 255}.{i & 255}.0/24 dev d0\n' for i in range(500000)))
+    ip('-n', netns, '-batch', str(batch))
+
+    results = {}
+    for mode in ('proxy', 'socket'):
+        start = time.monotonic()
+        handles = [open_netns(netns, mode) for _ in range(8)]
+        opened = time.monotonic() - start
+
+        start = time.monotonic()
+        count = sum(1 for route in RoshRouteDecoder().dump(handles[0], AF_INET) if route.table == 254)
+        dumped = time.monotonic() - start
+
+        for ipr in handles:
+            ipr.close()
+        results[mode] = (count, opened, dumped)
+
+    assert results['socket'][0] == results['proxy'][0] == 500001
+    # sockets are opened without forking a proxy process
+    assert results['socket'][1] < results['proxy'][1]
+    # the dump must not be slower than through the proxy (timing noise)
+    assert results['socket'][2] < results['proxy'][2] * 1.5
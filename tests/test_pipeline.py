@@ -0,0 +1,76 @@
+import io
+
+from rosh.filters.head import RoshHeadFilter
+from rosh.filters.uniq import RoshUniqFilter
+from rosh.output.columns import prefix_key
+from rosh.output.pipeline import RoshOutputStop
+from rosh.output.stream import RoshOutputStream
+from rosh.output.table import RoshOutputTable
+
+
+ROWS = [
+    ['10.0.3.0/24', 'boot'],
+    ['10.0.1.0/24', 'static'],
+    ['10.0.2.0/24', 'boot'],
+    ['10.0.0.0/24', 'bgp'],
+]
+
+def stream(filters, sortby='dst'):
+    output = io.StringIO()
+    tbl = RoshOutputStream(filters, file=output)
+    tbl.field_names = ['dst', 'proto']
+    tbl.types['dst'] = prefix_key
+    tbl.sortby = sortby
+    try:
+        for row in ROWS:
+            tbl.add_row(row)
+        tbl.close()
+    except RoshOutputStop:
+        # stopped by head
+        pass
+    return [line.split()[0::2] for line in output.getvalue().splitlines()[2:]]
+
+def table(filters):
+    tbl = RoshOutputTable(filters)
+    tbl.field_names = ['dst', 'proto']
+    tbl.types['dst'] = prefix_key
+    tbl.sortby = 'dst'
+    for row in ROWS:
+        tbl.add_row(row)
+    return [line.split()[0::2] for line in tbl.get_string().splitlines()[2:]]
+
+def head(count):
+    return RoshHeadFilter(None, 'head', str(count))
+
+def uniq(*args):
+    return RoshUniqFilter(None, 'uniq', *args)
+
+def test_head():
+    # the first rows of the default order
+    assert stream([head(2)]) == [['10.0.0.0/24', 'bgp'], ['10.0.1.0/24', 'static']]
+    assert table([head(2)]) == [['10.0.0.0/24', 'bgp'], ['10.0.1.0/24', 'static']]
+
+    # tables without order stop after the first rows
+    assert stream([head(2)], sortby=None) == [['10.0.3.0/24', 'boot'], ['10.0.1.0/24', 'static']]
+
+def test_uniq():
+    # the default order is kept if its column is kept
+    assert stream([uniq('dst')]) == [['10.0.0.0/24'], ['10.0.1.0/24'], ['10.0.2.0/24'], ['10.0.3.0/24']]
+    assert stream([uniq('-c', 'proto')]) == [['boot', '2'], ['static', '1'], ['bgp', '1']]
+    assert table([uniq('-c', 'proto')]) == [['boot', '2'], ['static', '1'], ['bgp', '1']]
+
+    # rows of uniq are passed when the table is closed
+    assert stream([uniq('-c', 'proto'), head(1)], sortby=None) == [['boot', '2']]
+    assert stream([uniq('dst'), head(1)]) == [['10.0.0.0/24']]
+
+def test_uniq_columns():
+    field_names = ['dst', 'gw', 'oif', 'prio', 'pref', 'proto']
+
+    assert RoshUniqFilter.validate_columns(None, field_names, ['-c', 'proto', 'o']) == (None, None)
+    assert RoshUniqFilter.validate_columns(None, field_names, ['dst', 'foo']) == (2, 'column "foo" is unknown')
+    assert RoshUniqFilter.validate_columns(None, field_names, ['-c', 'pr']) == (2, 'column "pr" is ambiguous')
+    assert RoshUniqFilter.validate_columns(None, None, ['foo']) == (None, None)
+
+    assert RoshUniqFilter.columns(field_names, ['-c', 'proto']) == ['proto', 'count']
+    assert RoshUniqFilter.columns(field_names, ['o', 'GW']) == ['oif', 'gw']
+    assert RoshUniqFilter.columns(field_names, []) == field_names
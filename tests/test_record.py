@@ -0,0 +1,70 @@
+import gzip
+import subprocess
+import time
+from types import SimpleNamespace
+
+from pyroute2.netlink.rtnl import RTMGRP_IPV4_ROUTE
+
+from rosh.commands.monitor import RoshMonitor
+from rosh.monitor import RoshEventSource
+from rosh.monitor.record import LOG_MAGIC, RoshEventRecorder, RoshEventReplay
+from rosh.namespace import open_netns
+
+
+# route events per batch of the benchmark (one add and one del per route)
+BENCH_ROUTES = 50000
+
+# events per second of CPU time the recorder has to keep up with
+BENCH_RATE = 100000
+
+def test_record_validate(tmp_path):
+    monitor = RoshMonitor(SimpleNamespace(register_quit_fn=lambda fn: None))
+
+    (tmp_path / 'empty').write_bytes(b'')
+    (tmp_path / 'log').write_bytes(LOG_MAGIC)
+    (tmp_path / 'text').write_text('no event log\n')
+    with gzip.open(tmp_path / 'log.gz', 'wb') as file:
+        file.write(LOG_MAGIC)
+    with gzip.open(tmp_path / 'text.gz', 'wb') as file:
+        file.write(b'no event log\n')
+
+    for name in ('new', 'empty', 'log', 'log.gz'):
+        assert monitor.validate_record(['record', str(tmp_path / name)]) == (None, None)
+
+    for name in ('text', 'text.gz'):
+        assert monitor.validate_record(['record', str(tmp_path / name)]) == (1, f'{tmp_path / name} is no event log')
+
+def test_record_rate(netns, tmp_path):
+    '''
+    Records the route events of adding and deleting BENCH_ROUTES routes
+    (as fast as `ip -batch` does), no event may be dropped and the
+    recorder must not use more CPU time than BENCH_RATE events/s take.
+    '''
+    for op in ('add', 'del'):
+        (tmp_path / op).write_text(''.join(f'route {op} blackhole 100.{64 + i // 65536}.{i // 256 % 256}.{i % 256}/32\n' for i in range(BENCH_ROUTES)))
+
+    ipr = open_netns(netns)
+    try:
+        source = RoshEventSource(ipr, RTMGRP_IPV4_ROUTE)
+        recorder = RoshEventRecorder(source, str(tmp_path / 'events.log'))
+
+        cpu = time.process_time()
+        for op in ('add', 'del'):
+            subprocess.run(['ip', '-n', netns, '-batch', str(tmp_path / op)], check=True)
+        # let the recorder drain the socket
+        time.sleep(0.5)
+        recorder.close()
+        cpu = time.process_time() - cpu
+    finally:
+        ipr.close()
+
+    replay = RoshEventReplay(str(tmp_path / 'events.log'), 0)
+    events = 0
+    while not replay.done:
+        events += len(replay.read())
+    replay.close()
+
+    print(f'{events} events, {events / cpu:.0f} events/s of CPU time')
+    assert source.overflows == 0
+    assert events == 2 * BENCH_ROUTES
+    assert events / cpu >= BENCH_RATE
@@ -0,0 +1,24 @@
+from rosh import Rosh
+from rosh.filters.sort import RoshSortFilter
+
+
+def test_sort_columns():
+    field_names = ['dst', 'gw', 'oif', 'prio', 'pref', 'proto']
+
+    assert RoshSortFilter.validate_columns(None, field_names, ['dst']) == (None, None)
+    assert RoshSortFilter.validate_columns(None, field_names, ['PRI', 'desc']) == (None, None)
+    assert RoshSortFilter.validate_columns(None, field_names, ['foo']) == (1, 'column "foo" is unknown')
+    assert RoshSortFilter.validate_columns(None, field_names, ['pr']) == (1, 'column "pr" is ambiguous')
+
+    # commands with unknown columns are not checked
+    assert RoshSortFilter.validate_columns(None, None, ['foo']) == (None, None)
+
+def test_sort_command_line():
+    rosh = Rosh('/nonexistent')
+
+    assert rosh.parse_command_line('show ipv6 route | sort prio desc').error is None
+    assert rosh.parse_command_line('show ipv6 route | sort foo').error == (28, 'column "foo" is unknown')
+
+    # the columns of the table after uniq
+    assert rosh.parse_command_line('show ipv6 route | uniq -c proto | sort count desc').error is None
+    assert rosh.parse_command_line('show ipv6 route | uniq proto | sort count').error == (34, 'column "count" is unknown')
@@ -0,0 +1,38 @@
+import subprocess
+import sys
+
+from rosh.startup import RoshStartupProfile
+
+
+def test_startup_probe_repeated():
+    # the marker must be reported on every run, regardless of the output
+    # of background threads
+    for _ in range(8):
+        profile = RoshStartupProfile('/nonexistent')
+        profile.run()
+
+        assert profile.first_prompt is not None
+        assert profile.imports
+
+# time to the first prompt, in milliseconds
+STARTUP_BUDGET = 1500
+
+def run_rosh(*args):
+    return subprocess.run(
+        [sys.executable, '-c', 'import rosh; rosh.main()', '-c', '/nonexistent', *args],
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        text=True
+    )
+
+def test_startup_budget():
+    p = run_rosh('--startup-budget', str(STARTUP_BUDGET))
+
+    assert 'time to first prompt:' in p.stdout
+    assert p.returncode == 0, p.stdout
+
+def test_startup_budget_exceeded():
+    p = run_rosh('--startup-budget', '0.001')
+
+    assert 'startup budget:' in p.stdout
+    assert p.returncode == 1
@@ -0,0 +1,62 @@
+import io
+import random
+import time
+
+from rosh.output.columns import int_key, prefix_key
+from rosh.output.stream import RoshOutputStream
+
+SORT_BUDGET = 12.0
+
+
+def route_prefixes(count):
+    random.seed(1)
+    prefixes = [f'{10 + (i >> 16) % 200}.{(i >> 8) & 255}.{i & 255}.0/24' for i in range(count)]
+    random.shuffle(prefixes)
+    return prefixes
+
+def route_rows(prefixes):
+    # rows are created while the table is written, like the rows of a dump
+    for prefix in prefixes:
+        yield [prefix, '-', 'vb1', '-', '-', 'static', 'global', 0]
+
+def write_table(rows, sortby='dst', limit=None, **kwargs):
+    output = io.StringIO()
+    tbl = RoshOutputStream(file=output, **kwargs)
+    tbl.field_names = ['dst', 'gw', 'oif', 'prio', 'pref', 'proto', 'scope', 'flags']
+    tbl.types['dst'] = prefix_key
+    tbl.types['flags'] = int_key
+    tbl.sortby = sortby
+    tbl.limit = limit
+    for row in rows:
+        tbl.add_row(row)
+    tbl.close()
+    return output.getvalue().splitlines()
+
+def test_stream_sort():
+    rows = list(route_rows(route_prefixes(1000)))
+    rows.append(['2001:db8::/32', 'fe80::1', 'vb1', '-', '-', 'static', 'global', 0])
+    lines = write_table(rows)
+
+    assert lines[0].split() == ['DST', '|', 'GW', '|', 'OIF', '|', 'PRIO', '|', 'PREF', '|', 'PROTO', '|', 'SCOPE', '|', 'FLAGS']
+    assert len(lines) == 2 + len(rows)
+    assert [line.split()[0] for line in lines[2:]] == sorted((row[0] for row in rows), key=prefix_key)
+    # exact widths, the IPv6 gateway is the widest value
+    assert lines[1].split('+')[1] == '-' * len(' fe80::1 ')
+
+    # spilled runs are merged into the same table
+    assert write_table(rows, chunk=100, block=7) == lines
+
+    # the first rows of the sorted table
+    first = write_table(rows, limit=10)
+    assert [line.split()[0] for line in first[2:]] == [line.split()[0] for line in lines[2:12]]
+
+def test_stream_sort_budget():
+    prefixes = route_prefixes(1000000)
+
+    start = time.monotonic()
+    lines = write_table(route_rows(prefixes))
+    elapsed = time.monotonic() - start
+
+    assert len(lines) == 2 + len(prefixes)
+    assert [line.split(maxsplit=1)[0] for line in lines[2:]] == sorted(prefixes, key=prefix_key)
+    assert elapsed < SORT_BUDGET
@@ -0,0 +1,65 @@
+from socket import AF_INET
+from types import SimpleNamespace
+
+from rosh.trie import aggregate, build_trie, route_prefixes, RoshPrefixTrie
+
+
+def route(prefix, table=254):
+    (dst, length) = prefix.split('/')
+    return SimpleNamespace(dst=dst, dst_len=int(length), table=table)
+
+ROUTES = [
+    route('0.0.0.0/0'),
+    route('10.0.0.0/24'),
+    route('10.0.0.0/25'),
+    route('10.0.1.0/24'),
+    route('10.0.1.0/24', table=42),
+    route('10.0.3.0/24'),
+    route('10.1.0.0/16'),
+    route('10.1.2.0/24'),
+]
+
+def prefixes(trie, nodes):
+    return [trie.format(node.key, node.length) for node in nodes]
+
+def test_aggregate():
+    trie = build_trie(AF_INET, ROUTES[1:])
+    result = [(trie.format(key, length), count) for (key, length, count) in trie.aggregate()]
+    assert result == [('10.0.0.0/23', 3), ('10.0.3.0/24', 1), ('10.1.0.0/16', 2)]
+
+    # the packed prefixes of the routes give the same result
+    assert list(route_prefixes(AF_INET, ROUTES[1:])) == list(trie.prefixes())
+    assert aggregate(trie.bits, route_prefixes(AF_INET, ROUTES[1:])) == trie.aggregate()
+
+    # the default route covers all
+    assert aggregate(trie.bits, route_prefixes(AF_INET, ROUTES)) == [(0, 0, 7)]
+
+def test_scope():
+    trie = build_trie(AF_INET, ROUTES)
+    (key, length) = trie.parse('10.0.0.0/16')
+
+    # only the routes in the scope of the query are inserted
+    inside = build_trie(AF_INET, ROUTES, lambda route_key, route_length: route_length >= length and (route_key ^ key) >> (32 - length) == 0)
+    assert len(inside) == 5
+    assert prefixes(inside, inside.longer(key, length)) == prefixes(trie, trie.longer(key, length))
+
+    (key, length) = trie.parse('10.1.2.0/24')
+    covering = build_trie(AF_INET, ROUTES, lambda route_key, route_length: route_length <= length and (route_key ^ key) >> (32 - route_length) == 0)
+    assert prefixes(covering, covering.covering(key, length)) == ['0.0.0.0/0', '10.1.0.0/16', '10.1.2.0/24']
+
+def test_remove():
+    trie = build_trie(AF_INET, ROUTES)
+    (key, length) = trie.parse('10.0.1.0/24')
+
+    trie.remove(key, length, ROUTES[4])
+    assert [value.table for value in trie.longest_match(key).values] == [254]
+
+    trie.remove(key, length, ROUTES[3])
+    assert prefixes(trie, [trie.longest_match(key)]) == ['0.0.0.0/0']
+    assert prefixes(trie, trie.walk()) == ['0.0.0.0/0', '10.0.0.0/24', '10.0.0.0/25', '10.0.3.0/24', '10.1.0.0/16', '10.1.2.0/24']
+    assert len(trie) == 6
+
+    # unknown values and prefixes are ignored
+    trie.remove(key, length, ROUTES[3])
+    trie.remove(*trie.parse('192.168.0.0/16'), ROUTES[0])
+    assert len(trie) == 6
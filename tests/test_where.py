@@ -0,0 +1,19 @@
+from rosh.filters.where import RoshWhereFilter
+
+
+def validate(field_names, column):
+    return RoshWhereFilter.validate_columns(None, field_names, [column, '==', '1'])
+
+def test_where_columns():
+    field_names = ['dst', 'gw', 'oif', 'prio', 'pref', 'proto']
+
+    assert validate(field_names, 'dst') == (None, None)
+    # abbreviated and upper case names
+    assert validate(field_names, 'o') == (None, None)
+    assert validate(field_names, 'GW') == (None, None)
+
+    assert validate(field_names, 'foo') == (1, 'column "foo" is unknown')
+    assert validate(field_names, 'pr') == (1, 'column "pr" is ambiguous')
+
+    # commands with unknown columns are not checked
+    assert validate(None, 'foo') == (None, None)